@@ -0,0 +1,329 @@
+"""
+Service HTTP (ASGI, Starlette) exposant le pipeline d'entretien aux intégrations
+externes (LMS...), sans passer par l'interface Streamlit.
+
+Endpoints (JSON, sauf mention contraire) :
+    GET  /health
+    GET  /metrics              métriques au format Prometheus
+    POST /profile              {cv_text, job_text}                          -> profil
+    POST /plan                 {profile, interviewer_profile?, n_questions?} -> {plan}
+    POST /prepare              {cv_text, job_text, ...}   -> flux NDJSON (analyse puis plan)
+    POST /evaluate             {question, answer, question_type?, profile?, job_text?} -> évaluation
+    POST /evaluate/batch       {items: [...], profile?, job_text?}           -> flux NDJSON
+    POST /transcribe?ext=wav   corps = octets audio                          -> {text}
+    POST /report               {history, mode?}                              -> {report}
+
+Les fonctions de src/ sont bloquantes : elles s'exécutent dans le pool de
+threads de l'ASGI, avec un délai maximal par requête (INTERVIEW_API_TIMEOUT_S).
+Un délai dépassé renvoie 504 au client mais n'interrompt pas le thread (ni
+ses appels LLM, bornés par GROQ_HTTP_TIMEOUT) : au plus
+INTERVIEW_API_MAX_CONCURRENCY appels s'exécutent à la fois, et un appel
+abandonné garde sa place jusqu'à sa fin réelle.
+
+Codes d'erreur : 400 pour une requête invalide, 503 si tous les créneaux
+restent occupés pendant le délai, 504 pour un délai dépassé, 502 pour un
+échec en amont (API du LLM, sortie inexploitable).
+
+Le service est sans état : on le met à l'échelle en lançant plusieurs processus.
+
+Lancement :
+    uvicorn api:app --host 0.0.0.0 --port 8000 --workers 4
+"""
+import asyncio
+import json
+import os
+from typing import Any, AsyncIterator, Callable, Dict, List
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from src.analyze_inputs import build_profile, extract_cv_info, extract_job_info
+from src.evaluator import evaluate_prepared, prepare_evaluation
+from src.final_report import REPORT_MODES, generate_final_report
+from src.instrumentation import to_prometheus
+from src.plan_interview import generate_interview_plan
+
+# Délai maximal de traitement d'une requête (ou d'un élément d'un flux), en secondes
+REQUEST_TIMEOUT_S = float(os.getenv("INTERVIEW_API_TIMEOUT_S", "90"))
+
+# Appels bloquants simultanés par processus (y compris ceux dont le délai est dépassé)
+MAX_CONCURRENCY = int(os.getenv("INTERVIEW_API_MAX_CONCURRENCY", "16"))
+_slots = asyncio.Semaphore(MAX_CONCURRENCY)
+
+# Bornes de la taille d'un plan d'entretien
+MIN_QUESTIONS = 1
+MAX_QUESTIONS = 20
+
+# Taille maximale d'un lot d'évaluations et d'un fichier audio
+MAX_BATCH_ITEMS = 50
+MAX_AUDIO_BYTES = 25 * 1024 * 1024
+
+DEFAULT_INTERVIEWER = (
+    "Manager technique backend, ton direct mais bienveillant, "
+    "s'intéresse aux projets concrets et aux résultats chiffrés."
+)
+
+NDJSON = "application/x-ndjson"
+
+
+class APIError(Exception):
+    """
+    Erreur renvoyée telle quelle au client, avec son code HTTP.
+    """
+
+    def __init__(self, status_code: int, message: str) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+def _release_slot(task: "asyncio.Future[Any]") -> None:
+    _slots.release()
+    # Résultat d'un appel abandonné (délai dépassé) : exception consommée, pas de trace parasite
+    if not task.cancelled():
+        task.exception()
+
+
+async def _run(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Exécute une fonction bloquante de src/ dans le pool de threads, avec délai
+    maximal. Le créneau n'est libéré qu'à la fin réelle du thread, même si le
+    client a déjà reçu le 504.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + REQUEST_TIMEOUT_S
+    try:
+        await asyncio.wait_for(_slots.acquire(), REQUEST_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        raise APIError(503, "Service saturé, réessayez plus tard.")
+
+    task = asyncio.ensure_future(run_in_threadpool(fn, *args, **kwargs))
+    task.add_done_callback(_release_slot)
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), max(deadline - loop.time(), 0))
+    except asyncio.TimeoutError:
+        raise APIError(504, f"Délai dépassé ({REQUEST_TIMEOUT_S:.0f} s).")
+
+
+async def _json_body(request: Request) -> Dict[str, Any]:
+    try:
+        body = await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise APIError(400, "Corps JSON invalide.")
+    if not isinstance(body, dict):
+        raise APIError(400, "Le corps doit être un objet JSON.")
+    return body
+
+
+def _required(body: Dict[str, Any], *fields: str, kind: type = str) -> List[Any]:
+    missing = [name for name in fields if not body.get(name)]
+    if missing:
+        raise APIError(400, f"Champ(s) manquant(s) : {', '.join(missing)}")
+    for name in fields:
+        _check_type(name, body[name], kind)
+    return [body[name] for name in fields]
+
+
+def _optional(body: Dict[str, Any], name: str, kind: type = str) -> Any:
+    value = body.get(name)
+    if value is not None:
+        _check_type(name, value, kind)
+    return value
+
+
+def _check_type(name: str, value: Any, kind: type) -> None:
+    if not isinstance(value, kind):
+        expected = {str: "une chaîne", dict: "un objet", list: "une liste"}.get(kind, kind.__name__)
+        raise APIError(400, f"'{name}' doit être {expected}.")
+
+
+def _n_questions(body: Dict[str, Any]) -> int:
+    value = body.get("n_questions")
+    if value is None:
+        return 8
+    if isinstance(value, bool) or not isinstance(value, int) or not MIN_QUESTIONS <= value <= MAX_QUESTIONS:
+        raise APIError(400, f"'n_questions' doit être un entier entre {MIN_QUESTIONS} et {MAX_QUESTIONS}.")
+    return value
+
+
+def _ndjson_line(payload: Dict[str, Any]) -> bytes:
+    return (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _error_payload(e: Exception) -> Dict[str, Any]:
+    if isinstance(e, APIError):
+        return {"error": e.message, "status": e.status_code}
+    return {"error": f"{type(e).__name__}: {e}", "status": 502}
+
+
+# ---------- Endpoints ----------
+
+async def health(request: Request) -> Response:
+    return JSONResponse({"status": "ok"})
+
+
+async def metrics(request: Request) -> Response:
+    return PlainTextResponse(to_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+async def profile_endpoint(request: Request) -> Response:
+    body = await _json_body(request)
+    cv_text, job_text = _required(body, "cv_text", "job_text")
+    return JSONResponse(await _run(build_profile, cv_text, job_text))
+
+
+async def plan_endpoint(request: Request) -> Response:
+    body = await _json_body(request)
+    (profile,) = _required(body, "profile", kind=dict)
+    plan = await _run(
+        generate_interview_plan,
+        profile,
+        interviewer_profile=_optional(body, "interviewer_profile") or DEFAULT_INTERVIEWER,
+        n_questions=_n_questions(body),
+    )
+    return JSONResponse({"plan": plan})
+
+
+async def prepare_endpoint(request: Request) -> Response:
+    """
+    Analyse CV/offre puis plan, en flux NDJSON : une ligne par étape terminée,
+    pour que le client affiche la progression sans attendre la fin.
+    """
+    body = await _json_body(request)
+    cv_text, job_text = _required(body, "cv_text", "job_text")
+    interviewer_profile = _optional(body, "interviewer_profile") or DEFAULT_INTERVIEWER
+    n_questions = _n_questions(body)
+
+    async def events() -> AsyncIterator[bytes]:
+        try:
+            # Les deux extractions sont indépendantes
+            cv_info, job_info = await asyncio.gather(
+                _run(extract_cv_info, cv_text), _run(extract_job_info, job_text)
+            )
+            yield _ndjson_line({"stage": "extract", "cv": cv_info, "job": job_info})
+            profile = await _run(build_profile, cv_text, job_text, cv_info=cv_info, job_info=job_info)
+            yield _ndjson_line({"stage": "profile", "profile": profile})
+            plan = await _run(
+                generate_interview_plan,
+                profile,
+                interviewer_profile=interviewer_profile,
+                n_questions=n_questions,
+            )
+            yield _ndjson_line({"stage": "plan", "plan": plan})
+        except Exception as e:
+            yield _ndjson_line({"stage": "error", **_error_payload(e)})
+
+    return StreamingResponse(events(), media_type=NDJSON)
+
+
+async def evaluate_endpoint(request: Request) -> Response:
+    body = await _json_body(request)
+    question, answer = _required(body, "question", "answer")
+    prepared = prepare_evaluation(
+        question,
+        question_type=_optional(body, "question_type"),
+        profile=_optional(body, "profile", kind=dict),
+        job_text=_optional(body, "job_text"),
+    )
+    return JSONResponse(await _run(evaluate_prepared, prepared, answer))
+
+
+async def evaluate_batch_endpoint(request: Request) -> Response:
+    """
+    Évalue plusieurs réponses en parallèle ; chaque résultat est envoyé (NDJSON)
+    dès qu'il est prêt, avec son index dans la liste d'entrée.
+    """
+    body = await _json_body(request)
+    (items,) = _required(body, "items", kind=list)
+    if len(items) > MAX_BATCH_ITEMS or not all(isinstance(item, dict) for item in items):
+        raise APIError(400, f"'items' doit être une liste d'au plus {MAX_BATCH_ITEMS} objets.")
+    profile = _optional(body, "profile", kind=dict)
+    job_text = _optional(body, "job_text")
+
+    async def evaluate_one(index: int, item: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            question, answer = _required(item, "question", "answer")
+            prepared = prepare_evaluation(
+                question,
+                question_type=_optional(item, "question_type"),
+                profile=profile,
+                job_text=job_text,
+            )
+            return {"index": index, "evaluation": await _run(evaluate_prepared, prepared, answer)}
+        except Exception as e:
+            return {"index": index, **_error_payload(e)}
+
+    async def results() -> AsyncIterator[bytes]:
+        tasks = [asyncio.ensure_future(evaluate_one(i, item)) for i, item in enumerate(items)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield _ndjson_line(await next_done)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(results(), media_type=NDJSON)
+
+
+async def transcribe_endpoint(request: Request) -> Response:
+    # Import paresseux : la transcription n'est pas utilisée par toutes les intégrations
+    from src.stt import transcribe_audio
+
+    ext = request.query_params.get("ext", "wav").lower()
+    if ext not in ("wav", "mp3", "m4a", "webm", "ogg"):
+        raise APIError(400, f"Format audio non supporté : {ext}")
+    audio = await request.body()
+    if not audio:
+        raise APIError(400, "Corps audio vide.")
+    if len(audio) > MAX_AUDIO_BYTES:
+        raise APIError(413, "Fichier audio trop volumineux.")
+    return JSONResponse({"text": await _run(transcribe_audio, audio, file_ext=ext)})
+
+
+async def report_endpoint(request: Request) -> Response:
+    body = await _json_body(request)
+    (history,) = _required(body, "history", kind=list)
+    if not all(isinstance(record, dict) for record in history):
+        raise APIError(400, "'history' doit être une liste d'objets.")
+    if not all(isinstance(record.get("evaluation"), (dict, type(None))) for record in history):
+        raise APIError(400, "'evaluation' doit être un objet ou null dans chaque élément de 'history'.")
+    mode = body.get("mode") or "hybrid"
+    if not isinstance(mode, str) or mode not in REPORT_MODES:
+        raise APIError(400, f"Mode de rapport inconnu : {mode} (attendu : {', '.join(REPORT_MODES)})")
+    return JSONResponse({"report": await _run(generate_final_report, history, mode=mode)})
+
+
+# ---------- Application ----------
+
+async def _api_error_handler(request: Request, exc: Exception) -> Response:
+    if isinstance(exc, APIError):
+        return JSONResponse({"error": exc.message}, status_code=exc.status_code)
+    # Les requêtes sont validées avant tout appel (APIError 400) : les autres
+    # erreurs viennent de l'API Groq ou d'un JSON inexploitable, échec en amont
+    return JSONResponse({"error": f"{type(exc).__name__}: {exc}"}, status_code=502)
+
+
+routes = [
+    Route("/health", health, methods=["GET"]),
+    Route("/metrics", metrics, methods=["GET"]),
+    Route("/profile", profile_endpoint, methods=["POST"]),
+    Route("/plan", plan_endpoint, methods=["POST"]),
+    Route("/prepare", prepare_endpoint, methods=["POST"]),
+    Route("/evaluate", evaluate_endpoint, methods=["POST"]),
+    Route("/evaluate/batch", evaluate_batch_endpoint, methods=["POST"]),
+    Route("/transcribe", transcribe_endpoint, methods=["POST"]),
+    Route("/report", report_endpoint, methods=["POST"]),
+]
+
+app = Starlette(
+    routes=routes,
+    exception_handlers={
+        APIError: _api_error_handler,
+        # Toute autre exception (requests, KeyError sur une réponse Groq
+        # malformée, ValidationError du schéma...) : 502 en JSON, pas de 500 en texte brut
+        Exception: _api_error_handler,
+    },
+)
@@ -1,13 +1,33 @@
+import functools
+import hashlib
+import html
 import os
-import fitz
+import queue
+from typing import Optional
+
 import streamlit as st
 
-from src.analyze_inputs import build_profile
+from src.analyze_inputs import build_profile, extract_cv_info, extract_job_info
 from src.plan_interview import generate_interview_plan
-from src.evaluator import evaluate_answer
+from src.evaluator import evaluate_prepared, prepare_evaluation
+from src.evaluation_memo import memo_from_env
 from src.final_report import generate_final_report
-from src.tts import question_to_audio
-from src.stt import transcribe_audio
+from src.conversation import interviewer_turn, last_question, new_conversation, start_conversation
+from src.interview_engine import (
+    ADAPTIVE_POOL_SIZE,
+    DEFAULT_INTERVIEW_LENGTH,
+    build_question_pool,
+    new_adaptive_state,
+    next_adaptive_question,
+    pick_from_pool,
+)
+from src.session_store import SessionStore, new_session_token
+from src.records import InterviewRecord, history_to_dicts
+from src.pdf_loader import bytes_to_text
+from src.instrumentation import record_cache, registry, spans_to_jsonl, to_prometheus
+from src.token_budget import budgets
+from src.scheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, FairScheduler
+from src.job_queue import JobQueue, queue_from_env
 
 
 # ---------- Configuration de la page ----------
@@ -311,30 +331,106 @@ st.markdown("""
 
 # ---------- Helpers ----------
 
-def read_uploaded_file(file) -> str:
+@st.cache_data(show_spinner=False, max_entries=32)
+def _extract_text_cached(file_hash: str, filename: str, _file_bytes: bytes) -> str:
+    """
+    Extraction du texte mémoïsée par empreinte SHA-256 du contenu :
+    un même fichier n'est parsé qu'une fois, quelle que soit la session.
+    """
+    return bytes_to_text(filename, _file_bytes)
+
+
+def file_fingerprint(file) -> dict:
     """
-    Lit un fichier uploadé (PDF ou texte) et renvoie son contenu texte.
+    Empreinte d'un fichier uploadé : nom, taille et SHA-256 du contenu.
+    """
+    file_bytes = file.getvalue()
+    return {
+        "name": file.name,
+        "size": len(file_bytes),
+        "sha256": hashlib.sha256(file_bytes).hexdigest(),
+    }
+
+
+def ingest_upload(kind: str, file):
+    """
+    Parse un fichier uploadé une seule fois et conserve le résultat dans
+    st.session_state.uploads[kind] ({"file_id", "fingerprint", "text"}).
+
+    Tant que le widget garde le même fichier, les reruns réutilisent l'entrée
+    existante sans relire ni re-hasher le contenu.
     """
     if file is None:
-        return ""
+        return None
 
-    filename = file.name.lower()
+    file_id = getattr(file, "file_id", None)
+    entry = st.session_state.uploads.get(kind)
+    if entry and file_id is not None and entry["file_id"] == file_id:
+        return entry
 
-    # PDF
-    if filename.endswith(".pdf"):
-        file_bytes = file.read()
-        doc = fitz.open(stream=file_bytes, filetype="pdf")
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        return text.strip()
+    fingerprint = file_fingerprint(file)
+    if entry and entry["fingerprint"] == fingerprint:
+        entry["file_id"] = file_id
+        record_cache("upload", hit=True)
+        return entry
 
-    # Texte brut
-    else:
-        try:
-            return file.read().decode("utf-8").strip()
-        except Exception:
-            return file.read().decode(errors="ignore").strip()
+    record_cache("upload", hit=False)
+
+    entry = {
+        "file_id": file_id,
+        "fingerprint": fingerprint,
+        "text": _extract_text_cached(fingerprint["sha256"], file.name.lower(), file.getvalue()),
+    }
+    st.session_state.uploads[kind] = entry
+    return entry
+
+
+def _html_list(items) -> str:
+    return "".join(f"<li>{html.escape(str(item))}</li>" for item in items)
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def render_record_feedback(record: InterviewRecord) -> str:
+    """
+    Construit le HTML complet du feedback d'une réponse (réponse, scores,
+    points forts / faibles / recommandations). Mis en cache : un record déjà
+    évalué n'est jamais reconstruit lors des reruns suivants.
+    """
+    eval_ = record["evaluation"] or {}
+
+    score_items = "".join(
+        f"""
+            <div class="score-item">
+                <div class="score-label">{label}</div>
+                <div class="score-value">{eval_.get(key, '?')}<span style="font-size: 1rem;">/{scale}</span></div>
+            </div>"""
+        for label, key, scale in (
+            ("Score global", "score", 10),
+            ("Clarté", "clarity", 5),
+            ("Pertinence", "relevance", 5),
+            ("Alignement", "alignment", 5),
+            ("Profondeur", "depth", 5),
+        )
+    )
+
+    columns = "".join(
+        f'<div style="flex: 1; min-width: 200px;"><strong>{title}</strong><ul>{_html_list(items)}</ul></div>'
+        for title, items in (
+            ("✅ Points forts", eval_.get("strengths", [])),
+            ("⚠️ Points à améliorer", eval_.get("weaknesses", [])),
+            ("💡 Recommandations", eval_.get("improvements", [])),
+        )
+        if items
+    )
+
+    return f"""
+        <h4>💬 Votre réponse</h4>
+        <div class='card'>{html.escape(record['answer'])}</div>
+        <h4>📊 Évaluation</h4>
+        <div class="score-container">{score_items}
+        </div>
+        <div style="display: flex; gap: 1rem; flex-wrap: wrap;">{columns}</div>
+    """
 
 
 # ---------- Initialisation de l'état de session ----------
@@ -360,6 +456,109 @@ if "cv_text" not in st.session_state:
 if "transcriptions" not in st.session_state:
     st.session_state.transcriptions = {}
 
+if "prepared_evaluations" not in st.session_state:
+    st.session_state.prepared_evaluations = {}
+
+if "uploads" not in st.session_state:
+    st.session_state.uploads = {}
+
+# Empreintes (SHA-256) des documents ayant servi au profil et au plan courants
+if "input_fingerprints" not in st.session_state:
+    st.session_state.input_fingerprints = {}
+
+# Mode adaptatif : {"pool": questions restantes, "length": nombre visé}, {} en mode plan fixe
+if "adaptive" not in st.session_state:
+    st.session_state.adaptive = {}
+
+# Mode conversationnel : état de src.conversation, {} dans les autres modes
+if "conversation" not in st.session_state:
+    st.session_state.conversation = {}
+
+# Enregistrements micro en cours (src.live_capture.LiveTranscriber), par index de question
+if "live_captures" not in st.session_state:
+    st.session_state.live_captures = {}
+
+
+# ---------- Persistance / reprise de session ----------
+
+@st.cache_resource
+def get_session_store() -> SessionStore:
+    return SessionStore()
+
+
+session_store = get_session_store()
+
+
+@st.cache_resource
+def get_scheduler() -> FairScheduler:
+    # Pool partagé par toutes les sessions : appels LLM / TTS / STT en file équitable
+    return FairScheduler()
+
+
+scheduler = get_scheduler()
+
+# Attente maximale d'un résultat de la file distribuée (secondes)
+QUEUE_WAIT_S = 180
+
+INTERVIEWER_PROFILE = (
+    "Manager technique backend, ton direct mais bienveillant, "
+    "s'intéresse aux projets concrets et aux résultats chiffrés."
+)
+
+
+@st.cache_resource
+def get_job_queue() -> Optional[JobQueue]:
+    # File distribuée (INTERVIEW_QUEUE_URL) : évaluations et rapports traités par des workers
+    return queue_from_env()
+
+
+job_queue = get_job_queue()
+
+
+def run_evaluation(prepared: dict, answer: str) -> dict:
+    if job_queue is not None:
+        return job_queue.run("evaluate", {"prepared": prepared, "answer": answer}, timeout=QUEUE_WAIT_S)
+    return scheduler.run(
+        session_token,
+        evaluate_prepared,
+        prepared,
+        answer,
+        priority=PRIORITY_INTERACTIVE,
+        kind="evaluate",
+    )
+
+
+def run_final_report(history: list, mode: str) -> str:
+    if job_queue is not None:
+        payload = {"history": history_to_dicts(history), "mode": mode}
+        return job_queue.run("report", payload, timeout=QUEUE_WAIT_S)
+    return scheduler.run(
+        session_token,
+        generate_final_report,
+        history,
+        mode=mode,
+        priority=PRIORITY_BACKGROUND,
+        kind="report",
+    )
+
+if "session_token" not in st.session_state:
+    token = st.query_params.get("session")
+    saved_state = session_store.load(token) if token else None
+    if token:
+        record_cache("session_resume", hit=saved_state is not None)
+
+    if saved_state is None:
+        token = new_session_token()
+        st.query_params["session"] = token
+    else:
+        # Reprise après rafraîchissement / redémarrage : aucun appel LLM
+        for key, value in saved_state.items():
+            st.session_state[key] = value
+
+    st.session_state.session_token = token
+
+session_token = st.session_state.session_token
+
 
 # ---------- Interface Streamlit ----------
 
@@ -399,7 +598,8 @@ with col1:
         key="cv_uploader_app1",
         help="Format accepté : PDF ou TXT"
     )
-    if cv_file:
+    cv_upload = ingest_upload("cv", cv_file)
+    if cv_upload:
         st.markdown('<span class="status-badge badge-success">✓ CV chargé</span>', unsafe_allow_html=True)
 
 with col2:
@@ -410,72 +610,198 @@ with col2:
         key="job_uploader_app1",
         help="Format accepté : PDF ou TXT"
     )
-    if job_file:
+    job_upload = ingest_upload("job", job_file)
+    if job_upload:
         st.markdown('<span class="status-badge badge-success">✓ Offre chargée</span>', unsafe_allow_html=True)
 
 st.markdown("<br>", unsafe_allow_html=True)
 
 col_btn1, col_btn2, col_btn3 = st.columns([1, 2, 1])
 with col_btn2:
+    interview_mode_labels = {
+        "plan": "📋 Plan fixe",
+        "adaptive": "🎯 Adaptatif",
+        "conversation": "💬 Conversation",
+    }
+    interview_mode = st.radio(
+        "Mode d'entretien",
+        options=list(interview_mode_labels),
+        format_func=interview_mode_labels.get,
+        key="interview_mode",
+        horizontal=True,
+        help=(
+            "Adaptatif : chaque question est choisie d'après l'évaluation de vos réponses. "
+            "Conversation : le recruteur rebondit en direct sur chacune de vos réponses."
+        ),
+    )
     if st.button("🚀 Lancer l'analyse et générer le plan d'entretien", type="primary", use_container_width=True):
-        if not cv_file or not job_file:
+        if not cv_upload or not job_upload:
             st.warning("⚠️ Merci de fournir **un CV** ET **une description de poste**.")
         else:
             progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            status_text.text("📖 Lecture des fichiers...")
-            progress_bar.progress(20)
-            cv_text = read_uploaded_file(cv_file)
-            job_text = read_uploaded_file(job_file)
-            
-            st.session_state.cv_text = cv_text
-            st.session_state.job_text = job_text
-            
-            status_text.text("🔍 Analyse du profil en cours...")
-            progress_bar.progress(40)
-            
-            try:
-                profile = build_profile(cv_text, job_text)
-            except Exception as e:
-                st.error(f"❌ Erreur lors de l'analyse CV/Offre : {e}")
-                st.stop()
-            
-            st.session_state.profile = profile
-            
-            status_text.text("📋 Génération du plan d'entretien...")
-            progress_bar.progress(70)
-            
-            interviewer_profile = (
-                "Manager technique backend, ton direct mais bienveillant, "
-                "s'intéresse aux projets concrets et aux résultats chiffrés."
-            )
-            
-            try:
-                plan = generate_interview_plan(
-                    profile,
-                    interviewer_profile=interviewer_profile,
-                    n_questions=8,
+            stages_box = st.empty()
+            stages = {}
+
+            def set_stage(label: str, status: str, progress: int) -> None:
+                stages[label] = status
+                stages_box.markdown("\n".join(f"- {s} {l}" for l, s in stages.items()))
+                progress_bar.progress(progress)
+
+            cv_text = cv_upload["text"]
+            job_text = job_upload["text"]
+            previous = st.session_state.input_fingerprints
+            profile = st.session_state.profile
+
+            cv_changed = profile is None or previous.get("cv") != cv_upload["fingerprint"]["sha256"]
+            job_changed = profile is None or previous.get("job") != job_upload["fingerprint"]["sha256"]
+
+            # Les fichiers sont déjà parsés à l'upload (une seule fois par fichier)
+            set_stage("Lecture des fichiers", "⏭️ (déjà en mémoire)", 10)
+
+            record_cache("analysis_cv", hit=not cv_changed)
+            record_cache("analysis_job", hit=not job_changed)
+
+            if st.session_state.conversation:
+                previous_mode = "conversation"
+            elif st.session_state.adaptive:
+                previous_mode = "adaptive"
+            else:
+                previous_mode = "plan"
+            mode_changed = previous_mode != interview_mode
+            interview_ready = bool(st.session_state.plan or st.session_state.conversation)
+
+            if not cv_changed and not job_changed and not mode_changed and interview_ready:
+                set_stage("Analyse du CV", "⏭️ (inchangé)", 40)
+                set_stage("Analyse de l'offre", "⏭️ (inchangé)", 60)
+                set_stage("Synthèse d'adéquation", "⏭️ (inchangé)", 80)
+                set_stage("Plan d'entretien", "⏭️ (inchangé)", 100)
+                progress_bar.empty()
+                st.markdown("""
+                    <div class="info-box">
+                        ℹ️ <strong>Documents inchangés</strong><br>
+                        L'analyse et le plan d'entretien existants sont conservés.
+                    </div>
+                """, unsafe_allow_html=True)
+            else:
+                try:
+                    # Les deux extractions sont indépendantes : soumises ensemble
+                    cv_future = (
+                        scheduler.submit(session_token, extract_cv_info, cv_text, kind="extract_cv")
+                        if cv_changed else None
+                    )
+                    job_future = (
+                        scheduler.submit(session_token, extract_job_info, job_text, kind="extract_job")
+                        if job_changed else None
+                    )
+
+                    if cv_changed:
+                        set_stage("Analyse du CV", "⏳", 20)
+                        cv_info = cv_future.result()
+                        set_stage("Analyse du CV", "✅", 40)
+                    else:
+                        cv_info = profile["cv"]
+                        set_stage("Analyse du CV", "⏭️ (inchangé)", 40)
+
+                    if job_changed:
+                        set_stage("Analyse de l'offre", "⏳", 40)
+                        job_info = job_future.result()
+                        set_stage("Analyse de l'offre", "✅", 60)
+                    else:
+                        job_info = profile["job"]
+                        set_stage("Analyse de l'offre", "⏭️ (inchangé)", 60)
+
+                    set_stage("Synthèse d'adéquation", "⏳", 60)
+                    profile = scheduler.run(
+                        session_token,
+                        build_profile,
+                        cv_text,
+                        job_text,
+                        cv_info=cv_info,
+                        job_info=job_info,
+                        kind="build_profile",
+                    )
+                    set_stage("Synthèse d'adéquation", "✅", 75)
+                except Exception as e:
+                    st.error(f"❌ Erreur lors de l'analyse CV/Offre : {e}")
+                    st.stop()
+
+                st.session_state.cv_text = cv_text
+                st.session_state.job_text = job_text
+                st.session_state.profile = profile
+
+                set_stage("Plan d'entretien", "⏳", 75)
+
+                adaptive, conversation, plan = {}, {}, []
+                try:
+                    if interview_mode == "adaptive":
+                        # Réserve de questions générée une fois ; la suite est choisie localement
+                        pool = scheduler.run(
+                            session_token,
+                            build_question_pool,
+                            profile,
+                            INTERVIEWER_PROFILE,
+                            pool_size=ADAPTIVE_POOL_SIZE,
+                            kind="plan",
+                        )
+                        adaptive = new_adaptive_state(pool, DEFAULT_INTERVIEW_LENGTH)
+                        first = pick_from_pool(adaptive, [], [], profile)
+                        plan = [first] if first else []
+                    elif interview_mode == "conversation":
+                        conversation = new_conversation(
+                            profile, INTERVIEWER_PROFILE, max_turns=DEFAULT_INTERVIEW_LENGTH
+                        )
+                        scheduler.run(session_token, start_conversation, conversation, kind="conversation")
+                    else:
+                        plan = scheduler.run(
+                            session_token,
+                            generate_interview_plan,
+                            profile,
+                            interviewer_profile=INTERVIEWER_PROFILE,
+                            n_questions=DEFAULT_INTERVIEW_LENGTH,
+                            kind="plan",
+                        )
+                except Exception as e:
+                    st.error(f"❌ Erreur lors de la génération du plan d'entretien : {e}")
+                    st.stop()
+
+                set_stage("Plan d'entretien", "✅", 100)
+
+                input_fingerprints = {
+                    "cv": cv_upload["fingerprint"]["sha256"],
+                    "job": job_upload["fingerprint"]["sha256"],
+                }
+
+                st.session_state.plan = plan
+                st.session_state.adaptive = adaptive
+                st.session_state.conversation = conversation
+                st.session_state.current_question_index = 0
+                st.session_state.history = []
+                st.session_state.transcriptions = {}
+                st.session_state.prepared_evaluations = {}
+                st.session_state.input_fingerprints = input_fingerprints
+
+                session_store.save_state(
+                    session_token,
+                    cv_text=cv_text,
+                    job_text=job_text,
+                    profile=profile,
+                    plan=plan,
+                    adaptive=adaptive,
+                    conversation=conversation,
+                    current_question_index=0,
+                    transcriptions={},
+                    input_fingerprints=input_fingerprints,
                 )
-            except Exception as e:
-                st.error(f"❌ Erreur lors de la génération du plan d'entretien : {e}")
-                st.stop()
-            
-            st.session_state.plan = plan
-            st.session_state.current_question_index = 0
-            st.session_state.history = []
-            st.session_state.transcriptions = {}
-            
-            progress_bar.progress(100)
-            status_text.empty()
-            progress_bar.empty()
-            
-            st.markdown("""
-                <div class="success-box">
-                    ✅ <strong>Analyse terminée avec succès !</strong><br>
-                    Votre profil a été analysé et le plan d'entretien est prêt.
-                </div>
-            """, unsafe_allow_html=True)
+                session_store.clear_history(session_token)
+
+                progress_bar.empty()
+
+                st.markdown("""
+                    <div class="success-box">
+                        ✅ <strong>Analyse terminée avec succès !</strong><br>
+                        Votre profil a été analysé et le plan d'entretien est prêt.
+                    </div>
+                """, unsafe_allow_html=True)
 
 # ---------- Section 2 : Résumé du matching ----------
 
@@ -528,17 +854,149 @@ if st.session_state.profile:
 
 # ---------- Section 3 : Simulation d'entretien ----------
 
-if st.session_state.plan:
-    st.markdown("---")
-    st.markdown("## 🎙️ Étape 3 : Simulation d'entretien")
-    
+# Enregistrement micro : trames lues toutes les LIVE_POLL_S secondes
+LIVE_POLL_S = 0.5
+LIVE_RECEIVER_FRAMES = 512
+LIVE_FINISH_TIMEOUT_S = 30
+
+
+@functools.lru_cache(maxsize=1)
+def _webrtc():
+    """
+    Import paresseux (et mémorisé) de streamlit-webrtc ; None s'il n'est pas installé.
+    """
+    try:
+        import streamlit_webrtc
+    except ImportError:
+        return None
+    return streamlit_webrtc
+
+
+def _submit_transcription(wav_bytes: bytes):
+    from src.stt import transcribe_audio
+
+    return scheduler.submit(
+        session_token,
+        transcribe_audio,
+        wav_bytes,
+        file_ext="wav",
+        priority=PRIORITY_INTERACTIVE,
+        kind="stt",
+    )
+
+
+@st.fragment(run_every=LIVE_POLL_S)
+def render_live_transcript(idx: int, ctx) -> None:
+    """
+    Pendant l'enregistrement : transmet les trames reçues au LiveTranscriber
+    (VAD + segments transcrits au fil de l'eau) et affiche le texte déjà reconnu.
+    À l'arrêt : attend le dernier segment et place la transcription dans la réponse.
+    """
+    live = st.session_state.live_captures[idx]
+
+    if ctx.state.playing and ctx.audio_receiver:
+        try:
+            frames = ctx.audio_receiver.get_frames(timeout=LIVE_POLL_S / 2)
+        except queue.Empty:
+            frames = []
+        for frame in frames:
+            live.push_frame(frame)
+        pending = live.pending()
+        st.caption(f"🔴 Enregistrement en cours{f' ({pending} segment(s) en transcription)' if pending else ''}")
+        st.markdown(live.transcript() or "*…*")
+    elif live.active:
+        with st.spinner("Fin de la transcription..."):
+            text = live.finish(timeout=LIVE_FINISH_TIMEOUT_S)
+        previous = st.session_state.transcriptions.get(idx, "")
+        st.session_state.transcriptions[idx] = f"{previous} {text}".strip()
+        session_store.save_state(session_token, transcriptions=st.session_state.transcriptions)
+        live.reset()
+        st.rerun()
+
+
+def render_live_capture(idx: int) -> None:
+    """
+    Enregistrement directement dans le navigateur (streamlit-webrtc) : la parole
+    est découpée et transcrite pendant que le candidat parle.
+    """
+    webrtc = _webrtc()
+    if webrtc is None:
+        st.caption("🎙️ Enregistrement direct indisponible : installer streamlit-webrtc et av.")
+        return
+
+    from src.live_capture import LiveTranscriber
+
+    if idx not in st.session_state.live_captures:
+        st.session_state.live_captures[idx] = LiveTranscriber(_submit_transcription)
+
+    ctx = webrtc.webrtc_streamer(
+        key=f"mic_{idx}",
+        mode=webrtc.WebRtcMode.SENDONLY,
+        audio_receiver_size=LIVE_RECEIVER_FRAMES,
+        media_stream_constraints={"audio": True, "video": False},
+    )
+    # Le fragment (rafraîchi périodiquement) n'existe que pendant et juste après l'enregistrement
+    if ctx.state.playing or st.session_state.live_captures[idx].active:
+        render_live_transcript(idx, ctx)
+
+
+def advance_question() -> None:
+    """
+    Passe à la question suivante. En mode adaptatif, elle est d'abord choisie
+    dans la réserve (localement) ; le LLM n'est sollicité que si elle est épuisée.
+    """
+    adaptive = st.session_state.adaptive
+    plan = st.session_state.plan
+    st.session_state.current_question_index += 1
+
+    if adaptive and len(plan) < adaptive["length"]:
+        history = st.session_state.history
+        profile = st.session_state.profile
+        question = pick_from_pool(adaptive, plan, history, profile)
+        if question is None:
+            try:
+                question = scheduler.run(
+                    session_token,
+                    next_adaptive_question,
+                    adaptive,
+                    plan,
+                    history,
+                    profile,
+                    INTERVIEWER_PROFILE,
+                    priority=PRIORITY_INTERACTIVE,
+                    kind="plan",
+                )
+            except Exception as e:
+                # L'entretien se termine sur les questions déjà posées
+                st.toast(f"❌ Question suivante indisponible, fin de l'entretien : {e}")
+                adaptive["length"] = len(plan)
+        if question:
+            plan.append(question)
+
+    session_store.save_state(
+        session_token,
+        plan=plan,
+        adaptive=adaptive,
+        current_question_index=st.session_state.current_question_index,
+    )
+
+
+@st.fragment
+def render_question_panel() -> None:
+    """
+    Panneau de la question active. Déclaré comme fragment : les interactions
+    internes (saisie, transcription, audio) ne relancent que ce panneau ;
+    "Passer" et "Soumettre" relancent toute la page via st.rerun().
+    """
     plan = st.session_state.plan
     idx = st.session_state.current_question_index
+    # En mode adaptatif, le plan se construit au fil de l'entretien
+    total = st.session_state.adaptive.get("length") or len(plan)
     
     # Progress indicator
-    progress_percentage = (idx / len(plan)) * 100
+    progress_percentage = (min(idx, total) / total) * 100
     st.progress(progress_percentage / 100)
-    st.markdown(f'<div class="question-counter">Question {idx + 1} sur {len(plan)}</div>', unsafe_allow_html=True)
+    st.markdown(f'<div class="question-counter">Question {idx + 1} sur {total}</div>', unsafe_allow_html=True)
     
     if idx < len(plan):
         current_q = plan[idx]
@@ -557,14 +1015,29 @@ if st.session_state.plan:
         """, unsafe_allow_html=True)
         
         question_text = current_q.get("question", "")
+
+        # Préparation de l'évaluation dès l'affichage de la question :
+        # à la soumission, il ne reste qu'à ajouter la réponse au prompt.
+        if idx not in st.session_state.prepared_evaluations:
+            st.session_state.prepared_evaluations[idx] = prepare_evaluation(
+                question_text,
+                question_type=current_q.get("type", ""),
+                profile=st.session_state.profile,
+                job_text=st.session_state.job_text,
+            )
         
         # TTS Button
         col_tts1, col_tts2, col_tts3 = st.columns([1, 2, 1])
         with col_tts2:
             if st.button("🔊 Écouter la question", key=f"tts_{idx}", use_container_width=True):
+                # Import paresseux : les modules audio ne sont chargés qu'au premier usage
+                from src.tts import question_to_audio
+
                 try:
                     with st.spinner("Génération audio..."):
-                        audio_bytes = question_to_audio(question_text)
+                        audio_bytes = scheduler.run(
+                            session_token, question_to_audio, question_text, kind="tts"
+                        )
                         st.audio(audio_bytes, format="audio/mp3")
                 except Exception as e:
                     st.error(f"❌ Erreur TTS : {e}")
@@ -573,6 +1046,8 @@ if st.session_state.plan:
         
         # Zone de réponse audio
         st.markdown("### 🎤 Votre réponse")
+
+        render_live_capture(idx)
         
         col_audio1, col_audio2 = st.columns([2, 1])
         
@@ -587,14 +1062,27 @@ if st.session_state.plan:
         with col_audio2:
             st.markdown("<br>", unsafe_allow_html=True)
             if st.button("📝 Transcrire", key=f"transcribe_{idx}", disabled=not audio_file, use_container_width=True):
+                from src.stt import transcribe_audio
+
                 with st.spinner("Transcription en cours..."):
                     audio_bytes = audio_file.read()
                     ext = "wav"
                     if audio_file.name.lower().endswith(".mp3"):
                         ext = "mp3"
                     try:
-                        text = transcribe_audio(audio_bytes, file_ext=ext)
+                        text = scheduler.run(
+                            session_token,
+                            transcribe_audio,
+                            audio_bytes,
+                            file_ext=ext,
+                            priority=PRIORITY_INTERACTIVE,
+                            kind="stt",
+                        )
                         st.session_state.transcriptions[idx] = text
+                        session_store.save_state(
+                            session_token,
+                            transcriptions=st.session_state.transcriptions,
+                        )
                         st.markdown("""
                             <div class="success-box">
                                 ✅ Transcription terminée avec succès
@@ -620,7 +1108,7 @@ if st.session_state.plan:
         
         with col_a:
             if st.button("⏭️ Passer", key=f"skip_{idx}", use_container_width=True):
-                st.session_state.current_question_index += 1
+                advance_question()
                 st.rerun()
         
         with col_b:
@@ -630,24 +1118,26 @@ if st.session_state.plan:
                 else:
                     with st.spinner("Évaluation de votre réponse..."):
                         try:
-                            evaluation = evaluate_answer(
-                                question=question_text,
-                                answer=answer_text,
-                                job_text=st.session_state.job_text,
+                            evaluation = run_evaluation(
+                                st.session_state.prepared_evaluations[idx],
+                                answer_text,
                             )
                         except Exception as e:
                             st.error(f"❌ Erreur lors de l'évaluation : {e}")
                             st.stop()
                         
-                        record = {
-                            "question": question_text,
-                            "type": current_q.get("type", ""),
-                            "topic": current_q.get("topic", ""),
-                            "answer": answer_text,
-                            "evaluation": evaluation,
-                        }
+                        record = InterviewRecord(
+                            question=question_text,
+                            type=current_q.get("type", ""),
+                            topic=current_q.get("topic", ""),
+                            answer=answer_text,
+                            evaluation=evaluation,
+                        )
+                        session_store.append_history(
+                            session_token, len(st.session_state.history), record
+                        )
                         st.session_state.history.append(record)
-                        st.session_state.current_question_index += 1
+                        advance_question()
                         st.rerun()
     
     else:
@@ -658,6 +1148,87 @@ if st.session_state.plan:
             </div>
         """, unsafe_allow_html=True)
 
+
+def render_conversation_panel() -> None:
+    """
+    Entretien conversationnel (src.conversation) : le recruteur rebondit sur
+    chaque réponse. La relance et l'évaluation de la réponse sont calculées
+    en parallèle ; le prompt de relance garde une taille constante.
+    """
+    conversation = st.session_state.conversation
+
+    for message in conversation["transcript"]:
+        with st.chat_message("assistant" if message["role"] == "assistant" else "user"):
+            st.markdown(message["content"])
+
+    if conversation["done"]:
+        st.markdown("""
+            <div class="success-box">
+                🎉 <strong>Entretien terminé !</strong><br>
+                Consultez le feedback de chaque réponse et générez votre rapport ci-dessous.
+            </div>
+        """, unsafe_allow_html=True)
+        return
+
+    answer = st.chat_input("Votre réponse")
+    if not answer or not answer.strip():
+        return
+
+    question = last_question(conversation)
+    prepared = prepare_evaluation(
+        question,
+        profile=st.session_state.profile,
+        job_text=st.session_state.job_text,
+    )
+
+    with st.spinner("Le recruteur réfléchit..."):
+        try:
+            reply_future = scheduler.submit(
+                session_token,
+                interviewer_turn,
+                conversation,
+                answer,
+                priority=PRIORITY_INTERACTIVE,
+                kind="conversation",
+            )
+        except Exception as e:
+            st.error(f"❌ Erreur lors de l'envoi de la réponse : {e}")
+            st.stop()
+
+        try:
+            evaluation = run_evaluation(prepared, answer)
+        except Exception as e:
+            evaluation = None
+            st.toast(f"⚠️ Évaluation indisponible pour cette réponse : {e}")
+
+        try:
+            reply_future.result()
+        except Exception as e:
+            st.error(f"❌ Erreur lors de la relance du recruteur : {e}")
+            st.stop()
+
+    if evaluation is not None:
+        record = InterviewRecord(
+            question=question,
+            type="conversation",
+            answer=answer,
+            evaluation=evaluation,
+        )
+        session_store.append_history(session_token, len(st.session_state.history), record)
+        st.session_state.history.append(record)
+    session_store.save_state(session_token, conversation=conversation)
+    st.rerun()
+
+
+if st.session_state.plan:
+    st.markdown("---")
+    st.markdown("## 🎙️ Étape 3 : Simulation d'entretien")
+    render_question_panel()
+elif st.session_state.conversation:
+    st.markdown("---")
+    st.markdown("## 💬 Étape 3 : Entretien conversationnel")
+    render_conversation_panel()
+
 # ---------- Section 4 : Feedback en temps réel ----------
 
 if st.session_state.history:
@@ -666,64 +1237,7 @@ if st.session_state.history:
     
     for i, record in enumerate(st.session_state.history, start=1):
         with st.expander(f"**Question {i}** : {record['question'][:100]}{'...' if len(record['question']) > 100 else ''}"):
-            
-            # Réponse
-            st.markdown("#### 💬 Votre réponse")
-            st.markdown(f"<div class='card'>{record['answer']}</div>", unsafe_allow_html=True)
-            
-            eval_ = record["evaluation"]
-            
-            # Scores
-            st.markdown("#### 📊 Évaluation")
-            
-            st.markdown(f"""
-                <div class="score-container">
-                    <div class="score-item">
-                        <div class="score-label">Score global</div>
-                        <div class="score-value">{eval_.get('score', '?')}<span style="font-size: 1rem;">/10</span></div>
-                    </div>
-                    <div class="score-item">
-                        <div class="score-label">Clarté</div>
-                        <div class="score-value">{eval_.get('clarity', '?')}<span style="font-size: 1rem;">/5</span></div>
-                    </div>
-                    <div class="score-item">
-                        <div class="score-label">Pertinence</div>
-                        <div class="score-value">{eval_.get('relevance', '?')}<span style="font-size: 1rem;">/5</span></div>
-                    </div>
-                    <div class="score-item">
-                        <div class="score-label">Alignement</div>
-                        <div class="score-value">{eval_.get('alignment', '?')}<span style="font-size: 1rem;">/5</span></div>
-                    </div>
-                    <div class="score-item">
-                        <div class="score-label">Profondeur</div>
-                        <div class="score-value">{eval_.get('depth', '?')}<span style="font-size: 1rem;">/5</span></div>
-                    </div>
-                </div>
-            """, unsafe_allow_html=True)
-            
-            # Points forts, faibles, améliorations
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                strengths = eval_.get("strengths", [])
-                if strengths:
-                    st.markdown("**✅ Points forts**")
-                    for s in strengths:
-                        st.markdown(f"- {s}")
-            
-            with col2:
-                weaknesses = eval_.get("weaknesses", [])
-                if weaknesses:
-                    st.markdown("**⚠️ Points à améliorer**")
-                    for w in weaknesses:
-                        st.markdown(f"- {w}")
-            
-            with col3:
-                improvements = eval_.get("improvements", [])
-                if improvements:
-                    st.markdown("**💡 Recommandations**")
-                    for imp in improvements:
-                        st.markdown(f"- {imp}")
+            st.markdown(render_record_feedback(record), unsafe_allow_html=True)
 
 # ---------- Section 5 : Rapport final ----------
 
@@ -733,10 +1247,21 @@ if st.session_state.history:
     
     col_report1, col_report2, col_report3 = st.columns([1, 2, 1])
     with col_report2:
+        report_mode_labels = {
+            "hybrid": "⚡ Rapide (IA pour l'introduction et la conclusion)",
+            "offline": "📴 Hors-ligne (aucun appel IA)",
+            "llm": "🤖 Rédaction complète par l'IA",
+        }
+        report_mode = st.radio(
+            "Mode de génération du rapport",
+            options=list(report_mode_labels),
+            format_func=report_mode_labels.get,
+            key="report_mode",
+        )
         if st.button("📄 Générer le rapport complet", type="primary", use_container_width=True):
             with st.spinner("Génération du rapport final en cours..."):
                 try:
-                    report = generate_final_report(st.session_state.history)
+                    report = run_final_report(st.session_state.history, report_mode)
                 except Exception as e:
                     st.error(f"❌ Erreur lors de la génération du rapport final : {e}")
                 else:
@@ -750,6 +1275,52 @@ if st.session_state.history:
                     st.markdown(report)
                     st.markdown("</div>", unsafe_allow_html=True)
 
+# ---------- Panneau de debug (instrumentation) ----------
+
+# Métriques et spans de toutes les sessions : réservé à l'exploitant (jamais via l'URL)
+if os.getenv("INTERVIEW_DEBUG") == "1":
+    with st.sidebar:
+        st.markdown("### 🛠️ Instrumentation")
+        st.caption("Métriques du processus serveur (toutes sessions confondues).")
+
+        st.markdown("**Durée par étape (s)**")
+        st.dataframe(registry.stage_summary(), use_container_width=True, hide_index=True)
+
+        counters = [
+            {"métrique": name, **dict(labels), "valeur": value}
+            for (name, labels), value in sorted(registry.counters().items())
+        ]
+        st.markdown("**Compteurs (tokens, caches, retries)**")
+        st.dataframe(counters, use_container_width=True, hide_index=True)
+
+        st.markdown("**Ordonnanceur partagé**")
+        st.json(scheduler.stats())
+
+        evaluation_memo = memo_from_env()
+        if evaluation_memo is not None:
+            st.markdown("**Mémo des évaluations**")
+            st.json(evaluation_memo.stats())
+
+        st.markdown("**Budgets max_tokens appris**")
+        st.dataframe(
+            [{"point d'appel": site, "max_tokens": value} for site, value in budgets.snapshot().items()],
+            use_container_width=True,
+            hide_index=True,
+        )
+
+        st.download_button(
+            "⬇️ Spans (JSONL)",
+            data=spans_to_jsonl(),
+            file_name="spans.jsonl",
+            mime="application/jsonl",
+        )
+        st.download_button(
+            "⬇️ Métriques (Prometheus)",
+            data=to_prometheus(),
+            file_name="metrics.prom",
+            mime="text/plain",
+        )
+
 # ---------- Footer ----------
 
 st.markdown("---")
@@ -0,0 +1,86 @@
+"""
+Mesure la latence d'un rerun de app.py avec un historique complet de 8 questions,
+via le harnais de test de Streamlit (aucun appel réseau : l'état est injecté).
+
+Deux mesures :
+- rerun complet du script (ex : clic sur un bouton qui appelle st.rerun()),
+- interaction dans le panneau de la question active (saisie de la réponse).
+
+Usage :
+    python -m benchmarks.bench_app_rerun [--runs 20]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from streamlit.testing.v1 import AppTest
+
+N_HISTORY = 8
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def _fake_record(i: int) -> dict:
+    return {
+        "question": f"Question {i} : parlez-moi d'un projet où vous avez utilisé Python et SQL " * 2,
+        "type": "technique",
+        "topic": "Python",
+        "answer": "Réponse détaillée du candidat avec contexte, action et résultat. " * 12,
+        "evaluation": {
+            "score": 7, "clarity": 4, "relevance": 4, "alignment": 3, "depth": 3,
+            "strengths": ["Exemple concret et chiffré", "Bonne structure"],
+            "weaknesses": ["Manque de détails techniques", "Conclusion rapide"],
+            "improvements": ["Préciser les outils", "Donner un résultat mesurable", "Relier au poste"],
+        },
+    }
+
+
+def _build_app() -> AppTest:
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    plan = [
+        {"type": "technique", "topic": "Python", "question": f"Question {i} ?"}
+        for i in range(N_HISTORY + 1)
+    ]
+    at.session_state["profile"] = {"fit_summary": "Profil pertinent.", "overlap_hard_skills": ["python"]}
+    at.session_state["plan"] = plan
+    at.session_state["history"] = [_fake_record(i) for i in range(N_HISTORY)]
+    at.session_state["current_question_index"] = N_HISTORY
+    return at
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+    os.environ["INTERVIEW_SESSION_DB"] = os.path.join(tempfile.mkdtemp(), "sessions.db")
+
+    at = _build_app()
+    at.run()
+    if at.exception:
+        raise SystemExit(f"Erreur dans app.py : {at.exception}")
+
+    full = []
+    for _ in range(args.runs):
+        t0 = time.perf_counter()
+        at.run()
+        full.append(time.perf_counter() - t0)
+
+    typing = []
+    answer_key = f"answer_text_{N_HISTORY}"
+    for i in range(args.runs):
+        t0 = time.perf_counter()
+        at.text_area(key=answer_key).input(f"Réponse en cours {i}").run()
+        typing.append(time.perf_counter() - t0)
+
+    print(f"Historique : {N_HISTORY} questions, {args.runs} mesures")
+    print(f"  rerun complet       p50 = {statistics.median(full) * 1000:.1f} ms")
+    print(f"  saisie de réponse   p50 = {statistics.median(typing) * 1000:.1f} ms")
+    print(f"  éléments rendus     = {len(at.main.children)} blocs de premier niveau")
+
+
+if __name__ == "__main__":
+    main()
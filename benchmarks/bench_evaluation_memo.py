@@ -0,0 +1,159 @@
+"""
+Mémo des évaluations (src.evaluation_memo) sur un flux synthétique de
+sessions : réponses toutes faites aux questions d'intro / de conclusion
+(reprises telles quelles, avec une ponctuation différente ou un mot changé),
+réponses soumises deux fois après un rafraîchissement, réponses techniques
+uniques.
+
+Compare le mémo exact seul et le mémo avec quasi-doublons : taux de
+réussite, appels LLM évités, réutilisations erronées (évaluation d'une autre
+réponse de base), latence des recherches et des enregistrements.
+
+Usage :
+    python -m benchmarks.bench_evaluation_memo [--sessions 1000] [--near-threshold 0.7]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.evaluation_memo import EvaluationMemo
+from src.evaluator import prepare_evaluation
+from src.instrumentation import registry
+
+JOBS = [
+    "Data analyst : Python, SQL, Power BI, reporting commercial.",
+    "Data scientist : machine learning, scikit-learn, MLOps, Docker.",
+    "Développeur backend : Python, FastAPI, PostgreSQL, tests.",
+]
+WORDS = (
+    "projet données pipeline modèle équipe client tableau requête python sql résultat délai "
+    "qualité tests déploiement mesure indicateur automatisation réunion priorité analyse"
+).split()
+_stock = random.Random(42)
+# Réponses toutes faites : un début commun, puis des phrases différentes d'une réponse à l'autre
+STOCK_INTROS = [
+    "Je suis diplômé d'une école d'ingénieurs et " + " ".join(_stock.choices(WORDS, k=40))
+    for _ in range(20)
+]
+STOCK_CONCLUSIONS = [
+    "Merci pour cet échange, " + " ".join(_stock.choices(WORDS, k=25))
+    for _ in range(10)
+]
+
+
+def _vary(answer: str, rng: random.Random) -> Tuple[str, str]:
+    """
+    Variante d'une réponse toute faite : identique, ponctuation / casse
+    différente (identique après normalisation) ou un mot changé (quasi-doublon).
+    """
+    draw = rng.random()
+    if draw < 0.4:
+        return answer, "identique"
+    if draw < 0.7:
+        return answer.upper().replace(",", " ;").replace(".", " !"), "normalisée"
+    words = answer.split()
+    i = rng.randrange(len(words))
+    words[i] = "vraiment"
+    return " ".join(words), "un mot changé"
+
+
+def submissions(n_sessions: int, seed: int = 0) -> Iterator[Tuple[Dict[str, Any], str, str, str]]:
+    """
+    (contexte préparé, réponse, identifiant de la réponse de base, nature de la soumission).
+    """
+    rng = random.Random(seed)
+    prepared_cache: Dict[Tuple[int, str, str], Dict[str, Any]] = {}
+
+    def prepared(job: int, q_type: str, question: str) -> Dict[str, Any]:
+        key = (job, q_type, question)
+        if key not in prepared_cache:
+            prepared_cache[key] = prepare_evaluation(question, question_type=q_type, job_text=JOBS[job])
+        return prepared_cache[key]
+
+    for session in range(n_sessions):
+        job = rng.randrange(len(JOBS))
+        plan = [("intro", "Pouvez-vous vous présenter ?")]
+        plan += [("technique", f"Question technique {rng.randrange(40)} sur l'offre {job} ?") for _ in range(5)]
+        plan += [("conclusion", "Avez-vous des questions pour nous ?")]
+        for q_type, question in plan:
+            if q_type == "intro" and rng.random() < 0.7:
+                base = rng.randrange(len(STOCK_INTROS))
+                answer, kind = _vary(STOCK_INTROS[base], rng)
+                base_id = f"intro{base}"
+            elif q_type == "conclusion" and rng.random() < 0.8:
+                base = rng.randrange(len(STOCK_CONCLUSIONS))
+                answer, kind = _vary(STOCK_CONCLUSIONS[base], rng)
+                base_id = f"conclusion{base}"
+            else:
+                answer = " ".join(rng.choices(WORDS, k=rng.randint(30, 80)))
+                base_id, kind = f"unique{session}:{question}", "unique"
+            context = prepared(job, q_type, question)
+            yield context, answer, base_id, kind
+            if rng.random() < 0.1:
+                yield context, answer, base_id, "rafraîchissement"
+
+
+def run(memo: EvaluationMemo, n_sessions: int) -> Dict[str, Any]:
+    registry.reset()
+    lookup_times: List[float] = []
+    store_times: List[float] = []
+    llm_calls = 0
+    wrong = 0
+    by_kind: Dict[str, List[int]] = {}
+
+    for prepared, answer, base_id, kind in submissions(n_sessions):
+        t0 = time.perf_counter()
+        found = memo.lookup(prepared, answer)
+        lookup_times.append(time.perf_counter() - t0)
+        hits = by_kind.setdefault(kind, [0, 0])
+        hits[1] += 1
+        if found is not None:
+            hits[0] += 1
+            wrong += found["base"] != base_id
+            continue
+        # Évaluation factice : on garde l'identifiant de la réponse de base
+        llm_calls += 1
+        t0 = time.perf_counter()
+        memo.store(prepared, answer, {"score": 7, "base": base_id})
+        store_times.append(time.perf_counter() - t0)
+
+    lookup_times.sort()
+    return {
+        **memo.stats(),
+        "llm_calls": llm_calls,
+        "wrong": wrong,
+        "by_kind": by_kind,
+        "lookup_p50_ms": statistics.median(lookup_times) * 1000,
+        "lookup_p95_ms": lookup_times[int(0.95 * (len(lookup_times) - 1))] * 1000,
+        "store_p50_ms": statistics.median(store_times) * 1000 if store_times else 0.0,
+        "db_kib": os.path.getsize(memo.path) / 1024,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--near-threshold", type=float, default=0.7)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    modes: List[Tuple[str, Optional[float]]] = [("exact", None), (f"quasi-doublons ≥ {args.near_threshold}", args.near_threshold)]
+    for label, threshold in modes:
+        memo = EvaluationMemo(os.path.join(directory, f"{threshold}.db"), near_threshold=threshold)
+        result = run(memo, args.sessions)
+        print(f"\n{label} : {result['lookups']} évaluations, {result['llm_calls']} appels LLM "
+              f"({1 - result['llm_calls'] / result['lookups']:.1%} évités)")
+        print(f"  hits exacts {result['exact']}, quasi-doublons {result['near']}, "
+              f"taux de réussite {result['hit_rate']:.1%}, réutilisations erronées {result['wrong']}")
+        print(f"  recherche p50 {result['lookup_p50_ms']:.2f} ms / p95 {result['lookup_p95_ms']:.2f} ms, "
+              f"enregistrement p50 {result['store_p50_ms']:.2f} ms, base {result['db_kib']:.0f} Kio")
+        for kind, (hits, total) in sorted(result["by_kind"].items()):
+            print(f"    {kind:<18} {hits:>6} / {total:<6} ({hits / total:.0%})")
+
+
+if __name__ == "__main__":
+    main()
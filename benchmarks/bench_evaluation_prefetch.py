@@ -0,0 +1,130 @@
+"""
+Compare le chemin de soumission actuel (evaluate_answer avec le texte brut de
+l'offre) au chemin préparé (prepare_evaluation à l'affichage de la question,
+puis evaluate_prepared à la soumission).
+
+Le LLM est remplacé par une fonction locale dont la latence est proportionnelle
+à la taille du prompt (temps de "prefill"), afin de mesurer :
+- le travail local restant après le clic sur "Soumettre",
+- la taille du prompt envoyé (caractères et tokens estimés),
+- la latence simulée de bout en bout.
+
+Usage :
+    python -m benchmarks.bench_evaluation_prefetch [--prefill-ms-per-1k 40] [--runs 200]
+"""
+import argparse
+import os
+import statistics
+import time
+
+import src.evaluator as evaluator
+from src.pdf_loader import load_file
+
+JOB_PDF = os.path.join("data", "jobs", "offre de stage.pdf")
+
+# Profil représentatif de ce que renvoie build_profile pour l'offre d'exemple
+SAMPLE_PROFILE = {
+    "job": {
+        "title": "Stage Data Analyst / Data Scientist",
+        "company": "",
+        "summary": (
+            "Stage au sein de l'équipe Data : améliorer l'adoption des tableaux de bord "
+            "Power BI et mener un premier projet de Machine Learning de segmentation "
+            "client et de scoring."
+        ),
+        "hard_skills_required": ["power bi", "dax", "power query", "python", "sql", "machine learning"],
+        "soft_skills_required": ["créativité", "force de proposition", "communication"],
+        "missions": [
+            "Cartographier les tableaux de bord existants et leurs usages",
+            "Simplifier l'accès aux bons indicateurs",
+            "Préparer et analyser les données clients",
+            "Tester des modèles de segmentation et de scoring",
+        ],
+    },
+    "missing_hard_skills": ["dax", "power query"],
+}
+
+QUESTION = "Pouvez-vous décrire un projet où vous avez utilisé Python pour analyser des données ?"
+ANSWER = (
+    "Lors de mon stage, j'ai automatisé un reporting hebdomadaire avec pandas : "
+    "nettoyage des données, agrégations par agence et export vers Power BI. "
+    "Le temps de production est passé de 4 heures à 20 minutes."
+)
+
+CANNED_EVALUATION = {
+    "score": 7, "clarity": 4, "relevance": 4, "alignment": 4, "depth": 3,
+    "strengths": ["Exemple concret"], "weaknesses": ["Peu de détails techniques"],
+    "improvements": ["Préciser les choix de modélisation"],
+}
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _run(label, fn, runs, prompts):
+    total_times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        total_times.append(time.perf_counter() - t0)
+    # Le dernier prompt capturé sert à mesurer la taille
+    prompt = prompts[-1]
+    return {
+        "label": label,
+        "prompt_chars": len(prompt),
+        "prompt_tokens_est": _estimate_tokens(prompt),
+        "submit_total_ms_p50": statistics.median(total_times) * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=40.0,
+                        help="Latence simulée par tranche de 1000 tokens de prompt.")
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    # Même réponse à chaque run : le mémo des évaluations court-circuiterait la mesure
+    os.environ["INTERVIEW_EVALUATION_MEMO"] = "off"
+
+    job_text = load_file(JOB_PDF)
+    prompts = []
+
+    def fake_generate_json(prompt, **kwargs):
+        prompts.append(prompt)
+        time.sleep(_estimate_tokens(prompt) / 1000 * args.prefill_ms_per_1k / 1000)
+        return dict(CANNED_EVALUATION)
+
+    evaluator.generate_json = fake_generate_json
+
+    baseline = _run(
+        "evaluate_answer (offre brute, tout au clic)",
+        lambda: evaluator.evaluate_answer(QUESTION, ANSWER, job_text=job_text),
+        args.runs,
+        prompts,
+    )
+
+    t0 = time.perf_counter()
+    prepared = evaluator.prepare_evaluation(
+        QUESTION, question_type="technique", profile=SAMPLE_PROFILE, job_text=job_text
+    )
+    prepare_ms = (time.perf_counter() - t0) * 1000
+
+    prefetched = _run(
+        "prepare_evaluation + evaluate_prepared",
+        lambda: evaluator.evaluate_prepared(prepared, ANSWER),
+        args.runs,
+        prompts,
+    )
+    prefetched["prepare_ms_while_typing"] = prepare_ms
+
+    for result in (baseline, prefetched):
+        print(f"\n{result['label']}")
+        for key, value in result.items():
+            if key != "label":
+                print(f"  {key:28s}: {value:.3f}" if isinstance(value, float) else f"  {key:28s}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Index des historiques d'entretien (src.history_index) : temps de construction,
+latence des requêtes (p50 / p95) et comparaison avec un parcours linéaire
+des records, sur un jeu synthétique.
+
+Usage :
+    python -m benchmarks.bench_history_index [--records 200000] [--runs 50]
+"""
+import argparse
+import random
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.history_index import HistoryIndex, is_skipped, normalize, tokenize
+
+TYPES = ["intro", "motivation", "technique", "technique", "technique", "projet", "soft_skill", "conclusion"]
+TOPICS = ["Python", "SQL", "Machine Learning", "Power BI", "Docker", "Communication", "Scoring", "Tests"]
+WORDS = (
+    "j'ai utilisé pandas pour nettoyer les données puis entraîné un modèle de scoring "
+    "avec scikit-learn les tests unitaires couvraient le pipeline déployé sous docker "
+    "le tableau de bord power bi suivait les indicateurs clés et la requête sql agrégeait "
+    "les ventes par agence l'équipe a réduit le temps de traitement de moitié"
+).split()
+SKILLS = ["python", "sql", "machine learning", "power bi", "docker", "scikit-learn", "pandas"]
+
+
+def synthetic_records(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    records = []
+    for i in range(n):
+        q_type = rng.choice(TYPES)
+        topic = rng.choice(TOPICS)
+        skipped = rng.random() < 0.08
+        answer = "" if skipped else " ".join(rng.choices(WORDS, k=rng.randint(15, 60)))
+        records.append(
+            {
+                "question": f"Question {i % 500} sur {topic} ?",
+                "type": q_type,
+                "topic": topic,
+                "answer": answer,
+                "evaluation": None if skipped else {
+                    "score": rng.randint(0, 10),
+                    "clarity": rng.randint(0, 5),
+                    "relevance": rng.randint(0, 5),
+                    "alignment": rng.randint(0, 5),
+                    "depth": rng.randint(0, 5),
+                },
+            }
+        )
+    return records
+
+
+def linear_scan(records: List[Dict[str, Any]], query: Dict[str, Any]) -> List[int]:
+    """
+    Référence : filtre chaque record (mêmes critères que HistoryIndex.search, sans classement).
+    """
+    terms = set(tokenize(query.get("text", "")))
+    found = []
+    for i, record in enumerate(records):
+        if "type" in query and normalize(record["type"]) != normalize(query["type"]):
+            continue
+        if "topic" in query and normalize(record["topic"]) != normalize(query["topic"]):
+            continue
+        if "max_score" in query:
+            score = (record.get("evaluation") or {}).get("score")
+            if score is None or score > query["max_score"]:
+                continue
+        if terms and not terms & set(tokenize(record["answer"])):
+            continue
+        if query.get("skipped") is not None and is_skipped(record) != query["skipped"]:
+            continue
+        found.append(i)
+    return found
+
+
+QUERIES: List[Tuple[str, Dict[str, Any]]] = [
+    ("thème + note <= 4", {"topic": "python", "max_score": 4}),
+    ("type + plein texte", {"type": "technique", "text": "tests unitaires"}),
+    ("questions passées", {"type": "technique", "skipped": True}),
+]
+
+
+def _timed(fn: Callable[[], Any], runs: int) -> Tuple[float, float, Any]:
+    samples = []
+    result = None
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return statistics.median(samples), samples[int(0.95 * (len(samples) - 1))], result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=200000)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    records = synthetic_records(args.records)
+    t0 = time.perf_counter()
+    index = HistoryIndex(skills=SKILLS)
+    index.add_many(records)
+    build = time.perf_counter() - t0
+    print(f"{len(index)} records indexés en {build:.2f}s ({len(index) / build:,.0f} records/s)")
+    print(f"  {index.stats()}")
+
+    extra = synthetic_records(1000, seed=1)
+    t0 = time.perf_counter()
+    index.add_many(extra)
+    records.extend(extra)
+    print(f"  ajout incrémental de 1000 records : {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    print(f"\n{'requête':<22} {'index p50':>10} {'index p95':>10} {'parcours':>10}  résultats")
+    for label, query in QUERIES:
+        kwargs: Dict[str, Any] = {
+            "type": query.get("type"),
+            "topic": query.get("topic"),
+            "text": query.get("text"),
+            "skipped": query.get("skipped"),
+            "limit": None,
+        }
+        if "max_score" in query:
+            kwargs["ranges"] = {"score": (None, query["max_score"])}
+        p50, p95, results = _timed(lambda: index.search(**kwargs), args.runs)
+        scan, _, expected = _timed(lambda: linear_scan(records, query), 1)
+        assert sorted(r["id"] for r in results) == expected, f"résultats différents : {label}"
+        print(f"{label:<22} {p50 * 1000:>8.1f}ms {p95 * 1000:>8.1f}ms {scan * 1000:>8.0f}ms  {len(results)}")
+
+    p50, p95, rows = _timed(lambda: index.most_skipped(type="technique", limit=5), max(1, args.runs // 10))
+    print(f"{'plus souvent passées':<22} {p50 * 1000:>8.1f}ms {p95 * 1000:>8.1f}ms {'':>10}  {rows[0] if rows else '-'}")
+
+
+if __name__ == "__main__":
+    main()
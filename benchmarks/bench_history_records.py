@@ -0,0 +1,126 @@
+"""
+Historiques en dicts imbriqués vs InterviewRecord (src.records) : mémoire par
+session, taille et durée de sérialisation (pickle, utilisé pour l'état de
+session Streamlit, JSON et format binaire), aller-retour complet.
+
+Usage :
+    python -m benchmarks.bench_history_records [--sessions 500] [--questions 8]
+"""
+import argparse
+import gc
+import json
+import pickle
+import random
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.records import InterviewRecord, history_from_bytes, history_to_bytes
+
+TYPES = ["intro", "motivation", "technique", "projet", "soft_skill", "conclusion"]
+TOPICS = ["Python", "SQL", "Machine Learning", "Power BI", "Communication", "Motivation"]
+SENTENCE = (
+    "J'ai automatisé un reporting hebdomadaire avec pandas, du nettoyage des données "
+    "jusqu'à l'export vers Power BI, ce qui a réduit le temps de production de moitié. "
+)
+
+
+def make_history(rng: random.Random, n_questions: int) -> List[Dict[str, Any]]:
+    """
+    Historique au format dict, comme le produisaient app.py et interview_engine.
+    """
+    history = []
+    for i in range(n_questions):
+        # Chaînes construites (et non littérales) : comme les réponses du LLM et du candidat
+        history.append(
+            {
+                "question": f"Question {i} : pouvez-vous détailler un projet {rng.choice(TOPICS)} ?",
+                "type": "".join(rng.choice(TYPES)),
+                "topic": "".join(rng.choice(TOPICS)),
+                "answer": SENTENCE * rng.randint(2, 6),
+                "evaluation": {
+                    "score": rng.randint(0, 10),
+                    "clarity": rng.randint(0, 5),
+                    "relevance": rng.randint(0, 5),
+                    "alignment": rng.randint(0, 5),
+                    "depth": rng.randint(0, 5),
+                    "strengths": [f"Exemple concret n°{rng.randint(1, 9)}", "Structure claire"],
+                    "weaknesses": [f"Peu de chiffres ({rng.randint(1, 9)})"],
+                    "improvements": ["Préciser les choix techniques", "Quantifier l'impact"],
+                },
+            }
+        )
+    return history
+
+
+def measure_memory(build: Callable[[], Any]) -> Tuple[Any, int]:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, after - before
+
+
+def timed(fn: Callable[[], Any], runs: int = 5) -> Tuple[float, Any]:
+    best = float("inf")
+    result = None
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--questions", type=int, default=8)
+    args = parser.parse_args()
+
+    def build_dicts() -> List[List[Dict[str, Any]]]:
+        rng = random.Random(0)
+        return [make_history(rng, args.questions) for _ in range(args.sessions)]
+
+    def build_records() -> List[List[InterviewRecord]]:
+        rng = random.Random(0)
+        return [
+            [InterviewRecord.from_dict(r) for r in make_history(rng, args.questions)]
+            for _ in range(args.sessions)
+        ]
+
+    dict_sessions, dict_mem = measure_memory(build_dicts)
+    record_sessions, record_mem = measure_memory(build_records)
+
+    # Réponses identiques des deux côtés : la différence vient de la structure
+    text_bytes = sum(len(r["answer"]) + len(r["question"]) for h in dict_sessions for r in h)
+    print(f"{args.sessions} sessions × {args.questions} questions (texte libre : {text_bytes / args.sessions / 1024:.1f} Ko/session)")
+    print(f"  mémoire / session   dicts : {dict_mem / args.sessions / 1024:6.1f} Ko   records : {record_mem / args.sessions / 1024:6.1f} Ko")
+
+    rows = []
+    for label, sessions, dump, load in (
+        ("pickle (dicts)", dict_sessions, pickle.dumps, pickle.loads),
+        ("pickle (records)", record_sessions, pickle.dumps, pickle.loads),
+        ("JSON (dicts)", dict_sessions, lambda h: json.dumps(h, ensure_ascii=False), json.loads),
+        (
+            "JSON (records)",
+            record_sessions,
+            lambda h: json.dumps([r.to_dict() for r in h], ensure_ascii=False),
+            lambda s: [InterviewRecord.from_dict(r) for r in json.loads(s)],
+        ),
+        ("binaire (records)", record_sessions, history_to_bytes, history_from_bytes),
+    ):
+        dump_s, payloads = timed(lambda: [dump(h) for h in sessions])
+        load_s, _ = timed(lambda: [load(p) for p in payloads])
+        size = sum(len(p) for p in payloads) / len(payloads)
+        rows.append((label, size, dump_s / len(sessions), load_s / len(sessions)))
+
+    print(f"\n{'sérialisation':<20} {'taille/session':>15} {'écriture':>10} {'lecture':>10}")
+    for label, size, dump_s, load_s in rows:
+        print(f"{label:<20} {size / 1024:>12.1f} Ko {dump_s * 1e6:>8.0f}µs {load_s * 1e6:>8.0f}µs")
+
+
+if __name__ == "__main__":
+    main()
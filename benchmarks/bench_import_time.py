@@ -0,0 +1,168 @@
+"""
+Profil du temps d'import (démarrage à froid) de app.py, api.py et des modules de src/.
+
+Chaque mesure tourne dans un interpréteur neuf (`python -X importtime`), pour
+ne bénéficier d'aucun module déjà chargé. Le script affiche, pour chaque cible :
+- le temps d'import cumulé (médiane sur --runs),
+- les dépendances les plus coûteuses chargées à l'import,
+- les modules lourds qui ne devraient être chargés qu'au premier usage
+  (PDF, audio, numpy, jsonschema, modèles ML) : leur présence fait échouer le
+  script (code 1).
+
+Avec --first-paint, mesure aussi le premier rendu de la page Streamlit
+(import + exécution du script sans session) via le harnais de test.
+
+Usage :
+    python -m benchmarks.bench_import_time [--runs 5] [--top 10] [--first-paint]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = [
+    "app",
+    "api",
+    "src.analyze_inputs",
+    "src.evaluator",
+    "src.final_report",
+    "src.pdf_loader",
+    "src.tts",
+    "src.stt",
+    "src.job_queue",
+]
+
+# Modules à ne charger qu'au premier usage (import paresseux)
+LAZY_MODULES = {
+    "fitz": "PDF (PyMuPDF)",
+    "gtts": "synthèse vocale",
+    "numpy": "statistiques de scores",
+    "jsonschema": "validation des sorties JSON",
+    "redis": "file de tâches Redis",
+    "transformers": "modèles ML",
+    "sentence_transformers": "modèles ML",
+    "torch": "modèles ML",
+}
+
+FIRST_PAINT_CODE = """
+import os, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(os.path.join({root!r}, "app.py"), default_timeout=120)
+at.run()
+print(f"FIRST_PAINT {{time.perf_counter() - t0:.6f}}")
+"""
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+
+def _importtime(module: str) -> List[Tuple[str, int, int]]:
+    """
+    Importe `module` dans un interpréteur neuf et renvoie la liste
+    (module, cumul_us, profondeur) lue sur la sortie de -X importtime.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        env=_child_env(),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Import de {module} impossible :\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            depth = (len(match.group(3)) - 1) // 2
+            entries.append((match.group(4), int(match.group(2)), depth))
+    return entries
+
+
+def _child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("GROQ_API_KEY", "benchmark")
+    env.pop("INTERVIEW_QUEUE_URL", None)
+    return env
+
+
+def profile_module(module: str, runs: int, top: int) -> Dict[str, object]:
+    totals: List[int] = []
+    entries: List[Tuple[str, int, int]] = []
+    for _ in range(runs):
+        entries = _importtime(module)
+        totals.append(next((cumul for name, cumul, _ in entries if name == module), 0))
+
+    # Imports de premier niveau les plus coûteux
+    loaded = {name for name, _, _ in entries}
+    heaviest = sorted(
+        ((name, cumul) for name, cumul, depth in entries if depth == 1 and name != module),
+        key=lambda item: item[1],
+        reverse=True,
+    )[:top]
+    eager = sorted(
+        name for name in LAZY_MODULES
+        if name in loaded or any(n.startswith(name + ".") for n in loaded)
+    )
+    return {
+        "module": module,
+        "median_ms": statistics.median(totals) / 1000,
+        "heaviest": heaviest,
+        "eager_heavy": eager,
+    }
+
+
+def first_paint(runs: int) -> float:
+    samples = []
+    env = _child_env()
+    env["INTERVIEW_SESSION_DB"] = os.path.join(tempfile.mkdtemp(), "sessions.db")
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", FIRST_PAINT_CODE.format(root=ROOT)],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            env=env,
+        )
+        match = re.search(r"FIRST_PAINT ([0-9.]+)", result.stdout)
+        if not match:
+            raise RuntimeError(f"Premier rendu impossible :\n{result.stderr[-2000:]}")
+        samples.append(float(match.group(1)))
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--first-paint", action="store_true")
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'module':<22} {'import (ms)':>12}  dépendances les plus lentes")
+    for module in TARGETS:
+        stats = profile_module(module, args.runs, args.top)
+        heaviest = ", ".join(f"{name} {cumul / 1000:.0f}" for name, cumul in stats["heaviest"])
+        print(f"{module:<22} {stats['median_ms']:>12.1f}  {heaviest}")
+        for name in stats["eager_heavy"]:
+            failures.append(f"{module} charge {name} ({LAZY_MODULES[name]}) dès l'import")
+
+    if args.first_paint:
+        print(f"\nPremier rendu de app.py (médiane) : {first_paint(args.runs):.0f} ms")
+
+    if failures:
+        print("\n⚠️ Imports lourds non différés :")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+Serveur HTTP local compatible avec les endpoints Groq/OpenAI utilisés par le projet :
+- POST /openai/v1/chat/completions
+- POST /openai/v1/audio/transcriptions
+
+Il renvoie des réponses JSON pré-enregistrées (CV, offre, plan, évaluation,
+rapport) choisies d'après le contenu du prompt, avec :
+- une latence de base configurable (temps avant le premier token),
+- un débit de génération en tokens/s (la latence croît avec la sortie),
+- une injection d'erreurs (429 / 500) à taux configurable,
+- le refus optionnel de certains `response_format` (400), pour tester le repli,
+- un cache de préfixe simulé : les blocs de prompt déjà vus sont rapportés dans
+  usage.prompt_tokens_details.cached_tokens et ne coûtent pas de latence de prefill.
+
+Usage autonome :
+    python -m benchmarks.fake_groq_server --port 8765 --latency-ms 150 --tokens-per-s 400
+    export GROQ_API_BASE=http://127.0.0.1:8765/openai/v1 GROQ_API_KEY=fake
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+CANNED_CV = {
+    "hard_skills": ["python", "sql", "machine learning", "pandas", "power bi"],
+    "soft_skills": ["communication", "travail en équipe", "autonomie"],
+    "languages": ["français", "anglais B2"],
+    "projects": [
+        {"title": "Segmentation client", "description": "Clustering K-means sur données CRM."},
+        {"title": "Dashboard ventes", "description": "Tableau de bord Power BI pour 12 agences."},
+    ],
+    "summary": "Étudiant en data science avec une première expérience en analyse de données.",
+}
+
+CANNED_JOB = {
+    "title": "Stage Data Analyst / Data Scientist",
+    "company": "Entreprise Exemple",
+    "location": "Paris",
+    "hard_skills_required": ["power bi", "dax", "python", "sql", "machine learning"],
+    "soft_skills_required": ["créativité", "communication"],
+    "missions": [
+        "Cartographier les tableaux de bord existants",
+        "Préparer et analyser les données clients",
+        "Tester des modèles de segmentation et de scoring",
+    ],
+    "summary": "Stage data mêlant adoption de Power BI et premiers projets de Machine Learning.",
+}
+
+CANNED_PLAN = [
+    {"type": "intro", "topic": "présentation", "question": "Pouvez-vous vous présenter ?"},
+    {"type": "motivation", "topic": "motivation pour le poste", "question": "Pourquoi ce stage ?"},
+    {"type": "technique", "topic": "Python", "question": "Comment utilisez-vous pandas ?"},
+    {"type": "technique", "topic": "SQL", "question": "Expliquez une jointure complexe."},
+    {"type": "technique", "topic": "Machine Learning", "question": "Comment évaluer un clustering ?"},
+    {"type": "projet", "topic": "segmentation client", "question": "Détaillez votre projet de segmentation."},
+    {"type": "soft_skill", "topic": "travail en équipe", "question": "Racontez un désaccord en équipe."},
+    {"type": "conclusion", "topic": "questions", "question": "Avez-vous des questions ?"},
+]
+
+CANNED_FOLLOW_UP = {
+    "type": "technique",
+    "topic": "DAX",
+    "question": "Comment écririez-vous une mesure DAX de chiffre d'affaires cumulé ?",
+}
+
+CANNED_EVALUATION = {
+    "score": 7,
+    "clarity": 4,
+    "relevance": 4,
+    "alignment": 3,
+    "depth": 3,
+    "strengths": ["Réponse structurée", "Exemple concret"],
+    "weaknesses": ["Manque de chiffres", "Lien avec le poste peu explicite"],
+    "improvements": ["Quantifier les résultats", "Relier l'exemple aux missions du poste"],
+}
+
+CANNED_NARRATIVE = {
+    "introduction": "Le candidat montre une bonne base technique et une communication claire.",
+    "conclusion": "Avec un peu plus de préparation chiffrée, l'entretien réel sera réussi.",
+}
+
+CANNED_TEXT = (
+    "Le profil présente une bonne adéquation avec le poste : compétences Python et SQL "
+    "solides, premiers projets de Machine Learning. Les principaux manques portent sur DAX."
+)
+
+CANNED_TRANSCRIPTION = "Bonjour, je m'appelle Camille et je suis étudiante en data science."
+
+
+# Granularité du cache de préfixe simulé (en caractères)
+PREFIX_BLOCK_CHARS = 512
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def serialize_prompt(messages) -> str:
+    return "".join(f"<{m.get('role', '')}>{m.get('content', '')}" for m in messages)
+
+
+@dataclass
+class FakeServerConfig:
+    latency_ms: float = 100.0
+    tokens_per_s: float = 500.0
+    error_rate: float = 0.0
+    error_status: int = 429
+    seed: Optional[int] = None
+    # Types de response_format refusés ("json_schema", "json_object")
+    rejected_formats: Tuple[str, ...] = field(default_factory=tuple)
+    # Latence de prefill par token de prompt non mis en cache (secondes)
+    prefill_s_per_token: float = 0.0
+
+
+def canned_completion(messages) -> Tuple[str, bool]:
+    """
+    Choisit la réponse pré-enregistrée selon le contenu des messages.
+
+    Returns:
+        (contenu, est_json)
+    """
+    text = " ".join(str(m.get("content", "")) for m in messages)
+    lowered = text.lower()
+    if "analyse le cv" in lowered:
+        return json.dumps(CANNED_CV, ensure_ascii=False), True
+    if "analyse l'offre" in lowered:
+        return json.dumps(CANNED_JOB, ensure_ascii=False), True
+    if "entretien d'embauche adaptatif" in lowered:
+        return json.dumps(CANNED_FOLLOW_UP, ensure_ascii=False), True
+    if "plan d'entretien" in lowered:
+        return json.dumps({"questions": CANNED_PLAN}, ensure_ascii=False), True
+    if "évalue une réponse" in lowered or "evalue une reponse" in lowered:
+        return json.dumps(CANNED_EVALUATION, ensure_ascii=False), True
+    if '"introduction"' in lowered and '"conclusion"' in lowered:
+        return json.dumps(CANNED_NARRATIVE, ensure_ascii=False), True
+    return CANNED_TEXT, False
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "FakeGroqServer"
+
+    def log_message(self, format: str, *args: Any) -> None:  # silence
+        pass
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _maybe_fail(self) -> bool:
+        cfg = self.server.config
+        if cfg.error_rate > 0 and self.server.rng_random() < cfg.error_rate:
+            self.server.count("errors")
+            self._send_json(cfg.error_status, {"error": {"message": "erreur injectée"}})
+            return True
+        return False
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length)
+        cfg = self.server.config
+        self.server.count("requests")
+
+        if self._maybe_fail():
+            return
+
+        if self.path.endswith("/chat/completions"):
+            payload = json.loads(raw or b"{}")
+            messages = payload.get("messages", [])
+            format_type = (payload.get("response_format") or {}).get("type")
+            if format_type:
+                self.server.count(f"response_format_{format_type}")
+            if format_type in cfg.rejected_formats:
+                self._send_json(
+                    400,
+                    {"error": {
+                        "message": f"response_format `{format_type}` is not supported with this model",
+                        "type": "invalid_request_error",
+                    }},
+                )
+                return
+            content, _ = canned_completion(messages)
+
+            prompt_tokens = sum(estimate_tokens(str(m.get("content", ""))) for m in messages)
+            cached_tokens = min(self.server.cached_prefix_chars(serialize_prompt(messages)) // 4, prompt_tokens)
+            completion_tokens = estimate_tokens(content)
+            max_tokens = int(payload.get("max_tokens") or completion_tokens)
+            finish_reason = "stop"
+            if completion_tokens > max_tokens:
+                # Troncature comme l'API réelle
+                content = content[: max_tokens * 4]
+                completion_tokens = max_tokens
+                finish_reason = "length"
+
+            time.sleep(
+                cfg.latency_ms / 1000.0
+                + (prompt_tokens - cached_tokens) * cfg.prefill_s_per_token
+                + completion_tokens / max(cfg.tokens_per_s, 1e-6)
+            )
+            self._send_json(
+                200,
+                {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "model": payload.get("model", ""),
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": finish_reason,
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens,
+                        "prompt_tokens_details": {"cached_tokens": cached_tokens},
+                    },
+                },
+            )
+            return
+
+        if self.path.endswith("/audio/transcriptions"):
+            # Latence proportionnelle à la taille de l'audio (≈ 1s de traitement / Mo)
+            time.sleep(cfg.latency_ms / 1000.0 + len(raw) / 1_000_000)
+            self._send_json(200, {"text": CANNED_TRANSCRIPTION})
+            return
+
+        self._send_json(404, {"error": {"message": f"endpoint inconnu : {self.path}"}})
+
+
+class FakeGroqServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], config: FakeServerConfig) -> None:
+        super().__init__(address, _Handler)
+        self.config = config
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"requests": 0, "errors": 0}
+        self._prefixes: set = set()
+
+    def rng_random(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def cached_prefix_chars(self, prompt: str) -> int:
+        """
+        Longueur du plus long préfixe (par blocs de PREFIX_BLOCK_CHARS) déjà vu,
+        puis mémorise tous les préfixes de ce prompt.
+        """
+        cut_points = range(PREFIX_BLOCK_CHARS, len(prompt) + 1, PREFIX_BLOCK_CHARS)
+        hashes = [hash(prompt[:k]) for k in cut_points]
+        with self._lock:
+            cached = 0
+            for k, h in zip(cut_points, hashes):
+                if h not in self._prefixes:
+                    break
+                cached = k
+            self._prefixes.update(hashes)
+        return cached
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/openai/v1"
+
+
+def start_server(config: Optional[FakeServerConfig] = None, port: int = 0) -> FakeGroqServer:
+    """
+    Démarre le serveur dans un thread démon et le renvoie (port 0 = port libre).
+    """
+    server = FakeGroqServer(("127.0.0.1", port), config or FakeServerConfig())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Faux serveur Groq pour les benchmarks.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--tokens-per-s", type=float, default=500.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=429)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=0.0)
+    parser.add_argument("--reject-format", nargs="*", default=[], choices=["json_schema", "json_object"])
+    args = parser.parse_args()
+
+    config = FakeServerConfig(
+        latency_ms=args.latency_ms,
+        tokens_per_s=args.tokens_per_s,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+        rejected_formats=tuple(args.reject_format),
+        prefill_s_per_token=args.prefill_ms_per_1k / 1_000_000,
+    )
+    server = FakeGroqServer(("127.0.0.1", args.port), config)
+    print(f"Faux serveur Groq : {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
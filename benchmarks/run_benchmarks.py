@@ -0,0 +1,286 @@
+"""
+Suite de benchmarks de bout en bout des chemins critiques, contre le faux
+serveur Groq local (aucun appel réseau externe, aucune clé réelle).
+
+Scénarios : build_profile, generate_interview_plan, evaluate_answer,
+generate_final_report (mode hybride) et transcribe_audio, chacun sous
+plusieurs niveaux de concurrence.
+
+Pour chaque scénario et niveau : latence p50 / p95, débit (appels/s),
+erreurs, et allocations mémoire par appel (tracemalloc, passe séquentielle).
+
+Les résultats sont enregistrés dans benchmarks/results/<horodatage>.json et
+comparés au run précédent : toute dégradation au-delà du seuil est signalée.
+
+Usage :
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --concurrency 1 8 32 --requests 64 --latency-ms 50
+    python -m benchmarks.run_benchmarks --scenarios evaluate_answer --error-rate 0.05
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.fake_groq_server import (
+    CANNED_CV,
+    CANNED_EVALUATION,
+    CANNED_JOB,
+    CANNED_PLAN,
+    FakeServerConfig,
+    start_server,
+)
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+SAMPLE_CV_TEXT = "Étudiant en data science. Python, SQL, pandas, Power BI. " * 40
+SAMPLE_JOB_TEXT = "Stage Data Analyst : Power BI, DAX, Python, segmentation client. " * 40
+SAMPLE_ANSWER = (
+    "Lors de mon stage, j'ai automatisé un reporting hebdomadaire avec pandas ; "
+    "le temps de production est passé de 4 heures à 20 minutes."
+)
+SAMPLE_AUDIO = b"RIFF" + b"\x00" * 64_000  # ~64 Ko de "WAV"
+
+ALL_SCENARIOS = (
+    "build_profile",
+    "generate_interview_plan",
+    "evaluate_answer",
+    "generate_final_report",
+    "transcribe_audio",
+)
+
+
+def _sample_profile() -> Dict[str, Any]:
+    return {
+        "cv": dict(CANNED_CV),
+        "job": dict(CANNED_JOB),
+        "overlap_hard_skills": ["machine learning", "power bi", "python", "sql"],
+        "missing_hard_skills": ["dax"],
+        "overlap_soft_skills": ["communication"],
+        "missing_soft_skills": ["créativité"],
+        "fit_summary": "Bonne adéquation.",
+    }
+
+
+def _sample_history() -> List[Dict[str, Any]]:
+    return [
+        {
+            "question": q["question"],
+            "type": q["type"],
+            "topic": q["topic"],
+            "answer": SAMPLE_ANSWER,
+            "evaluation": dict(CANNED_EVALUATION),
+        }
+        for q in CANNED_PLAN
+    ]
+
+
+def build_scenarios() -> Dict[str, Callable[[], Any]]:
+    """
+    Importé après la configuration de GROQ_API_BASE : les modules src lisent
+    l'URL de l'API à l'import.
+    """
+    from src.analyze_inputs import build_profile
+    from src.evaluator import evaluate_answer
+    from src.final_report import generate_final_report
+    from src.plan_interview import generate_interview_plan
+    from src.stt import transcribe_audio
+
+    profile = _sample_profile()
+    history = _sample_history()
+
+    return {
+        "build_profile": lambda: build_profile(SAMPLE_CV_TEXT, SAMPLE_JOB_TEXT),
+        "generate_interview_plan": lambda: generate_interview_plan(
+            profile, interviewer_profile="Manager technique exigeant", n_questions=8
+        ),
+        "evaluate_answer": lambda: evaluate_answer(
+            CANNED_PLAN[2]["question"], SAMPLE_ANSWER, job_text=SAMPLE_JOB_TEXT
+        ),
+        "generate_final_report": lambda: generate_final_report(history, mode="hybrid"),
+        "transcribe_audio": lambda: transcribe_audio(SAMPLE_AUDIO, file_ext="wav"),
+    }
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100.0
+    low = int(k)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+def _timed_call(fn: Callable[[], Any]) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    try:
+        fn()
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return {"latency": time.perf_counter() - t0, "error": error}
+
+
+def run_load(fn: Callable[[], Any], concurrency: int, n_requests: int) -> Dict[str, Any]:
+    """
+    Exécute `n_requests` appels avec `concurrency` appels simultanés.
+    """
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        calls = list(executor.map(lambda _: _timed_call(fn), range(n_requests)))
+    wall = time.perf_counter() - started
+
+    latencies = [c["latency"] for c in calls if c["error"] is None]
+    errors = [c["error"] for c in calls if c["error"] is not None]
+    return {
+        "concurrency": concurrency,
+        "requests": n_requests,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "mean_ms": (statistics.mean(latencies) * 1000) if latencies else 0.0,
+        "throughput_rps": len(latencies) / wall if wall > 0 else 0.0,
+    }
+
+
+def measure_allocations(fn: Callable[[], Any], iterations: int = 5) -> Dict[str, float]:
+    """
+    Allocations Python par appel (séquentiel) : octets alloués et pic mémoire.
+    """
+    fn()  # échauffement (imports paresseux, connexions)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        for _ in range(iterations):
+            fn()
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    allocated = sum(s.size_diff for s in after.compare_to(before, "filename") if s.size_diff > 0)
+    return {
+        "alloc_kib_per_call": allocated / iterations / 1024,
+        "peak_kib": peak / 1024,
+    }
+
+
+# ---------- Stockage et comparaison ----------
+
+def latest_results(exclude: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    paths = sorted(glob.glob(os.path.join(RESULTS_DIR, "*.json")))
+    paths = [p for p in paths if p != exclude]
+    if not paths:
+        return None
+    with open(paths[-1], "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_results(results: Dict[str, Any]) -> str:
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{results['timestamp']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def compare(current: Dict[str, Any], previous: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Compare deux runs (même scénario, même concurrence) et renvoie les
+    régressions : p95 plus lent ou débit plus faible de plus de `threshold`.
+    """
+    regressions = []
+    for name, scenario in current["scenarios"].items():
+        prev_scenario = previous.get("scenarios", {}).get(name)
+        if not prev_scenario:
+            continue
+        prev_by_c = {r["concurrency"]: r for r in prev_scenario["load"]}
+        for run in scenario["load"]:
+            prev = prev_by_c.get(run["concurrency"])
+            if not prev or not prev["p95_ms"] or not prev["throughput_rps"]:
+                continue
+            p95_delta = run["p95_ms"] / prev["p95_ms"] - 1
+            rps_delta = run["throughput_rps"] / prev["throughput_rps"] - 1
+            if p95_delta > threshold or rps_delta < -threshold:
+                regressions.append(
+                    f"{name} @ c={run['concurrency']} : p95 {p95_delta:+.0%}, débit {rps_delta:+.0%}"
+                )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de bout en bout (faux serveur Groq).")
+    parser.add_argument("--scenarios", nargs="+", choices=ALL_SCENARIOS, default=list(ALL_SCENARIOS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=32, help="Appels par niveau de concurrence.")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--tokens-per-s", type=float, default=2000.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--threshold", type=float, default=0.15, help="Seuil de régression (0.15 = 15%%).")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args(argv)
+
+    config = FakeServerConfig(
+        latency_ms=args.latency_ms,
+        tokens_per_s=args.tokens_per_s,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    server = start_server(config)
+    os.environ["GROQ_API_BASE"] = server.base_url
+    os.environ["GROQ_API_KEY"] = "benchmark"
+    # Chaque requête doit atteindre le serveur : pas de mémo des évaluations
+    os.environ["INTERVIEW_EVALUATION_MEMO"] = "off"
+
+    scenarios = build_scenarios()
+    results: Dict[str, Any] = {
+        "timestamp": datetime.now().strftime("%Y%m%d-%H%M%S"),
+        "config": vars(args),
+        "scenarios": {},
+    }
+
+    for name in args.scenarios:
+        fn = scenarios[name]
+        load = [run_load(fn, c, args.requests) for c in args.concurrency]
+        allocations = measure_allocations(fn)
+        results["scenarios"][name] = {"load": load, "allocations": allocations}
+
+        print(f"\n{name}  (allocations : {allocations['alloc_kib_per_call']:.1f} Kio/appel, "
+              f"pic {allocations['peak_kib']:.0f} Kio)")
+        for run in load:
+            print(
+                f"  c={run['concurrency']:<3d} p50={run['p50_ms']:8.1f} ms  p95={run['p95_ms']:8.1f} ms  "
+                f"débit={run['throughput_rps']:7.1f}/s  erreurs={run['errors']}"
+            )
+
+    results["server_stats"] = dict(server.stats)
+    server.shutdown()
+
+    previous = latest_results()
+    if not args.no_save:
+        path = save_results(results)
+        print(f"\nRésultats enregistrés : {path}")
+
+    if previous:
+        regressions = compare(results, previous, args.threshold)
+        if regressions:
+            print(f"\n⚠️ Régressions par rapport au run {previous['timestamp']} :")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"\nAucune régression par rapport au run {previous['timestamp']}.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,7 +1,37 @@
-from typing import Any, Dict, List, Set
+from typing import Any, Dict, List, Optional, Set
 
+from src.instrumentation import traced
 from src.llm_client import generate_json, generate_text
 
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+
+# Schémas de validation des sorties JSON du LLM (champs indispensables uniquement)
+CV_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "hard_skills": _STRING_LIST,
+        "soft_skills": _STRING_LIST,
+        "languages": _STRING_LIST,
+        "projects": {"type": "array", "items": {"type": "object"}},
+        "summary": {"type": "string"},
+    },
+    "required": ["hard_skills", "summary"],
+}
+
+JOB_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": ["string", "null"]},
+        "company": {"type": ["string", "null"]},
+        "location": {"type": ["string", "null"]},
+        "hard_skills_required": _STRING_LIST,
+        "soft_skills_required": _STRING_LIST,
+        "missions": _STRING_LIST,
+        "summary": {"type": "string"},
+    },
+    "required": ["hard_skills_required", "summary"],
+}
+
 
 def _normalize_skills(skills: List[str]) -> Set[str]:
     """
@@ -28,7 +58,7 @@ def extract_cv_info(cv_text: str) -> Dict[str, Any]:
     """
     prompt = f"""
     Tu es un assistant RH spécialisé en profils Data/Tech.
-    Analyse le CV ci-dessous et renvoie STRICTEMENT un JSON avec les clés :
+    Analyse le CV ci-dessous et extrais :
 
     - hard_skills : liste de chaînes (ex: ["python", "sql", "machine learning"])
     - soft_skills : liste de chaînes (ex: ["communication", "travail en équipe"])
@@ -40,7 +70,7 @@ def extract_cv_info(cv_text: str) -> Dict[str, Any]:
     \"\"\"{cv_text}\"\"\"
     """
 
-    data = generate_json(prompt)
+    data = generate_json(prompt, schema=CV_SCHEMA, schema_name="cv", call_site="extract_cv")
 
     # Sécurisation minimale des champs attendus
     data.setdefault("hard_skills", [])
@@ -69,7 +99,7 @@ def extract_job_info(job_text: str) -> Dict[str, Any]:
     """
     prompt = f"""
     Tu es un assistant RH.
-    Analyse l'offre de stage/emploi suivante et renvoie STRICTEMENT un JSON avec les clés :
+    Analyse l'offre de stage/emploi suivante et extrais :
 
     - title                 : titre du poste
     - company               : nom de l'entreprise si identifiable (sinon null ou "")
@@ -83,7 +113,7 @@ def extract_job_info(job_text: str) -> Dict[str, Any]:
     \"\"\"{job_text}\"\"\"
     """
 
-    data = generate_json(prompt)
+    data = generate_json(prompt, schema=JOB_SCHEMA, schema_name="offre", call_site="extract_job")
 
     data.setdefault("title", "")
     data.setdefault("company", "")
@@ -96,37 +126,18 @@ def extract_job_info(job_text: str) -> Dict[str, Any]:
     return data
 
 
-def build_profile(cv_text: str, job_text: str) -> Dict[str, Any]:
+def generate_fit_summary(
+    cv_info: Dict[str, Any],
+    job_info: Dict[str, Any],
+    overlap_hard: List[str],
+    missing_hard: List[str],
+    overlap_soft: List[str],
+    missing_soft: List[str],
+) -> str:
     """
-    Construit un profil combiné à partir du CV et de l'offre.
-
-    Retourne un dict du type :
-    {
-        "cv": { ... infos CV ... },
-        "job": { ... infos offre ... },
-        "overlap_hard_skills": [...],
-        "missing_hard_skills": [...],
-        "overlap_soft_skills": [...],
-        "missing_soft_skills": [...],
-        "fit_summary": "Texte expliquant le matching global"
-    }
+    Paragraphe d'adéquation CV / offre rédigé par le LLM, à partir des
+    résumés extraits et des compétences communes / manquantes.
     """
-    cv_info = extract_cv_info(cv_text)
-    job_info = extract_job_info(job_text)
-
-    cv_hard = _normalize_skills(cv_info.get("hard_skills", []))
-    job_hard = _normalize_skills(job_info.get("hard_skills_required", []))
-
-    cv_soft = _normalize_skills(cv_info.get("soft_skills", []))
-    job_soft = _normalize_skills(job_info.get("soft_skills_required", []))
-
-    overlap_hard = sorted(cv_hard & job_hard)
-    missing_hard = sorted(job_hard - cv_hard)
-
-    overlap_soft = sorted(cv_soft & job_soft)
-    missing_soft = sorted(job_soft - cv_soft)
-
-    # Résumé global du "fit" pour alimenter les autres modules
     fit_prompt = f"""
     Tu es un recruteur data.
     Voici un résumé du CV et de l'offre, ainsi que les compétences communes et manquantes.
@@ -156,7 +167,54 @@ def build_profile(cv_text: str, job_text: str) -> Dict[str, Any]:
     - et ce sur quoi le candidat devrait insister pendant l'entretien.
     """
 
-    fit_summary = generate_text(fit_prompt, max_tokens=400)
+    return generate_text(fit_prompt, call_site="fit_summary")
+
+
+@traced("build_profile")
+def build_profile(
+    cv_text: str,
+    job_text: str,
+    cv_info: Optional[Dict[str, Any]] = None,
+    job_info: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Construit un profil combiné à partir du CV et de l'offre.
+
+    Si `cv_info` / `job_info` sont fournis (extraction déjà faite pour un
+    document inchangé), l'appel LLM d'extraction correspondant est évité.
+
+    Retourne un dict du type :
+    {
+        "cv": { ... infos CV ... },
+        "job": { ... infos offre ... },
+        "overlap_hard_skills": [...],
+        "missing_hard_skills": [...],
+        "overlap_soft_skills": [...],
+        "missing_soft_skills": [...],
+        "fit_summary": "Texte expliquant le matching global"
+    }
+    """
+    if cv_info is None:
+        cv_info = extract_cv_info(cv_text)
+    if job_info is None:
+        job_info = extract_job_info(job_text)
+
+    cv_hard = _normalize_skills(cv_info.get("hard_skills", []))
+    job_hard = _normalize_skills(job_info.get("hard_skills_required", []))
+
+    cv_soft = _normalize_skills(cv_info.get("soft_skills", []))
+    job_soft = _normalize_skills(job_info.get("soft_skills_required", []))
+
+    overlap_hard = sorted(cv_hard & job_hard)
+    missing_hard = sorted(job_hard - cv_hard)
+
+    overlap_soft = sorted(cv_soft & job_soft)
+    missing_soft = sorted(job_soft - cv_soft)
+
+    # Résumé global du "fit" pour alimenter les autres modules
+    fit_summary = generate_fit_summary(
+        cv_info, job_info, overlap_hard, missing_hard, overlap_soft, missing_soft
+    )
 
     profile = {
         "cv": cv_info,
@@ -0,0 +1,406 @@
+"""
+Exécution en lot (sans interaction) du pipeline d'entretien :
+build_profile -> generate_interview_plan -> évaluation des réponses -> rapport.
+
+Usage :
+    python -m src.batch_runner entrees.jsonl -o resultats.jsonl --workers 4
+    python -m src.batch_runner dossier_entretiens/ -o resultats.jsonl
+    python -m src.batch_runner entrees.jsonl -o resultats.jsonl --queue sqlite:///data/queue/jobs.db
+
+Formats d'entrée :
+- JSONL : une ligne par entretien, avec les clés
+    "id" (optionnel), "cv_text" ou "cv_path", "job_text" ou "job_path",
+    "answers" : liste de réponses (associées aux questions du plan généré)
+                ou liste d'objets {"question", "type", "topic", "answer"}
+                (le plan archivé est alors réutilisé tel quel ; si chaque
+                réponse porte déjà son "evaluation", elle n'est pas réévaluée
+                et le profil n'est pas construit),
+    "interviewer_profile" (optionnel).
+- Dossier : un sous-dossier par entretien contenant cv.pdf|cv.txt,
+  job.pdf|job.txt et answers.json (même format que "answers" ci-dessus).
+
+Le fichier de sortie sert aussi de point de reprise : les entretiens déjà
+traités avec succès sont ignorés lors d'une nouvelle exécution.
+
+Avec --queue (ou INTERVIEW_QUEUE_URL), chaque entretien est soumis à la file
+distribuée (src.job_queue) et traité par ses workers ; ce processus ne fait
+que lire les entrées, attendre les résultats et les écrire.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from src.analyze_inputs import build_profile
+from src.final_report import REPORT_MODES, compute_score_stats, generate_final_report
+from src.instrumentation import export_jsonl, to_prometheus
+from src.interview_engine import run_scripted_interview
+from src.job_queue import QUEUE_URL_ENV, JobQueue, open_queue
+from src.pdf_loader import load_file
+from src.plan_interview import generate_interview_plan
+from src.records import history_from_dicts, history_to_dicts
+
+DEFAULT_INTERVIEWER_PROFILE = (
+    "Manager technique backend, ton direct mais bienveillant, "
+    "s'intéresse aux projets concrets et aux résultats chiffrés."
+)
+
+STAGES = ("load", "profile", "plan", "evaluate", "report")
+
+
+# ---------- Lecture des entrées ----------
+
+def _find_document(directory: str, stem: str) -> Optional[str]:
+    for ext in (".pdf", ".txt"):
+        path = os.path.join(directory, stem + ext)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _iter_directory(root: str) -> Iterator[Dict[str, Any]]:
+    for name in sorted(os.listdir(root)):
+        directory = os.path.join(root, name)
+        if not os.path.isdir(directory):
+            continue
+        answers_path = os.path.join(directory, "answers.json")
+        answers: List[Any] = []
+        if os.path.exists(answers_path):
+            with open(answers_path, "r", encoding="utf-8") as f:
+                answers = json.load(f)
+        yield {
+            "id": name,
+            "cv_path": _find_document(directory, "cv"),
+            "job_path": _find_document(directory, "job"),
+            "answers": answers,
+        }
+
+
+def _iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            item.setdefault("id", f"line-{line_no}")
+            yield item
+
+
+def iter_batch_items(source: str) -> Iterator[Dict[str, Any]]:
+    """
+    Itère sur les entretiens à traiter (dossier ou fichier JSONL).
+    """
+    if os.path.isdir(source):
+        return _iter_directory(source)
+    return _iter_jsonl(source)
+
+
+def load_checkpoint(output_path: str) -> Set[str]:
+    """
+    Identifiants déjà traités avec succès dans un fichier de sortie existant.
+    """
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                # Ligne tronquée (arrêt brutal) : l'entretien sera retraité
+                continue
+            if result.get("status") == "ok":
+                done.add(str(result.get("id")))
+    return done
+
+
+# ---------- Traitement d'un entretien ----------
+
+def _item_text(item: Dict[str, Any], kind: str) -> str:
+    text = item.get(f"{kind}_text")
+    if text:
+        return text
+    path = item.get(f"{kind}_path")
+    if not path:
+        raise ValueError(f"Entrée '{item.get('id')}' : ni {kind}_text ni {kind}_path.")
+    return load_file(path)
+
+
+def _load_texts(item: Dict[str, Any]):
+    return _item_text(item, "cv"), _item_text(item, "job")
+
+
+def process_item(
+    item: Dict[str, Any],
+    interviewer_profile: str = DEFAULT_INTERVIEWER_PROFILE,
+    n_questions: int = 8,
+    report_mode: str = "hybrid",
+) -> Dict[str, Any]:
+    """
+    Exécute le pipeline complet pour un entretien et renvoie le résultat
+    (avec les durées de chaque étape), sans lever d'exception.
+    """
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+    result: Dict[str, Any] = {"id": str(item.get("id"))}
+
+    def timed(stage: str, fn, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            timings[stage] = time.perf_counter() - t0
+
+    try:
+        cv_text, job_text = timed("load", _load_texts, item)
+
+        profile: Optional[Dict[str, Any]] = None
+        raw_answers = item.get("answers") or []
+        archived = bool(raw_answers) and all(isinstance(a, dict) for a in raw_answers)
+        if archived:
+            # Entretien archivé : on réutilise les questions telles quelles
+            plan = [
+                {
+                    "type": a.get("type", "inconnu"),
+                    "topic": a.get("topic", ""),
+                    "question": a.get("question", ""),
+                }
+                for a in raw_answers
+            ]
+            answered = [a for a in raw_answers if str(a.get("answer") or "").strip()]
+
+        if archived and all(a.get("evaluation") is not None for a in answered):
+            # Réponses déjà évaluées : ni profil ni appel d'évaluation
+            history = history_from_dicts(
+                {**a, "answer": str(a["answer"]).strip()} for a in answered
+            )
+        else:
+            # Le profil sert à générer le plan et à condenser le contexte d'évaluation
+            profile = timed("profile", build_profile, cv_text, job_text)
+            if archived:
+                answers = [str(a.get("answer", "")) for a in raw_answers]
+            else:
+                plan = timed(
+                    "plan",
+                    generate_interview_plan,
+                    profile,
+                    interviewer_profile=item.get("interviewer_profile") or interviewer_profile,
+                    n_questions=n_questions,
+                )
+                answers = [str(a) for a in raw_answers]
+
+            history = timed(
+                "evaluate",
+                run_scripted_interview,
+                plan,
+                answers,
+                job_text=job_text,
+                profile=profile,
+            )
+        report = timed("report", generate_final_report, history, mode=report_mode)
+
+        result.update(
+            {
+                "status": "ok",
+                "profile": profile,
+                "plan": plan,
+                "history": history_to_dicts(history),
+                "stats": compute_score_stats(history),
+                "report": report,
+            }
+        )
+    except Exception as e:
+        result.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+
+    result["timings"] = timings
+    result["latency_s"] = time.perf_counter() - started
+    return result
+
+
+def process_item_via_queue(
+    queue: JobQueue,
+    item: Dict[str, Any],
+    timeout: Optional[float] = None,
+    **options: Any,
+) -> Dict[str, Any]:
+    """
+    Soumet un entretien à la file distribuée et attend son résultat.
+
+    Les textes sont lus ici (les workers n'ont pas forcément accès aux
+    fichiers locaux) ; l'identifiant de tâche dépend du contenu, si bien
+    qu'une relance du lot ne retraite pas un entretien déjà terminé.
+    """
+    started = time.perf_counter()
+    try:
+        cv_text, job_text = _load_texts(item)
+        payload_item = {
+            key: value for key, value in item.items() if key not in ("cv_path", "job_path")
+        }
+        payload_item.update({"cv_text": cv_text, "job_text": job_text})
+        return queue.run("batch_item", {"item": payload_item, "options": options}, timeout=timeout)
+    except Exception as e:
+        return {
+            "id": str(item.get("id")),
+            "status": "error",
+            "error": f"{type(e).__name__}: {e}",
+            "timings": {},
+            "latency_s": time.perf_counter() - started,
+        }
+
+
+# ---------- Exécution en lot ----------
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100.0
+    low = int(k)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+def summarize_results(results: List[Dict[str, Any]], wall_time: float, skipped: int) -> Dict[str, Any]:
+    """
+    Débit et latences (p50 / p95 / max) d'une exécution en lot.
+    """
+    latencies = [r["latency_s"] for r in results]
+    ok = [r for r in results if r.get("status") == "ok"]
+
+    stage_means: Dict[str, float] = {}
+    for stage in STAGES:
+        values = [r["timings"][stage] for r in results if stage in r.get("timings", {})]
+        if values:
+            stage_means[stage] = sum(values) / len(values)
+
+    return {
+        "processed": len(results),
+        "ok": len(ok),
+        "errors": len(results) - len(ok),
+        "skipped": skipped,
+        "wall_time_s": wall_time,
+        "throughput_per_min": (len(results) / wall_time * 60.0) if wall_time > 0 else 0.0,
+        "latency_p50_s": _percentile(latencies, 50),
+        "latency_p95_s": _percentile(latencies, 95),
+        "latency_max_s": max(latencies) if latencies else 0.0,
+        "stage_mean_s": stage_means,
+    }
+
+
+def run_batch(
+    source: str,
+    output_path: str,
+    max_workers: int = 4,
+    interviewer_profile: str = DEFAULT_INTERVIEWER_PROFILE,
+    n_questions: int = 8,
+    report_mode: str = "hybrid",
+    queue: Optional[JobQueue] = None,
+) -> Dict[str, Any]:
+    """
+    Traite tous les entretiens de `source` avec au plus `max_workers` entretiens
+    en parallèle, et ajoute chaque résultat à `output_path` dès qu'il est prêt.
+
+    Si `queue` est fourni, les entretiens sont exécutés par les workers de la
+    file ; `max_workers` borne alors le nombre d'entretiens en attente de résultat.
+
+    Returns:
+        Le résumé de l'exécution (voir summarize_results).
+    """
+    done = load_checkpoint(output_path)
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    write_lock = threading.Lock()
+    results: List[Dict[str, Any]] = []
+    skipped = 0
+    started = time.perf_counter()
+
+    def handle(future: Future) -> None:
+        result = future.result()
+        with write_lock, open(output_path, "a", encoding="utf-8") as out:
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+        results.append(result)
+        print(
+            f"[{len(results)}] {result['id']} : {result['status']} "
+            f"({result['latency_s']:.1f}s)",
+            file=sys.stderr,
+        )
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight: Set[Future] = set()
+        for item in iter_batch_items(source):
+            if str(item.get("id")) in done:
+                skipped += 1
+                continue
+
+            # Nombre borné d'entretiens en vol : on ne charge pas tout le lot en mémoire
+            if len(in_flight) >= max_workers * 2:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    handle(future)
+
+            options = {
+                "interviewer_profile": interviewer_profile,
+                "n_questions": n_questions,
+                "report_mode": report_mode,
+            }
+            if queue is not None:
+                in_flight.add(executor.submit(process_item_via_queue, queue, item, **options))
+            else:
+                in_flight.add(executor.submit(process_item, item, **options))
+
+        for future in wait(in_flight).done:
+            handle(future)
+
+    return summarize_results(results, time.perf_counter() - started, skipped)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Scoring en lot d'entretiens simulés.")
+    parser.add_argument("source", help="Fichier JSONL ou dossier d'entretiens.")
+    parser.add_argument("-o", "--output", required=True, help="Fichier JSONL de résultats.")
+    parser.add_argument("--workers", type=int, default=4, help="Entretiens traités en parallèle.")
+    parser.add_argument("--n-questions", type=int, default=8)
+    parser.add_argument("--report-mode", choices=REPORT_MODES, default="hybrid")
+    parser.add_argument("--interviewer", default=DEFAULT_INTERVIEWER_PROFILE)
+    parser.add_argument("--summary", help="Chemin optionnel du résumé JSON.")
+    parser.add_argument("--spans", help="Chemin optionnel d'export des spans (JSONL).")
+    parser.add_argument("--metrics", help="Chemin optionnel d'export des métriques (Prometheus).")
+    parser.add_argument(
+        "--queue",
+        default=os.getenv(QUEUE_URL_ENV),
+        help="URL de la file distribuée (sqlite:///... ou redis://...) ; sinon traitement local.",
+    )
+    args = parser.parse_args(argv)
+
+    summary = run_batch(
+        args.source,
+        args.output,
+        max_workers=args.workers,
+        interviewer_profile=args.interviewer,
+        n_questions=args.n_questions,
+        report_mode=args.report_mode,
+        queue=open_queue(args.queue) if args.queue else None,
+    )
+
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+    if args.spans:
+        export_jsonl(args.spans)
+    if args.metrics:
+        with open(args.metrics, "w", encoding="utf-8") as f:
+            f.write(to_prometheus())
+
+
+if __name__ == "__main__":
+    main()
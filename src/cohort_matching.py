@@ -0,0 +1,486 @@
+"""
+Appariement CV ↔ offres en masse : classer 500 CV pour une offre, ou un CV
+face à 200 offres, sans appeler build_profile (3 appels LLM) sur chaque paire.
+
+1. extraction structurée une seule fois par document (extract_cv_info /
+   extract_job_info), mise en cache sur disque par empreinte du texte ;
+2. matrices d'incidence compétences × documents, construites à partir des
+   index (format creux : une liste d'indices par document) ;
+3. score de toutes les paires d'un coup (produits matriciels numpy) ;
+4. résumé d'adéquation LLM (generate_fit_summary) pour les top-k seulement.
+
+Usage :
+    python -m src.cohort_matching --cvs dossier_cvs/ --jobs offre.pdf -k 5 -o classement.json
+    python -m src.cohort_matching --cvs cv.pdf --jobs dossier_offres/ --per cv --limit 20
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.analyze_inputs import _normalize_skills, extract_cv_info, extract_job_info, generate_fit_summary
+from src.instrumentation import record_cache, registry, span
+from src.pdf_loader import load_file
+
+# Cache des extractions (surchargeable par variable d'env)
+DEFAULT_CACHE_PATH = os.getenv(
+    "INTERVIEW_EXTRACTION_CACHE",
+    os.path.join("data", "cache", "extractions.db"),
+)
+
+# Poids du score d'adéquation (sur 100) : couverture des compétences attendues
+WEIGHT_HARD = 0.8
+WEIGHT_SOFT = 0.2
+
+# Lignes de CV traitées par bloc lors du calcul des scores (mémoire bornée)
+SCORE_BLOCK_ROWS = 2048
+
+DEFAULT_WORKERS = 8
+DOCUMENT_EXTENSIONS = (".pdf", ".txt")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS extractions (
+    key        TEXT PRIMARY KEY,
+    kind       TEXT NOT NULL,
+    info       TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def document_key(kind: str, text: str) -> str:
+    """
+    Clé de cache d'une extraction : type de document + empreinte du texte.
+    """
+    return f"{kind}:" + hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """
+    Cache SQLite des extractions structurées (CV et offres), indexé par
+    document_key : un document déjà analysé, dans ce lot ou un précédent,
+    ne coûte plus aucun appel LLM.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH) -> None:
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        found: Dict[str, Dict[str, Any]] = {}
+        with self._connect() as conn:
+            # Requêtes par paquets : limite du nombre de paramètres SQLite
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT key, info FROM extractions WHERE key IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                found.update((key, json.loads(info)) for key, info in rows)
+        return found
+
+    def put(self, key: str, kind: str, info: Dict[str, Any]) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO extractions (key, kind, info, created_at) VALUES (?, ?, ?, ?)",
+                (key, kind, json.dumps(info, ensure_ascii=False), time.time()),
+            )
+
+
+# ---------- Extraction ----------
+
+_EXTRACTORS: Dict[str, Callable[[str], Dict[str, Any]]] = {
+    "cv": extract_cv_info,
+    "job": extract_job_info,
+}
+
+
+def extract_documents(
+    documents: Dict[str, str],
+    kind: str,
+    cache: Optional[ExtractionCache] = None,
+    workers: int = DEFAULT_WORKERS,
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Any]]:
+    """
+    Extraction structurée de chaque document {id: texte} ("cv" ou "job").
+
+    Les textes identiques ne sont extraits qu'une fois et les extractions
+    déjà en cache sont réutilisées ; les autres partent en parallèle.
+
+    Returns:
+        ({id: infos}, statistiques) ; un document dont l'extraction échoue
+        est absent du premier dict et listé dans statistiques["errors"].
+    """
+    extractor = _EXTRACTORS[kind]
+    keys = {doc_id: document_key(kind, text) for doc_id, text in documents.items()}
+    texts = {key: documents[doc_id] for doc_id, key in keys.items()}
+
+    cached = cache.get_many(list(texts)) if cache is not None else {}
+    for key in texts:
+        record_cache(f"extraction_{kind}", hit=key in cached)
+    missing = [key for key in texts if key not in cached]
+
+    infos_by_key = dict(cached)
+    errors: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {key: executor.submit(extractor, texts[key]) for key in missing}
+        for key, future in futures.items():
+            try:
+                infos_by_key[key] = future.result()
+            except Exception as e:
+                errors[key] = f"{type(e).__name__}: {e}"
+                continue
+            if cache is not None:
+                cache.put(key, kind, infos_by_key[key])
+
+    infos = {doc_id: infos_by_key[key] for doc_id, key in keys.items() if key in infos_by_key}
+    stats = {
+        "documents": len(documents),
+        "unique": len(texts),
+        "cache_hits": len(cached),
+        "llm_calls": len(missing),
+        "errors": {doc_id: errors[key] for doc_id, key in keys.items() if key in errors},
+    }
+    return infos, stats
+
+
+# ---------- Matrices d'incidence et scores ----------
+
+def _skill_sets(infos: Dict[str, Dict[str, Any]], ids: List[str], field: str) -> List[set]:
+    return [_normalize_skills(infos[doc_id].get(field, [])) for doc_id in ids]
+
+
+def build_incidence(
+    skill_sets: List[set],
+    vocabulary: Dict[str, int],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Incidence documents × compétences au format creux (CSR) : `indptr` et
+    `indices`, les compétences du document i étant indices[indptr[i]:indptr[i+1]].
+    Les compétences absentes du vocabulaire sont ajoutées.
+    """
+    indptr = np.zeros(len(skill_sets) + 1, dtype=np.int64)
+    indices: List[int] = []
+    for i, skills in enumerate(skill_sets):
+        for skill in skills:
+            indices.append(vocabulary.setdefault(skill, len(vocabulary)))
+        indptr[i + 1] = len(indices)
+    return indptr, np.asarray(indices, dtype=np.int64)
+
+
+def _dense_rows(indptr: np.ndarray, indices: np.ndarray, start: int, end: int, n_cols: int) -> np.ndarray:
+    """
+    Lignes [start, end) de l'incidence creuse, en matrice 0/1 (float32).
+    """
+    block = np.zeros((end - start, n_cols), dtype=np.float32)
+    lo, hi = indptr[start], indptr[end]
+    rows = np.repeat(np.arange(end - start), np.diff(indptr[start:end + 1]))
+    block[rows, indices[lo:hi]] = 1.0
+    return block
+
+
+def _overlap_counts(
+    cv_csr: Tuple[np.ndarray, np.ndarray],
+    job_csr: Tuple[np.ndarray, np.ndarray],
+    n_cols: int,
+) -> np.ndarray:
+    """
+    Nombre de compétences communes pour toutes les paires (CV × offres).
+    Les CV sont traités par blocs de SCORE_BLOCK_ROWS lignes.
+    """
+    n_cvs, n_jobs = len(cv_csr[0]) - 1, len(job_csr[0]) - 1
+    jobs_t = _dense_rows(*job_csr, 0, n_jobs, n_cols).T
+    counts = np.empty((n_cvs, n_jobs), dtype=np.float32)
+    for start in range(0, n_cvs, SCORE_BLOCK_ROWS):
+        end = min(start + SCORE_BLOCK_ROWS, n_cvs)
+        counts[start:end] = _dense_rows(*cv_csr, start, end, n_cols) @ jobs_t
+    return counts
+
+
+def _coverage(counts: np.ndarray, required: np.ndarray) -> np.ndarray:
+    # Part des compétences attendues par chaque offre que le CV possède
+    return np.divide(counts, required, out=np.zeros_like(counts), where=required > 0)
+
+
+def score_matrix(
+    cv_infos: Dict[str, Dict[str, Any]],
+    job_infos: Dict[str, Dict[str, Any]],
+    cv_ids: List[str],
+    job_ids: List[str],
+) -> Dict[str, Any]:
+    """
+    Scores d'adéquation (0-100) de toutes les paires CV × offre.
+
+    score = 100 × (WEIGHT_HARD × couverture hard + WEIGHT_SOFT × couverture soft),
+    la couverture étant la part des compétences attendues par l'offre présentes
+    dans le CV. Une offre sans soft skills attendues est notée sur les hard skills seules.
+
+    Returns:
+        {"scores", "hard_coverage", "soft_coverage"} (matrices n_cvs × n_jobs),
+        "vocabulary_size" et "nnz" (nombre d'entrées non nulles des incidences).
+    """
+    result: Dict[str, Any] = {"nnz": 0}
+    coverage: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+    for kind, cv_field, job_field in (
+        ("hard", "hard_skills", "hard_skills_required"),
+        ("soft", "soft_skills", "soft_skills_required"),
+    ):
+        vocabulary: Dict[str, int] = {}
+        job_csr = build_incidence(_skill_sets(job_infos, job_ids, job_field), vocabulary)
+        cv_csr = build_incidence(_skill_sets(cv_infos, cv_ids, cv_field), vocabulary)
+        counts = _overlap_counts(cv_csr, job_csr, len(vocabulary))
+        required = np.diff(job_csr[0]).astype(np.float32)
+        coverage[kind] = (_coverage(counts, required), required)
+        result["nnz"] += len(job_csr[1]) + len(cv_csr[1])
+        result[f"{kind}_vocabulary_size"] = len(vocabulary)
+
+    hard, _ = coverage["hard"]
+    soft, soft_required = coverage["soft"]
+    # Poids par offre (colonnes) : sans soft skills attendues, tout sur les hard skills
+    w_soft = np.where(soft_required > 0, WEIGHT_SOFT, 0.0).astype(np.float32)
+    w_hard = 1.0 - w_soft
+    result.update(
+        {
+            "scores": 100.0 * (hard * w_hard + soft * w_soft),
+            "hard_coverage": hard,
+            "soft_coverage": soft,
+        }
+    )
+    return result
+
+
+def rank_pairs(scores: np.ndarray, limit: int, per: Optional[str] = None) -> List[List[Tuple[int, int]]]:
+    """
+    Paires (i_cv, j_offre) les mieux notées, par groupe :
+    - per=None : un seul groupe, les `limit` meilleures paires toutes confondues ;
+    - per="job" : pour chaque offre, ses `limit` meilleurs CV ;
+    - per="cv" : pour chaque CV, ses `limit` meilleures offres.
+    """
+    n_cvs, n_jobs = scores.shape
+    if per is None:
+        flat = scores.ravel()
+        k = min(limit, flat.size)
+        top = np.argpartition(-flat, k - 1)[:k] if k else np.zeros(0, dtype=np.int64)
+        top = top[np.argsort(-flat[top], kind="stable")]
+        return [[(int(p // n_jobs), int(p % n_jobs)) for p in top]]
+    if per == "job":
+        order = np.argsort(-scores, axis=0, kind="stable")[:limit]
+        return [[(int(i), j) for i in order[:, j]] for j in range(n_jobs)]
+    if per == "cv":
+        order = np.argsort(-scores, axis=1, kind="stable")[:, :limit]
+        return [[(i, int(j)) for j in order[i]] for i in range(n_cvs)]
+    raise ValueError(f"Regroupement inconnu : {per} (attendu : job, cv)")
+
+
+# ---------- Appariement complet ----------
+
+def _pair_details(cv_info: Dict[str, Any], job_info: Dict[str, Any]) -> Dict[str, List[str]]:
+    cv_hard = _normalize_skills(cv_info.get("hard_skills", []))
+    job_hard = _normalize_skills(job_info.get("hard_skills_required", []))
+    cv_soft = _normalize_skills(cv_info.get("soft_skills", []))
+    job_soft = _normalize_skills(job_info.get("soft_skills_required", []))
+    return {
+        "overlap_hard_skills": sorted(cv_hard & job_hard),
+        "missing_hard_skills": sorted(job_hard - cv_hard),
+        "overlap_soft_skills": sorted(cv_soft & job_soft),
+        "missing_soft_skills": sorted(job_soft - cv_soft),
+    }
+
+
+def match_cohort(
+    cvs: Dict[str, str],
+    jobs: Dict[str, str],
+    top_k: int = 5,
+    limit: int = 50,
+    per: Optional[str] = None,
+    workers: int = DEFAULT_WORKERS,
+    cache: Optional[ExtractionCache] = None,
+) -> Dict[str, Any]:
+    """
+    Classe toutes les paires CV × offre ({id: texte} de chaque côté).
+
+    Args:
+        top_k: nombre de paires (par groupe) qui reçoivent un résumé d'adéquation LLM.
+        limit: nombre de paires (par groupe) renvoyées.
+        per: regroupement du classement (None, "job" ou "cv", voir rank_pairs).
+        cache: cache des extractions ; None pour tout réextraire.
+
+    Returns:
+        {"groups": [[paire, ...], ...], "stats": {...}, "timings": {...}} ;
+        chaque paire contient ids, score, couvertures, compétences communes et
+        manquantes, et "fit_summary" pour les top-k.
+    """
+    if per not in (None, "job", "cv"):
+        raise ValueError(f"Regroupement inconnu : {per} (attendu : job, cv)")
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    with span("cohort_matching", cvs=len(cvs), jobs=len(jobs)) as s:
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            # Les deux côtés partagent le même nombre de workers LLM
+            cv_future = executor.submit(extract_documents, cvs, "cv", cache, max(1, workers // 2))
+            job_future = executor.submit(extract_documents, jobs, "job", cache, max(1, workers - workers // 2))
+            cv_infos, cv_stats = cv_future.result()
+            job_infos, job_stats = job_future.result()
+        timings["extract"] = time.perf_counter() - t0
+
+        cv_ids = [doc_id for doc_id in cvs if doc_id in cv_infos]
+        job_ids = [doc_id for doc_id in jobs if doc_id in job_infos]
+
+        t0 = time.perf_counter()
+        matrix = score_matrix(cv_infos, job_infos, cv_ids, job_ids)
+        timings["score"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        groups_idx = rank_pairs(matrix["scores"], limit, per) if cv_ids and job_ids else []
+        groups: List[List[Dict[str, Any]]] = []
+        for pairs in groups_idx:
+            rows = []
+            for rank, (i, j) in enumerate(pairs, start=1):
+                row = {
+                    "rank": rank,
+                    "cv_id": cv_ids[i],
+                    "job_id": job_ids[j],
+                    "score": round(float(matrix["scores"][i, j]), 2),
+                    "hard_coverage": round(float(matrix["hard_coverage"][i, j]), 3),
+                    "soft_coverage": round(float(matrix["soft_coverage"][i, j]), 3),
+                }
+                row.update(_pair_details(cv_infos[cv_ids[i]], job_infos[job_ids[j]]))
+                rows.append(row)
+            groups.append(rows)
+        timings["rank"] = time.perf_counter() - t0
+
+        # Résumés LLM pour les top-k seulement, en parallèle
+        t0 = time.perf_counter()
+        summary_rows = [row for rows in groups for row in rows[:top_k]]
+        summary_errors = 0
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = [
+                executor.submit(
+                    generate_fit_summary,
+                    cv_infos[row["cv_id"]],
+                    job_infos[row["job_id"]],
+                    row["overlap_hard_skills"],
+                    row["missing_hard_skills"],
+                    row["overlap_soft_skills"],
+                    row["missing_soft_skills"],
+                )
+                for row in summary_rows
+            ]
+            for row, future in zip(summary_rows, futures):
+                try:
+                    row["fit_summary"] = future.result()
+                except Exception as e:
+                    row["fit_summary_error"] = f"{type(e).__name__}: {e}"
+                    summary_errors += 1
+        timings["summaries"] = time.perf_counter() - t0
+        timings["total"] = time.perf_counter() - started
+
+        n_pairs = len(cv_ids) * len(job_ids)
+        stats = {
+            "cvs": cv_stats,
+            "jobs": job_stats,
+            "pairs": n_pairs,
+            "hard_vocabulary_size": matrix["hard_vocabulary_size"],
+            "soft_vocabulary_size": matrix["soft_vocabulary_size"],
+            "nnz": matrix["nnz"],
+            "pairs_per_s": n_pairs / timings["score"] if timings["score"] > 0 else 0.0,
+            "fit_summaries": len(summary_rows),
+            "fit_summary_errors": summary_errors,
+        }
+        s.update({"pairs": n_pairs, "llm_calls": cv_stats["llm_calls"] + job_stats["llm_calls"] + len(summary_rows)})
+
+    registry.observe("cohort_pairs_scored", n_pairs)
+    registry.observe("cohort_score_seconds", timings["score"])
+    return {"groups": groups, "stats": stats, "timings": timings}
+
+
+# ---------- Ligne de commande ----------
+
+def load_documents(paths: List[str]) -> Dict[str, str]:
+    """
+    {id: texte} à partir de fichiers .pdf/.txt ou de dossiers qui en contiennent ;
+    l'id est le nom du fichier sans extension.
+    """
+    files: List[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name)
+                for name in sorted(os.listdir(path))
+                if name.lower().endswith(DOCUMENT_EXTENSIONS)
+            )
+        else:
+            files.append(path)
+    documents: Dict[str, str] = {}
+    for path in files:
+        doc_id = os.path.splitext(os.path.basename(path))[0]
+        if doc_id in documents:
+            doc_id = path
+        documents[doc_id] = load_file(path)
+    return documents
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Classement en masse de CV et d'offres.")
+    parser.add_argument("--cvs", nargs="+", required=True, help="Fichiers ou dossiers de CV (.pdf/.txt).")
+    parser.add_argument("--jobs", nargs="+", required=True, help="Fichiers ou dossiers d'offres (.pdf/.txt).")
+    parser.add_argument("-k", "--top-k", type=int, default=5, help="Paires résumées par le LLM (par groupe).")
+    parser.add_argument("--limit", type=int, default=50, help="Paires renvoyées (par groupe).")
+    parser.add_argument("--per", choices=("job", "cv"), help="Classement par offre ou par CV.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Appels LLM en parallèle.")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="Base SQLite du cache d'extraction.")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("-o", "--output", help="Fichier JSON du classement (sinon sortie standard).")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    cvs = load_documents(args.cvs)
+    jobs = load_documents(args.jobs)
+    load_s = time.perf_counter() - t0
+
+    result = match_cohort(
+        cvs,
+        jobs,
+        top_k=args.top_k,
+        limit=args.limit,
+        per=args.per,
+        workers=args.workers,
+        cache=None if args.no_cache else ExtractionCache(args.cache),
+    )
+    result["timings"]["load"] = load_s
+
+    timings = result["timings"]
+    print(
+        f"{len(cvs)} CV × {len(jobs)} offres = {result['stats']['pairs']} paires : "
+        + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items()),
+        file=sys.stderr,
+    )
+    payload = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import time
+from typing import Any, Dict, List
+
+from src.instrumentation import registry, span
+from src.llm_client import chat, generate_text
+from src.plan_interview import profile_context
+from src.token_budget import estimate_messages_tokens, estimate_tokens, trim_to_tokens
+
+# Nombre d'échanges (question + réponse) envoyés tels quels au modèle ;
+# les plus anciens sont résumés dans les notes de l'intervieweur.
+RECENT_EXCHANGES = 3
+# Nombre d'échanges résumés d'un coup quand la fenêtre déborde
+FOLD_EXCHANGES = 2
+
+# Plafonds (en tokens estimés) qui bornent la taille du prompt à chaque tour
+MAX_NOTES_TOKENS = 300
+MAX_MESSAGE_TOKENS = 400
+
+DEFAULT_MAX_TURNS = 8
+
+CONVERSATION_SYSTEM = """Tu es un recruteur qui mène un entretien d'embauche oral, sous forme de conversation.
+- Pose UNE seule question à la fois, en une ou deux phrases.
+- Rebondis sur la dernière réponse du candidat : demande un exemple, un chiffre,
+  une précision technique quand la réponse reste vague ; change de thème quand
+  le sujet est traité.
+- Couvre au fil de l'entretien : présentation, motivation, compétences techniques
+  (en priorité celles attendues par l'offre), projets, soft skills.
+- Ne donne pas de feedback sur les réponses pendant l'entretien.
+- Réponds uniquement par ta prochaine intervention, en français, sans préfixe.
+
+Profil de l'intervieweur :
+{interviewer_profile}
+
+{profile_context}"""
+
+NOTES_SYSTEM = """Tu tiens les notes d'un recruteur pendant un entretien d'embauche.
+Mets à jour les notes avec les nouveaux échanges : thèmes déjà abordés, faits
+marquants (expériences, chiffres, outils), points forts, points faibles et pistes
+à approfondir. 8 lignes maximum, style télégraphique, en français."""
+
+OPENING_MESSAGE = "Bonjour, je suis prêt(e) pour l'entretien."
+CLOSING_INSTRUCTION = (
+    "C'est la fin de l'entretien : remercie le candidat et conclus en une ou deux "
+    "phrases, sans poser de nouvelle question."
+)
+
+
+def new_conversation(
+    profile: Dict[str, Any],
+    interviewer_profile: str,
+    max_turns: int = DEFAULT_MAX_TURNS,
+) -> Dict[str, Any]:
+    """
+    État d'un entretien conversationnel (sérialisable en JSON, sauvegardé avec la session) :
+    - "system" : consignes et profil, identiques à chaque tour ;
+    - "notes" : résumé compact des échanges sortis de la fenêtre ;
+    - "recent" : derniers échanges envoyés tels quels ;
+    - "transcript" : conversation complète, pour l'affichage uniquement.
+    """
+    return {
+        "system": CONVERSATION_SYSTEM.format(
+            interviewer_profile=interviewer_profile,
+            profile_context=profile_context(profile).strip(),
+        ),
+        "notes": "",
+        "recent": [],
+        "transcript": [],
+        "turns": 0,
+        "max_turns": max_turns,
+        "done": False,
+    }
+
+
+def _build_messages(state: Dict[str, Any], closing: bool) -> List[Dict[str, str]]:
+    """
+    Prompt d'un tour : système fixe, notes, fenêtre récente. Sa taille est bornée
+    quelle que soit la durée de l'entretien.
+    """
+    opening = OPENING_MESSAGE
+    if state["notes"]:
+        opening = f"Notes sur les échanges précédents :\n{state['notes']}\n\n{OPENING_MESSAGE}"
+    messages = [{"role": "system", "content": state["system"]}, {"role": "user", "content": opening}]
+    messages.extend(state["recent"])
+    if closing:
+        messages.append({"role": "system", "content": CLOSING_INSTRUCTION})
+    return messages
+
+
+def _local_notes(notes: str, exchanges: List[Dict[str, str]]) -> str:
+    """
+    Repli sans LLM : une ligne par échange, en ne gardant que les plus récentes.
+    """
+    lines = notes.splitlines() if notes else []
+    for question, answer in zip(exchanges[::2], exchanges[1::2]):
+        lines.append(
+            f"- Q : {trim_to_tokens(question['content'], 40)} / R : {trim_to_tokens(answer['content'], 60)}"
+        )
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > MAX_NOTES_TOKENS:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def _fold_old_exchanges(state: Dict[str, Any]) -> None:
+    """
+    Quand la fenêtre dépasse RECENT_EXCHANGES échanges, résume les plus anciens
+    dans les notes (modèle rapide), puis les retire de la fenêtre.
+    """
+    recent = state["recent"]
+    # La fenêtre commence par une question de l'intervieweur : 2 messages par échange
+    if len(recent) <= 2 * RECENT_EXCHANGES + 1:
+        return
+
+    folded, state["recent"] = recent[: 2 * FOLD_EXCHANGES], recent[2 * FOLD_EXCHANGES:]
+    lines = "\n".join(
+        f"{'Recruteur' if m['role'] == 'assistant' else 'Candidat'} : {m['content']}" for m in folded
+    )
+    prompt = f"""Notes actuelles :
+{state["notes"] or "(aucune)"}
+
+Nouveaux échanges :
+{lines}
+"""
+    with span("conversation_fold", exchanges=FOLD_EXCHANGES):
+        try:
+            notes = generate_text(prompt, system=NOTES_SYSTEM, call_site="conversation_notes")
+            state["notes"] = trim_to_tokens(notes.strip(), MAX_NOTES_TOKENS)
+            registry.inc("conversation_folds_total", method="llm")
+        except Exception:
+            state["notes"] = _local_notes(state["notes"], folded)
+            registry.inc("conversation_folds_total", method="local")
+
+
+def _interviewer_reply(state: Dict[str, Any]) -> str:
+    closing = state["turns"] + 1 >= state["max_turns"]
+
+    with span("conversation_turn", turn=state["turns"]) as s:
+        t0 = time.perf_counter()
+        _fold_old_exchanges(state)
+        messages = _build_messages(state, closing)
+        prompt_tokens = estimate_messages_tokens(messages)
+        s["prompt_tokens_est"] = prompt_tokens
+
+        reply = chat(messages, temperature=0.5, call_site="conversation").strip()
+
+        registry.observe("conversation_prompt_tokens", prompt_tokens)
+        registry.observe("conversation_turn_seconds", time.perf_counter() - t0)
+
+    message = {"role": "assistant", "content": reply}
+    state["recent"].append(dict(message, content=trim_to_tokens(reply, MAX_MESSAGE_TOKENS)))
+    state["transcript"].append(message)
+    state["turns"] += 1
+    state["done"] = closing
+    return reply
+
+
+def start_conversation(state: Dict[str, Any]) -> str:
+    """
+    Première intervention du recruteur (accueil et première question).
+    """
+    return _interviewer_reply(state)
+
+
+def interviewer_turn(state: Dict[str, Any], answer: str) -> str:
+    """
+    Ajoute la réponse du candidat et renvoie l'intervention suivante du recruteur
+    (relance ou nouvelle question ; conclusion au dernier tour).
+
+    Seuls le système, les notes et les RECENT_EXCHANGES derniers échanges sont
+    envoyés : la taille du prompt reste constante au fil de l'entretien.
+
+    Raises:
+        RuntimeError: si l'entretien est déjà terminé.
+    """
+    if state["done"]:
+        raise RuntimeError("L'entretien conversationnel est terminé.")
+
+    message = {"role": "user", "content": answer.strip()}
+    state["recent"].append(dict(message, content=trim_to_tokens(message["content"], MAX_MESSAGE_TOKENS)))
+    state["transcript"].append(message)
+    try:
+        return _interviewer_reply(state)
+    except Exception:
+        # La réponse pourra être renvoyée telle quelle
+        state["recent"].pop()
+        state["transcript"].pop()
+        raise
+
+
+def last_question(state: Dict[str, Any]) -> str:
+    """
+    Dernière intervention du recruteur (la question à laquelle le candidat répond).
+    """
+    for message in reversed(state["transcript"]):
+        if message["role"] == "assistant":
+            return message["content"]
+    return ""
@@ -0,0 +1,300 @@
+"""
+Mémo des évaluations : une réponse déjà évaluée pour la même question et le
+même contexte d'offre n'est pas renvoyée au LLM (réponse soumise à nouveau
+après un rafraîchissement, réponses toutes faites aux questions d'intro ou
+de conclusion, d'une session à l'autre).
+
+- correspondance exacte : clé = empreinte du prompt hors réponse (consignes,
+  grille du type de question, contexte d'offre, question normalisée) +
+  réponse normalisée (minuscules, sans accents ni ponctuation) ;
+- quasi-doublons (optionnel) : signature MinHash (32 minima) des 3-grammes
+  de mots de la réponse, découpée en 8 bandes de 4 minima indexées (LSH) ;
+  les réponses qui partagent une bande sont des candidats, confirmés par la
+  similarité de Jaccard exacte de leurs 3-grammes au-dessus du seuil.
+
+  Probabilité qu'une réponse stockée soit candidate, selon sa similarité
+  de Jaccard s avec la réponse cherchée : 1 - (1 - s^4)^8, soit 99 % pour
+  s = 0.8, 40 % pour s = 0.5 et 6 % pour s = 0.3.
+
+Les taux de réussite sont suivis par le registre d'instrumentation
+(evaluation_memo_total{result=exact|near|miss}, cache_requests_total).
+
+Configuration :
+- INTERVIEW_EVALUATION_MEMO : chemin de la base SQLite
+  (data/cache/evaluations.db par défaut ; "off" pour désactiver le mémo) ;
+- INTERVIEW_EVALUATION_NEAR_DUP : seuil de similarité (ex : 0.9) au-delà
+  duquel une évaluation est réutilisée pour une réponse quasi identique
+  (quasi-doublons désactivés si absent).
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import struct
+import threading
+import time
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from src.instrumentation import record_cache, registry
+from src.text_normalize import strip_accents
+
+logger = logging.getLogger(__name__)
+
+MEMO_PATH_ENV = "INTERVIEW_EVALUATION_MEMO"
+NEAR_DUPLICATE_ENV = "INTERVIEW_EVALUATION_NEAR_DUP"
+DEFAULT_MEMO_PATH = os.path.join("data", "cache", "evaluations.db")
+
+# Taille des n-grammes de mots comparés entre deux réponses
+SHINGLE_SIZE = 3
+
+# Signature MinHash : MINHASH_BANDS bandes de MINHASH_ROWS minima
+MINHASH_BANDS = 8
+MINHASH_ROWS = 4
+# Une fonction de hachage par minimum : tranches de 4 octets de la sortie SHAKE-128 du n-gramme
+_SIGNATURE = struct.Struct(f"<{MINHASH_BANDS * MINHASH_ROWS}I")
+
+# Candidats quasi-doublons comparés au plus par recherche
+MAX_CANDIDATES = 50
+
+_TOKEN_RE = re.compile(r"\w+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS evaluations (
+    id         INTEGER PRIMARY KEY,
+    key        TEXT NOT NULL UNIQUE,
+    answer     TEXT NOT NULL,
+    evaluation TEXT NOT NULL,
+    hits       INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+
+-- Bandes LSH : empreinte (périmètre, numéro de bande, minima) -> évaluation
+CREATE TABLE IF NOT EXISTS evaluation_bands (
+    band  INTEGER NOT NULL,
+    entry INTEGER NOT NULL,
+    PRIMARY KEY (band, entry)
+) WITHOUT ROWID;
+"""
+
+
+def normalize_text(text: str) -> str:
+    """
+    Minuscules, sans accents, ponctuation ni espaces superflus.
+    """
+    text = strip_accents(text)
+    return " ".join(_TOKEN_RE.findall(text.lower()))
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.blake2b("\x1f".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _hash64(text: str) -> int:
+    # Entier signé : les entiers SQLite sont signés sur 64 bits
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little", signed=True)
+
+
+def memo_scope(prepared: Dict[str, Any]) -> str:
+    """
+    Empreinte de tout ce qui, dans le prompt d'évaluation, ne dépend pas de la
+    réponse : consignes, grille du type de question, contexte de l'offre et
+    question (normalisée). Un changement de prompt invalide donc le mémo.
+    """
+    return _digest(
+        prepared.get("system") or "",
+        prepared.get("rubric") or "",
+        prepared.get("job_context") or "",
+        normalize_text(prepared.get("question") or ""),
+    )
+
+
+def shingles(normalized: str) -> FrozenSet[str]:
+    """
+    N-grammes de SHINGLE_SIZE mots consécutifs (la réponse entière si elle est plus courte).
+    """
+    words = normalized.split()
+    if len(words) <= SHINGLE_SIZE:
+        return frozenset([" ".join(words)]) if words else frozenset()
+    return frozenset(" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1))
+
+
+def minhash(features: FrozenSet[str]) -> List[int]:
+    """
+    Signature MinHash : pour chaque fonction de hachage, le plus petit hash des n-grammes.
+    """
+    rows = [_SIGNATURE.unpack(hashlib.shake_128(f.encode("utf-8")).digest(_SIGNATURE.size)) for f in features]
+    return [min(column) for column in zip(*rows)]
+
+
+def lsh_bands(scope: str, signature: List[int]) -> List[int]:
+    """
+    Une empreinte par bande de MINHASH_ROWS minima, propre au périmètre (question + offre).
+    """
+    return [
+        _hash64(f"{scope}:{band}:" + ",".join(map(str, signature[band * MINHASH_ROWS:(band + 1) * MINHASH_ROWS])))
+        for band in range(MINHASH_BANDS)
+    ]
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class EvaluationMemo:
+    """
+    Mémo SQLite des évaluations, partagé par les sessions (et par les
+    workers de la file s'ils pointent vers le même fichier).
+
+    Une erreur SQLite n'interrompt jamais une évaluation : la recherche
+    renvoie None et l'enregistrement est ignoré.
+    """
+
+    def __init__(self, path: str = DEFAULT_MEMO_PATH, near_threshold: Optional[float] = None) -> None:
+        if near_threshold is not None and not 0 < near_threshold <= 1:
+            raise ValueError(f"Seuil de similarité invalide : {near_threshold} (attendu entre 0 et 1)")
+        self.path = path
+        self.near_threshold = near_threshold
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def lookup(self, prepared: Dict[str, Any], answer: str) -> Optional[Dict[str, Any]]:
+        """
+        Évaluation mémorisée pour cette réponse (identique, ou quasi identique
+        si le seuil est configuré), ou None.
+        """
+        scope = memo_scope(prepared)
+        normalized = normalize_text(answer)
+        try:
+            found = self._lookup_exact(scope, normalized)
+            result = "exact"
+            if found is None and self.near_threshold is not None:
+                found = self._lookup_near(scope, normalized)
+                result = "near"
+        except sqlite3.Error:
+            registry.inc("evaluation_memo_errors_total", operation="lookup")
+            found = None
+
+        if found is None:
+            result = "miss"
+        registry.inc("evaluation_memo_total", result=result)
+        record_cache("evaluation_memo", hit=found is not None)
+        return found
+
+    def _lookup_exact(self, scope: str, normalized: str) -> Optional[Dict[str, Any]]:
+        key = _digest(scope, normalized)
+        with self._connect() as conn:
+            row = conn.execute("SELECT evaluation FROM evaluations WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE evaluations SET hits = hits + 1 WHERE key = ?", (key,))
+        return json.loads(row[0])
+
+    def _lookup_near(self, scope: str, normalized: str) -> Optional[Dict[str, Any]]:
+        features = shingles(normalized)
+        if not features:
+            return None
+        bands = lsh_bands(scope, minhash(features))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT id, answer, evaluation FROM evaluations
+                WHERE id IN (
+                    SELECT entry FROM evaluation_bands WHERE band IN ({', '.join('?' * len(bands))})
+                )
+                LIMIT ?
+                """,
+                (*bands, MAX_CANDIDATES),
+            ).fetchall()
+
+            # Candidats LSH confirmés par la similarité exacte
+            best: Optional[Tuple[float, int, str]] = None
+            for entry, stored, evaluation in rows:
+                similarity = jaccard(features, shingles(stored))
+                if similarity >= self.near_threshold and (best is None or similarity > best[0]):
+                    best = (similarity, entry, evaluation)
+            if best is None:
+                return None
+            conn.execute("UPDATE evaluations SET hits = hits + 1 WHERE id = ?", (best[1],))
+
+        registry.observe("evaluation_memo_similarity", best[0])
+        return json.loads(best[2])
+
+    def store(self, prepared: Dict[str, Any], answer: str, evaluation: Dict[str, Any]) -> None:
+        scope = memo_scope(prepared)
+        normalized = normalize_text(answer)
+        features = shingles(normalized)
+        bands = lsh_bands(scope, minhash(features)) if features else []
+        try:
+            with self._connect() as conn:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO evaluations (key, answer, evaluation, created_at) VALUES (?, ?, ?, ?)",
+                    (_digest(scope, normalized), normalized, json.dumps(evaluation, ensure_ascii=False), time.time()),
+                )
+                # Déjà mémorisée (évaluation concurrente de la même réponse) : rien à indexer
+                if cursor.rowcount:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO evaluation_bands (band, entry) VALUES (?, ?)",
+                        [(band, cursor.lastrowid) for band in bands],
+                    )
+        except sqlite3.Error:
+            registry.inc("evaluation_memo_errors_total", operation="store")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Taille du mémo, réutilisations enregistrées et taux de réussite du processus.
+        """
+        with self._connect() as conn:
+            entries, hits = conn.execute("SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM evaluations").fetchone()
+        counts = {
+            result: int(registry.counter_value("evaluation_memo_total", result=result))
+            for result in ("exact", "near", "miss")
+        }
+        lookups = sum(counts.values())
+        return {
+            "entries": entries,
+            "stored_hits": hits,
+            "near_threshold": self.near_threshold,
+            "lookups": lookups,
+            **counts,
+            "hit_rate": (counts["exact"] + counts["near"]) / lookups if lookups else 0.0,
+        }
+
+
+_memo: Optional[EvaluationMemo] = None
+_memo_loaded = False
+_memo_lock = threading.Lock()
+
+
+def memo_from_env() -> Optional[EvaluationMemo]:
+    """
+    Mémo du processus configuré par INTERVIEW_EVALUATION_MEMO et
+    INTERVIEW_EVALUATION_NEAR_DUP, ouvert au premier appel ; None si désactivé.
+    """
+    global _memo, _memo_loaded
+    with _memo_lock:
+        if not _memo_loaded:
+            path = os.getenv(MEMO_PATH_ENV, DEFAULT_MEMO_PATH)
+            threshold = os.getenv(NEAR_DUPLICATE_ENV)
+            if path and path != "off":
+                # Base inaccessible ou seuil invalide : évaluations sans mémo plutôt qu'en échec
+                try:
+                    _memo = EvaluationMemo(path, near_threshold=float(threshold) if threshold else None)
+                except (sqlite3.Error, OSError, ValueError) as e:
+                    logger.warning("Mémo des évaluations désactivé (%s) : %s", path, e)
+                    registry.inc("evaluation_memo_errors_total", operation="open")
+                    _memo = None
+            _memo_loaded = True
+        return _memo
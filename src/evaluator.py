@@ -1,87 +1,187 @@
+import re
 from typing import Any, Dict, List, Optional
 
+from src.evaluation_memo import memo_from_env
+from src.instrumentation import traced
 from src.llm_client import generate_json
 
+# Critères spécifiques ajoutés à la grille selon le type de question du plan
+QUESTION_RUBRICS: Dict[str, str] = {
+    "intro": (
+        "Question de présentation : attends un parcours synthétique, structuré, "
+        "relié au poste, sans réciter le CV."
+    ),
+    "motivation": (
+        "Question de motivation : attends des raisons précises liées au poste et à "
+        "l'entreprise, pas des généralités."
+    ),
+    "technique": (
+        "Question technique : vérifie l'exactitude des notions, la maîtrise réelle des "
+        "outils cités et la présence d'exemples concrets ou chiffrés."
+    ),
+    "projet": (
+        "Question projet : attends le contexte, le rôle personnel du candidat, les choix "
+        "techniques, les difficultés et les résultats mesurables."
+    ),
+    "soft_skill": (
+        "Question comportementale : attends une situation réelle racontée avec la "
+        "méthode STAR (situation, tâche, action, résultat)."
+    ),
+    "conclusion": (
+        "Question de conclusion : valorise des questions pertinentes sur le poste, "
+        "l'équipe ou l'entreprise, et une synthèse de la motivation."
+    ),
+}
 
-def evaluate_answer(
-    question: str,
-    answer: str,
+DEFAULT_RUBRIC = "Évalue la qualité générale, la structure et la précision de la réponse."
+
+_SCORE = {"type": ["integer", "number", "string"]}
+_LEADING_NUMBER_RE = re.compile(r"\s*-?\d+(?:[.,]\d+)?")
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+
+# Schéma de validation de la sortie JSON d'évaluation
+EVALUATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "score": _SCORE,
+        "clarity": _SCORE,
+        "relevance": _SCORE,
+        "alignment": _SCORE,
+        "depth": _SCORE,
+        "strengths": _STRING_LIST,
+        "weaknesses": _STRING_LIST,
+        "improvements": _STRING_LIST,
+    },
+    "required": ["score", "clarity", "relevance", "alignment", "depth"],
+}
+
+
+# Partie fixe du prompt d'évaluation (identique pour toutes les questions)
+EVALUATION_SYSTEM = """Tu es un recruteur expérimenté qui évalue une réponse à une question d'entretien.
+
+Évalue la réponse du candidat selon les critères suivants :
+- score : note globale sur 10 (entier)
+- clarity : clarté de la réponse (1 à 5)
+- relevance : pertinence par rapport à la question (1 à 5)
+- alignment : adéquation avec le poste / l'offre (1 à 5)
+- depth : profondeur de la réponse (1 à 5) : exemples concrets, détails techniques, etc.
+- strengths : liste de 2 à 4 points forts (chaque élément = une phrase courte)
+- weaknesses : liste de 2 à 4 points faibles ou manques (chaque élément = une phrase courte)
+- improvements : liste de 2 à 5 conseils concrets pour améliorer la réponse
+  (par ex : "donner un exemple chiffré", "structurer la réponse avec contexte/action/résultat", etc.)
+
+Tiens compte de la consigne propre au type de question. Réponds uniquement en JSON valide, sans texte autour."""
+
+
+def condense_job_context(
+    profile: Optional[Dict[str, Any]] = None,
     job_text: Optional[str] = None,
-) -> Dict[str, Any]:
+    max_chars: Optional[int] = None,
+) -> str:
     """
-    Évalue la réponse d'un candidat à une question d'entretien.
+    Construit un contexte d'offre condensé pour l'évaluation.
 
-    Utilise le LLM pour produire une évaluation structurée, par exemple :
+    Si le profil (build_profile) est disponible, on utilise ses champs structurés
+    (titre, résumé, compétences, missions, écarts du candidat), beaucoup plus
+    courts que le texte brut de l'offre. Sinon on retombe sur le texte de l'offre.
+    Si `max_chars` est fourni, le contexte est tronqué à cette longueur.
+    """
+    job_info = (profile or {}).get("job") or {}
 
-    {
-      "score": 7,
-      "clarity": 4,
-      "relevance": 3,
-      "alignment": 4,
-      "depth": 3,
-      "strengths": [...],
-      "weaknesses": [...],
-      "improvements": [...]
-    }
+    if job_info:
+        lines = []
+        title = job_info.get("title") or ""
+        company = job_info.get("company") or ""
+        if title or company:
+            lines.append(f"Poste : {title}" + (f" — {company}" if company else ""))
+        if job_info.get("summary"):
+            lines.append(f"Résumé : {job_info['summary']}")
+        if job_info.get("hard_skills_required"):
+            lines.append("Compétences techniques attendues : " + ", ".join(job_info["hard_skills_required"]))
+        if job_info.get("soft_skills_required"):
+            lines.append("Compétences comportementales attendues : " + ", ".join(job_info["soft_skills_required"]))
+        missions = job_info.get("missions") or []
+        if missions:
+            lines.append("Missions principales :")
+            lines.extend(f"- {m}" for m in missions)
+        if profile.get("missing_hard_skills"):
+            lines.append(
+                "Compétences attendues absentes du CV : " + ", ".join(profile["missing_hard_skills"])
+            )
+        context = "\n".join(lines)
+    else:
+        context = (job_text or "").strip()
 
-    Args:
-        question: La question posée par l'intervieweur.
-        answer: La réponse donnée par le candidat.
-        job_text: (optionnel) Description du poste / offre, pour évaluer l'alignement.
+    if not context:
+        return "Non spécifiée (concentre-toi sur la qualité générale de la réponse)."
+    if max_chars is not None and len(context) > max_chars:
+        context = context[:max_chars].rsplit(" ", 1)[0] + " [...]"
+    return context
 
-    Returns:
-        Un dictionnaire contenant les scores et commentaires.
-    """
 
-    job_context = job_text or "Non spécifiée (concentre-toi sur la qualité générale de la réponse)."
+def prepare_evaluation(
+    question: str,
+    question_type: Optional[str] = None,
+    profile: Optional[Dict[str, Any]] = None,
+    job_text: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Prépare tout ce qui ne dépend pas de la réponse du candidat : contexte de
+    l'offre condensé, grille propre au type de question et début du prompt.
 
-    prompt = f"""
-    Tu es un recruteur expérimenté qui évalue une réponse à une question d'entretien.
+    Les consignes fixes (rôle, critères, format) sont dans le prompt système
+    EVALUATION_SYSTEM, commun à tous les appels : avec le contexte de l'offre
+    placé juste après, les évaluations d'un même entretien partagent le même
+    préfixe, réutilisable par le cache de prompt du fournisseur.
 
-    Contexte du poste (offre) :
-    \"\"\"{job_context}\"\"\"
+    Appelée dès que la question est affichée (pendant que le candidat répond) ;
+    evaluate_prepared() n'a ensuite plus qu'à ajouter la réponse.
+    """
+    job_context = condense_job_context(profile=profile, job_text=job_text)
+    rubric = QUESTION_RUBRICS.get(question_type or "", DEFAULT_RUBRIC)
 
-    Question posée au candidat :
-    \"\"\"{question}\"\"\"
+    # Ordre du prompt : contexte de session (identique pour toutes les questions
+    # d'un entretien), puis consigne du type de question, puis question et réponse.
+    prompt_prefix = f"""Contexte du poste (offre) :
+\"\"\"{job_context}\"\"\"
 
-    Réponse du candidat :
-    \"\"\"{answer}\"\"\"
+Consigne propre à ce type de question :
+{rubric}
 
-    Ta tâche :
-    Évaluer cette réponse selon les critères suivants :
+Question posée au candidat :
+\"\"\"{question}\"\"\"
+"""
 
-    - score : note globale sur 10 (entier)
-    - clarity : clarté de la réponse (1 à 5)
-    - relevance : pertinence par rapport à la question (1 à 5)
-    - alignment : adéquation avec le poste / l'offre (1 à 5)
-    - depth : profondeur de la réponse (1 à 5) : exemples concrets, détails techniques, etc.
-    - strengths : liste de 2 à 4 points forts (chaque élément = une phrase courte)
-    - weaknesses : liste de 2 à 4 points faibles ou manques (chaque élément = une phrase courte)
-    - improvements : liste de 2 à 5 conseils concrets pour améliorer la réponse
-      (par ex : "donner un exemple chiffré", "structurer la réponse avec contexte/action/résultat", etc.)
+    return {
+        "question": question,
+        "type": question_type or "",
+        "job_context": job_context,
+        "rubric": rubric,
+        "system": EVALUATION_SYSTEM,
+        "prompt_prefix": prompt_prefix,
+    }
 
-    Réponds STRICTEMENT avec un JSON du type :
 
-    {{
-      "score": 0-10 (entier),
-      "clarity": 1-5,
-      "relevance": 1-5,
-      "alignment": 1-5,
-      "depth": 1-5,
-      "strengths": [...],
-      "weaknesses": [...],
-      "improvements": [...]
-    }}
+def _to_int(value: Any) -> int:
     """
+    Note entière ; le schéma accepte les chaînes ("7", "7/10", "4.5") : on
+    garde le nombre en tête, 0 si aucun.
+    """
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = _LEADING_NUMBER_RE.match(str(value or ""))
+    return int(float(match.group(0).replace(",", "."))) if match else 0
 
-    data = generate_json(prompt)
 
-    # Sécurisation minimale des champs attendus
-    score = int(data.get("score", 0))
-    clarity = int(data.get("clarity", 0))
-    relevance = int(data.get("relevance", 0))
-    alignment = int(data.get("alignment", 0))
-    depth = int(data.get("depth", 0))
+def _normalize_evaluation(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Sécurisation minimale des champs attendus dans la sortie du LLM.
+    """
+    score = _to_int(data.get("score", 0))
+    clarity = _to_int(data.get("clarity", 0))
+    relevance = _to_int(data.get("relevance", 0))
+    alignment = _to_int(data.get("alignment", 0))
+    depth = _to_int(data.get("depth", 0))
 
     strengths = data.get("strengths", [])
     weaknesses = data.get("weaknesses", [])
@@ -95,7 +195,7 @@ def evaluate_answer(
     if not isinstance(improvements, list):
         improvements = [str(improvements)]
 
-    result: Dict[str, Any] = {
+    return {
         "score": score,
         "clarity": clarity,
         "relevance": relevance,
@@ -106,4 +206,77 @@ def evaluate_answer(
         "improvements": [str(i).strip() for i in improvements if i],
     }
 
-    return result
+
+@traced("evaluate")
+def evaluate_prepared(prepared: Dict[str, Any], answer: str) -> Dict[str, Any]:
+    """
+    Évalue une réponse à partir d'un contexte préparé par prepare_evaluation().
+    Seule la réponse est ajoutée à la fin du prompt déjà construit.
+
+    Une réponse déjà évaluée pour la même question et la même offre (ou
+    quasi identique, si configuré) reprend l'évaluation mémorisée sans appel
+    LLM (src/evaluation_memo.py).
+    """
+    memo = memo_from_env()
+    if memo is not None:
+        memorized = memo.lookup(prepared, answer)
+        if memorized is not None:
+            return memorized
+
+    prompt = prepared["prompt_prefix"] + f'\nRéponse du candidat :\n"""{answer}"""\n'
+
+    data = generate_json(
+        prompt,
+        system=prepared.get("system", EVALUATION_SYSTEM),
+        schema=EVALUATION_SCHEMA,
+        schema_name="evaluation",
+        call_site="evaluate",
+    )
+
+    evaluation = _normalize_evaluation(data)
+    if memo is not None:
+        memo.store(prepared, answer, evaluation)
+    return evaluation
+
+
+def evaluate_answer(
+    question: str,
+    answer: str,
+    job_text: Optional[str] = None,
+    profile: Optional[Dict[str, Any]] = None,
+    question_type: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Évalue la réponse d'un candidat à une question d'entretien.
+
+    Utilise le LLM pour produire une évaluation structurée, par exemple :
+
+    {
+      "score": 7,
+      "clarity": 4,
+      "relevance": 3,
+      "alignment": 4,
+      "depth": 3,
+      "strengths": [...],
+      "weaknesses": [...],
+      "improvements": [...]
+    }
+
+    Args:
+        question: La question posée par l'intervieweur.
+        answer: La réponse donnée par le candidat.
+        job_text: (optionnel) Description du poste / offre, pour évaluer l'alignement.
+        profile: (optionnel) Profil issu de build_profile ; s'il est fourni, un
+            contexte d'offre condensé remplace le texte brut de l'offre.
+        question_type: (optionnel) Type de question du plan, pour la grille dédiée.
+
+    Returns:
+        Un dictionnaire contenant les scores et commentaires.
+    """
+    prepared = prepare_evaluation(
+        question,
+        question_type=question_type,
+        profile=profile,
+        job_text=job_text,
+    )
+    return evaluate_prepared(prepared, answer)
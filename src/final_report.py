@@ -1,14 +1,34 @@
 from typing import Any, Dict, List
 
-from src.llm_client import generate_text
-
-
-def _compute_score_stats(history: List[Dict[str, Any]]) -> Dict[str, Any]:
+from src.instrumentation import traced
+from src.llm_client import generate_json, generate_text
+from src.report_renderer import aggregate_points, local_narrative, render_report
+
+# Modes de génération du rapport final :
+# - "hybrid"  : sections chiffrées rendues localement, LLM pour l'intro et la conclusion
+# - "offline" : rapport entièrement local, aucun appel LLM
+# - "llm"     : rapport complet rédigé par le LLM (comportement historique)
+REPORT_MODES = ("hybrid", "offline", "llm")
+
+NARRATIVE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "introduction": {"type": "string"},
+        "conclusion": {"type": "string"},
+    },
+    "required": ["introduction", "conclusion"],
+}
+
+
+def compute_score_stats(history: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
     Calcule quelques statistiques simples à partir de l'historique :
     - moyenne des scores
     - moyenne des critères (clarity, relevance, alignment, depth)
     - nombre de questions traitées
+
+    Le calcul s'appuie sur la table colonnaire de src.score_analytics,
+    utilisée aussi pour les statistiques de cohorte.
     """
     if not history:
         return {
@@ -20,35 +40,25 @@ def _compute_score_stats(history: List[Dict[str, Any]]) -> Dict[str, Any]:
             "avg_depth": 0.0,
         }
 
-    n = 0
-    total_score = 0
-    total_clarity = 0
-    total_relevance = 0
-    total_alignment = 0
-    total_depth = 0
-
-    for record in history:
-        eval_ = record.get("evaluation", {})
-        total_score += int(eval_.get("score", 0))
-        total_clarity += int(eval_.get("clarity", 0))
-        total_relevance += int(eval_.get("relevance", 0))
-        total_alignment += int(eval_.get("alignment", 0))
-        total_depth += int(eval_.get("depth", 0))
-        n += 1
-
-    if n == 0:
-        n = 1  # éviter division par 0, même si déjà checké
+    # Import paresseux : numpy n'est chargé qu'au premier rapport
+    from src.score_analytics import ScoreTable
+
+    means = ScoreTable.from_histories([history]).means()
 
     return {
-        "n_questions": n,
-        "avg_score": total_score / n,
-        "avg_clarity": total_clarity / n,
-        "avg_relevance": total_relevance / n,
-        "avg_alignment": total_alignment / n,
-        "avg_depth": total_depth / n,
+        "n_questions": len(history),
+        "avg_score": means["score"],
+        "avg_clarity": means["clarity"],
+        "avg_relevance": means["relevance"],
+        "avg_alignment": means["alignment"],
+        "avg_depth": means["depth"],
     }
 
 
+# Ancien nom, encore utilisé en interne
+_compute_score_stats = compute_score_stats
+
+
 def _build_text_summary_for_llm(history: List[Dict[str, Any]], stats: Dict[str, Any]) -> str:
     """
     Construit un résumé textuel brut de l'historique et des stats,
@@ -70,7 +80,7 @@ def _build_text_summary_for_llm(history: List[Dict[str, Any]], stats: Dict[str,
     for i, record in enumerate(history, start=1):
         q = record.get("question", "")
         a = record.get("answer", "")
-        eval_ = record.get("evaluation", {})
+        eval_ = record.get("evaluation") or {}
 
         score = eval_.get("score", "?")
         clarity = eval_.get("clarity", "?")
@@ -88,24 +98,46 @@ def _build_text_summary_for_llm(history: List[Dict[str, Any]], stats: Dict[str,
     return "\n".join(lines)
 
 
-def generate_final_report(history: List[Dict[str, Any]]) -> str:
+def _generate_narrative(history: List[Dict[str, Any]], stats: Dict[str, Any]) -> Dict[str, str]:
     """
-    Génère un rapport final d'entretien à partir de l'historique complet.
+    Demande au LLM uniquement l'introduction et la conclusion du rapport.
+    Le prompt ne contient que les moyennes et les points agrégés, pas le détail
+    complet des réponses.
+    """
+    strengths = [text for text, _ in aggregate_points(history, "strengths", limit=4)]
+    weaknesses = [text for text, _ in aggregate_points(history, "weaknesses", limit=4)]
 
-    Le rapport contient typiquement :
-    - un résumé global du candidat
-    - les forces principales
-    - les faiblesses principales
-    - une interprétation des scores
-    - des conseils concrets pour progresser
+    prompt = f"""
+    Tu es un coach d'entretien professionnel, bienveillant mais honnête.
+
+    Nombre de questions : {stats['n_questions']}
+    Moyennes : score global {stats['avg_score']:.2f} / 10, clarté {stats['avg_clarity']:.2f} / 5,
+    pertinence {stats['avg_relevance']:.2f} / 5, alignement {stats['avg_alignment']:.2f} / 5,
+    profondeur {stats['avg_depth']:.2f} / 5.
+
+    Points forts relevés : {strengths}
+    Points faibles relevés : {weaknesses}
+
+    Rédige :
+    - "introduction" : impression générale sur le candidat (4-5 phrases)
+    - "conclusion"   : courte conclusion motivante (2-3 phrases)
     """
-    if not history:
-        return (
-            "Aucun historique d'entretien fourni. "
-            "Le rapport final ne peut pas être généré."
-        )
 
-    stats = _compute_score_stats(history)
+    data = generate_json(prompt, schema=NARRATIVE_SCHEMA, schema_name="rapport", call_site="report")
+    if not isinstance(data, dict):
+        data = {}
+
+    fallback = local_narrative(stats, history)
+    return {
+        "introduction": str(data.get("introduction") or fallback["introduction"]),
+        "conclusion": str(data.get("conclusion") or fallback["conclusion"]),
+    }
+
+
+def _generate_full_llm_report(history: List[Dict[str, Any]], stats: Dict[str, Any]) -> str:
+    """
+    Ancien mode : le LLM rédige l'intégralité du rapport (≈900 tokens de sortie).
+    """
     raw_summary = _build_text_summary_for_llm(history, stats)
 
     prompt = f"""
@@ -140,6 +172,52 @@ def generate_final_report(history: List[Dict[str, Any]]) -> str:
     - Adopte un ton bienveillant mais honnête.
     """
 
-    report = generate_text(prompt, max_tokens=900)
+    report = generate_text(prompt, call_site="report_full")
 
     return report
+
+
+@traced("report")
+def generate_final_report(history: List[Dict[str, Any]], mode: str = "hybrid") -> str:
+    """
+    Génère un rapport final d'entretien à partir de l'historique complet.
+
+    Le rapport contient typiquement :
+    - un résumé global du candidat
+    - les forces principales
+    - les faiblesses principales
+    - une interprétation des scores
+    - des conseils concrets pour progresser
+
+    Args:
+        history: historique des questions / réponses / évaluations.
+        mode: "hybrid" (défaut) : sections chiffrées et listes agrégées rendues
+            localement, seules l'introduction et la conclusion sont demandées au LLM ;
+            "offline" : aucun appel LLM ;
+            "llm" : rapport entièrement rédigé par le LLM.
+    """
+    if mode not in REPORT_MODES:
+        raise ValueError(f"Mode de rapport inconnu : {mode!r} (attendu : {REPORT_MODES})")
+
+    if not history:
+        return (
+            "Aucun historique d'entretien fourni. "
+            "Le rapport final ne peut pas être généré."
+        )
+
+    stats = _compute_score_stats(history)
+
+    if mode == "llm":
+        return _generate_full_llm_report(history, stats)
+
+    if mode == "offline":
+        narrative = local_narrative(stats, history)
+    else:
+        narrative = _generate_narrative(history, stats)
+
+    return render_report(
+        history,
+        stats,
+        introduction=narrative["introduction"],
+        conclusion=narrative["conclusion"],
+    )
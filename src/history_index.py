@@ -0,0 +1,463 @@
+"""
+Index de recherche sur les historiques d'entretien exportés (records
+{question, type, topic, answer, evaluation} produits par app.py,
+ask_one_question ou le scoring en lot).
+
+- index inversés sur le type, le thème et les compétences citées ;
+- index triés sur les notes (score, clarity, relevance, alignment, depth)
+  pour les requêtes par intervalle ;
+- recherche plein texte (BM25) sur les réponses ;
+- mise à jour incrémentale : ajout record par record, ou relecture des seules
+  lignes ajoutées à un export JSONL depuis la dernière lecture.
+
+Une question est considérée comme passée si sa réponse est vide ou n'a pas
+été évaluée.
+
+Usage :
+    python -m src.history_index exports/*.jsonl --topic python --max-score 5
+    python -m src.history_index exports/*.jsonl --text "tests unitaires" --type technique
+    python -m src.history_index exports/*.jsonl --most-skipped --type technique
+"""
+import argparse
+import functools
+import json
+import re
+import sys
+import time
+import unicodedata
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.instrumentation import registry
+from src.text_normalize import normalize
+
+# Notes indexées pour les requêtes par intervalle
+SCORE_FIELDS = ("score", "clarity", "relevance", "alignment", "depth")
+
+# Ajouts non triés tolérés dans l'index d'une note avant fusion à la requête
+# (à l'ajout, la fusion n'a lieu qu'au-delà d'un huitième de l'index : coût amorti)
+MAX_UNSORTED = 1024
+
+# Paramètres BM25 de la recherche plein texte
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Mots ignorés par la recherche plein texte (sans accents, comme les tokens)
+STOPWORDS = {
+    "a", "ai", "au", "aux", "avec", "ce", "ces", "dans", "de", "des", "du", "elle", "en", "et",
+    "est", "il", "je", "j", "la", "le", "les", "leur", "l", "ma", "mais", "me", "mes", "mon",
+    "ne", "nous", "on", "ou", "par", "pas", "pour", "qu", "que", "qui", "sa", "se", "ses",
+    "son", "sur", "ta", "te", "un", "une", "vous", "d", "c", "s", "n", "y", "the", "and", "of",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+
+# Champs regroupables par most_skipped
+GROUP_FIELDS = ("question", "topic")
+
+
+# Types, thèmes et questions se répètent d'un record à l'autre
+_normalize_key = functools.lru_cache(maxsize=65536)(normalize)
+
+
+def _ascii_tokens(text: str) -> List[str]:
+    # Les tokens sont ASCII : après décomposition, les caractères restants sont ignorés
+    text = text or ""
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return _TOKEN_RE.findall(text.lower())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _ascii_tokens(text) if t not in STOPWORDS]
+
+
+def is_skipped(record: Dict[str, Any]) -> bool:
+    return not str(record.get("answer") or "").strip() or not record.get("evaluation")
+
+
+def _ids(values: array) -> np.ndarray:
+    # Vue numpy (sans copie) d'une liste d'ids
+    return np.frombuffer(values, dtype=np.int32) if len(values) else np.zeros(0, dtype=np.int32)
+
+
+class _RangeIndex:
+    """
+    Valeurs numériques triées (avec l'id du record) ; les ajouts vont dans
+    une zone non triée, fusionnée avec la partie triée quand elle grossit.
+    """
+
+    def __init__(self) -> None:
+        self.keys = np.zeros(0, dtype=np.float32)
+        self.ids = np.zeros(0, dtype=np.int32)
+        self.unsorted_keys = array("f")
+        self.unsorted_ids = array("i")
+
+    def add(self, value: float, doc_id: int) -> None:
+        self.unsorted_keys.append(value)
+        self.unsorted_ids.append(doc_id)
+        if len(self.unsorted_ids) > max(MAX_UNSORTED, len(self.ids) // 8):
+            self._merge()
+
+    def _merge(self) -> None:
+        keys = np.concatenate([self.keys, np.frombuffer(self.unsorted_keys, dtype=np.float32)])
+        ids = np.concatenate([self.ids, _ids(self.unsorted_ids)])
+        order = np.argsort(keys, kind="stable")
+        self.keys, self.ids = keys[order], ids[order]
+        self.unsorted_keys, self.unsorted_ids = array("f"), array("i")
+
+    def between(self, low: Optional[float], high: Optional[float]) -> np.ndarray:
+        """
+        Ids des records dont la note est dans [low, high] (bornes incluses, None = ouvert).
+        """
+        if self.unsorted_ids:
+            self._merge()
+        start = 0 if low is None else int(np.searchsorted(self.keys, low, side="left"))
+        end = len(self.keys) if high is None else int(np.searchsorted(self.keys, high, side="right"))
+        return self.ids[start:end]
+
+
+class HistoryIndex:
+    """
+    Index en mémoire d'un grand nombre de records d'historique.
+
+    Les listes d'ids sont des tableaux compacts (array) qui grandissent à
+    chaque ajout ; les requêtes les combinent en masques numpy sur l'ensemble
+    des records.
+
+    Args:
+        skills: vocabulaire de compétences (ex : hard skills des offres) repéré
+            dans les questions et réponses ; le thème de chaque question est
+            aussi indexé comme compétence. Un record peut porter sa propre
+            liste "skills".
+    """
+
+    def __init__(self, skills: Optional[Iterable[str]] = None) -> None:
+        self.records: List[Dict[str, Any]] = []
+        self.by_type: Dict[str, array] = {}
+        self.by_topic: Dict[str, array] = {}
+        self.by_skill: Dict[str, array] = {}
+        self.skipped = array("i")
+        self.ranges: Dict[str, _RangeIndex] = {name: _RangeIndex() for name in SCORE_FIELDS}
+        # Plein texte : terme -> (ids, fréquences), et longueur de chaque réponse
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        self.doc_lengths = array("i")
+        # Question / thème de chaque record, sous forme d'entier (regroupements)
+        self._groups: Dict[str, Dict[str, int]] = {field: {} for field in GROUP_FIELDS}
+        self._group_labels: Dict[str, List[str]] = {field: [] for field in GROUP_FIELDS}
+        self._group_ids: Dict[str, array] = {field: array("i") for field in GROUP_FIELDS}
+        # Offsets déjà lus par fichier JSONL (mise à jour incrémentale)
+        self._offsets: Dict[str, int] = {}
+
+        self._skill_phrases: Dict[Tuple[str, ...], str] = {}
+        self._skill_starts: Set[str] = set()
+        self._max_phrase = 1
+        for skill in skills or []:
+            self._add_skill_phrase(skill)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _add_skill_phrase(self, skill: str) -> str:
+        key = _normalize_key(skill)
+        phrase = tuple(_TOKEN_RE.findall(key))
+        if phrase:
+            self._skill_phrases.setdefault(phrase, key)
+            self._skill_starts.add(phrase[0])
+            self._max_phrase = max(self._max_phrase, len(phrase))
+        return key
+
+    def _record_skills(self, record: Dict[str, Any], tokens: List[str]) -> Set[str]:
+        found = {self._add_skill_phrase(s) for s in record.get("skills") or [] if s}
+        if record.get("topic"):
+            found.add(_normalize_key(record["topic"]))
+        # Compétences du vocabulaire citées dans la question ou la réponse (n-grammes)
+        for i, token in enumerate(tokens):
+            if token not in self._skill_starts:
+                continue
+            for n in range(1, min(self._max_phrase, len(tokens) - i) + 1):
+                skill = self._skill_phrases.get(tuple(tokens[i:i + n]))
+                if skill:
+                    found.add(skill)
+        found.discard("")
+        return found
+
+    # ---------- Mise à jour ----------
+
+    def add(self, record: Dict[str, Any]) -> int:
+        """
+        Indexe un record et renvoie son id (position dans self.records).
+        """
+        doc_id = len(self.records)
+        self.records.append(record)
+
+        self.by_type.setdefault(_normalize_key(record.get("type") or ""), array("i")).append(doc_id)
+        self.by_topic.setdefault(_normalize_key(record.get("topic") or ""), array("i")).append(doc_id)
+        for field in GROUP_FIELDS:
+            label = str(record.get(field) or "")
+            groups = self._groups[field]
+            key = _normalize_key(label)
+            if key not in groups:
+                groups[key] = len(groups)
+                self._group_labels[field].append(label)
+            self._group_ids[field].append(groups[key])
+
+        answer_tokens = _ascii_tokens(str(record.get("answer") or ""))
+        question_tokens = _TOKEN_RE.findall(_normalize_key(str(record.get("question") or "")))
+        for skill in self._record_skills(record, question_tokens + answer_tokens):
+            self.by_skill.setdefault(skill, array("i")).append(doc_id)
+
+        if is_skipped(record):
+            self.skipped.append(doc_id)
+        evaluation = record.get("evaluation") or {}
+        for name in SCORE_FIELDS:
+            value = evaluation.get(name)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.ranges[name].add(float(value), doc_id)
+
+        terms = Counter(t for t in answer_tokens if t not in STOPWORDS)
+        for term, tf in terms.items():
+            if term not in self.postings:
+                self.postings[term] = (array("i"), array("i"))
+            ids, tfs = self.postings[term]
+            ids.append(doc_id)
+            tfs.append(tf)
+        self.doc_lengths.append(sum(terms.values()))
+        return doc_id
+
+    def add_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        count = 0
+        for record in records:
+            self.add(record)
+            count += 1
+        return count
+
+    def ingest_jsonl(self, path: str) -> int:
+        """
+        Indexe les lignes d'un export JSONL ajoutées depuis le dernier appel
+        sur ce fichier, et renvoie le nombre de records indexés.
+
+        Une ligne est soit un record, soit un résultat du scoring en lot
+        (clé "history") dont chaque record reçoit "interview_id".
+        Une dernière ligne incomplète (export en cours) est relue au prochain appel.
+        """
+        count = 0
+        with open(path, "rb") as f:
+            f.seek(self._offsets.get(path, 0))
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                self._offsets[path] = self._offsets.get(path, 0) + len(raw)
+                line = raw.strip()
+                if not line:
+                    continue
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if not isinstance(item, dict):
+                    continue
+                if isinstance(item.get("history"), list):
+                    count += self.add_many(dict(r, interview_id=item.get("id")) for r in item["history"])
+                else:
+                    self.add(item)
+                    count += 1
+        return count
+
+    # ---------- Requêtes ----------
+
+    def text_scores(self, text: str) -> np.ndarray:
+        """
+        Score BM25 de chaque réponse pour `text` (0 si aucun terme n'y figure).
+        """
+        n_docs = len(self.records)
+        scores = np.zeros(n_docs, dtype=np.float64)
+        if not n_docs:
+            return scores
+        lengths = np.frombuffer(self.doc_lengths, dtype=np.int32)
+        avg_length = float(lengths.mean()) or 1.0
+        for term in set(tokenize(text)):
+            if term not in self.postings:
+                continue
+            ids_arr, tfs_arr = self.postings[term]
+            ids = _ids(ids_arr)
+            tf = np.frombuffer(tfs_arr, dtype=np.int32).astype(np.float64)
+            idf = np.log(1 + (n_docs - len(ids) + 0.5) / (len(ids) + 0.5))
+            norm = 1 - BM25_B + BM25_B * lengths[ids] / avg_length
+            scores[ids] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+        return scores
+
+    def _mask(self, ids: np.ndarray) -> np.ndarray:
+        mask = np.zeros(len(self.records), dtype=bool)
+        mask[ids] = True
+        return mask
+
+    def search(
+        self,
+        text: Optional[str] = None,
+        type: Optional[str] = None,
+        topic: Optional[str] = None,
+        skill: Optional[str] = None,
+        ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        skipped: Optional[bool] = None,
+        limit: Optional[int] = 20,
+    ) -> List[Dict[str, Any]]:
+        """
+        Records qui vérifient tous les critères fournis.
+
+        Args:
+            text: recherche plein texte dans les réponses (tous les termes ne
+                sont pas requis ; classement BM25).
+            type, topic, skill: égalité après normalisation (minuscules, sans accents).
+            ranges: intervalles de notes, ex : {"score": (None, 5)} pour score <= 5.
+            skipped: True pour les questions passées, False pour les autres.
+            limit: nombre maximal de résultats (None : tous).
+
+        Returns:
+            [{"id", "score_text" (si text), "record"}], classés par pertinence
+            si `text` est fourni, par ordre d'indexation sinon.
+        """
+        t0 = time.perf_counter()
+        mask = np.ones(len(self.records), dtype=bool)
+        for postings, value in ((self.by_type, type), (self.by_topic, topic), (self.by_skill, skill)):
+            if value is not None:
+                mask &= self._mask(_ids(postings.get(normalize(value), array("i"))))
+        for name, (low, high) in (ranges or {}).items():
+            if name not in self.ranges:
+                raise ValueError(f"Note non indexée : {name} (attendu : {', '.join(SCORE_FIELDS)})")
+            mask &= self._mask(self.ranges[name].between(low, high))
+        if skipped is not None:
+            skipped_mask = self._mask(_ids(self.skipped))
+            mask &= skipped_mask if skipped else ~skipped_mask
+
+        text_scores = self.text_scores(text) if text else None
+        if text_scores is not None:
+            mask &= text_scores > 0
+            ids = np.flatnonzero(mask)
+            # Pertinence décroissante, puis ordre d'indexation
+            ids = ids[np.argsort(-text_scores[ids], kind="stable")]
+        else:
+            ids = np.flatnonzero(mask)
+        if limit is not None:
+            ids = ids[:limit]
+
+        results = []
+        for doc_id in ids.tolist():
+            result: Dict[str, Any] = {"id": doc_id, "record": self.records[doc_id]}
+            if text_scores is not None:
+                result["score_text"] = round(float(text_scores[doc_id]), 4)
+            results.append(result)
+        registry.observe("history_query_seconds", time.perf_counter() - t0)
+        return results
+
+    def most_skipped(
+        self,
+        type: Optional[str] = None,
+        by: str = "question",
+        min_count: int = 1,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """
+        Questions (by="question") ou thèmes (by="topic") les plus souvent passés.
+
+        Returns:
+            [{"key", "asked", "skipped", "skip_rate"}], par nombre de passages décroissant.
+        """
+        if by not in GROUP_FIELDS:
+            raise ValueError(f"Regroupement inconnu : {by} (attendu : {', '.join(GROUP_FIELDS)})")
+        t0 = time.perf_counter()
+        groups = _ids(self._group_ids[by])
+        n_groups = len(self._group_labels[by])
+        selected = np.ones(len(self.records), dtype=bool)
+        if type is not None:
+            selected = self._mask(_ids(self.by_type.get(normalize(type), array("i"))))
+        skipped = selected & self._mask(_ids(self.skipped))
+
+        asked = np.bincount(groups[selected], minlength=n_groups)
+        skipped_counts = np.bincount(groups[skipped], minlength=n_groups)
+        keep = np.flatnonzero((skipped_counts > 0) & (asked >= min_count))
+        rates = skipped_counts[keep] / asked[keep]
+        order = np.lexsort((-rates, -skipped_counts[keep]))[:limit]
+
+        rows = [
+            {
+                "key": self._group_labels[by][g],
+                "asked": int(asked[g]),
+                "skipped": int(skipped_counts[g]),
+                "skip_rate": round(float(skipped_counts[g] / asked[g]), 4),
+            }
+            for g in keep[order].tolist()
+        ]
+        registry.observe("history_query_seconds", time.perf_counter() - t0)
+        return rows
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "records": len(self.records),
+            "skipped": len(self.skipped),
+            "types": len(self.by_type),
+            "topics": len(self.by_topic),
+            "skills": len(self.by_skill),
+            "terms": len(self.postings),
+        }
+
+
+# ---------- Ligne de commande ----------
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Recherche dans les historiques d'entretien exportés.")
+    parser.add_argument("paths", nargs="+", help="Exports JSONL (records ou résultats du scoring en lot).")
+    parser.add_argument("--text", help="Recherche plein texte dans les réponses.")
+    parser.add_argument("--type")
+    parser.add_argument("--topic")
+    parser.add_argument("--skill")
+    parser.add_argument("--skills", nargs="*", default=[], help="Vocabulaire de compétences à repérer.")
+    for name in SCORE_FIELDS:
+        parser.add_argument(f"--min-{name}", type=float)
+        parser.add_argument(f"--max-{name}", type=float)
+    parser.add_argument("--skipped", action="store_true", help="Questions passées uniquement.")
+    parser.add_argument("--most-skipped", action="store_true", help="Questions les plus souvent passées.")
+    parser.add_argument("--by", choices=("question", "topic"), default="question")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    index = HistoryIndex(skills=args.skills)
+    for path in args.paths:
+        index.ingest_jsonl(path)
+    build_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    if args.most_skipped:
+        results: List[Dict[str, Any]] = index.most_skipped(type=args.type, by=args.by, limit=args.limit)
+    else:
+        ranges = {}
+        for name in SCORE_FIELDS:
+            low, high = getattr(args, f"min_{name}"), getattr(args, f"max_{name}")
+            if low is not None or high is not None:
+                ranges[name] = (low, high)
+        results = index.search(
+            text=args.text,
+            type=args.type,
+            topic=args.topic,
+            skill=args.skill,
+            ranges=ranges,
+            skipped=True if args.skipped else None,
+            limit=args.limit,
+        )
+    query_s = time.perf_counter() - t0
+
+    print(
+        f"{len(index)} records indexés en {build_s:.2f}s, requête en {query_s * 1000:.1f} ms, "
+        f"{len(results)} résultat(s)",
+        file=sys.stderr,
+    )
+    for result in results:
+        print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+import contextvars
+import functools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+# Nombre maximal de spans / d'observations conservés en mémoire (fenêtre glissante)
+MAX_SPANS = 5000
+MAX_OBSERVATIONS = 1000
+
+# Préfixe des métriques exportées
+METRIC_PREFIX = "interview"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_current_span: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _quantile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * q
+    low = int(k)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+class MetricsRegistry:
+    """
+    Registre de métriques en mémoire, partagé par tout le processus :
+    - compteurs (tokens, hits de cache, retries, erreurs...)
+    - jauges (valeur courante : profondeur de file, tâches en cours...)
+    - distributions (durées des étapes), résumées en count / sum / quantiles
+    - derniers spans terminés, pour l'export JSONL et le panneau de debug.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters: Dict[Tuple[str, LabelKey], float] = {}
+            self._gauges: Dict[Tuple[str, LabelKey], float] = {}
+            self._observations: Dict[Tuple[str, LabelKey], Deque[float]] = {}
+            self._totals: Dict[Tuple[str, LabelKey], List[float]] = {}
+            self._spans: Deque[Dict[str, Any]] = deque(maxlen=MAX_SPANS)
+
+    def inc(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._gauges[key] = value
+
+    def gauges(self) -> Dict[Tuple[str, LabelKey], float]:
+        with self._lock:
+            return dict(self._gauges)
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = (name, _label_key(labels))
+        with self._lock:
+            if key not in self._observations:
+                self._observations[key] = deque(maxlen=MAX_OBSERVATIONS)
+                self._totals[key] = [0, 0.0]
+            self._observations[key].append(value)
+            self._totals[key][0] += 1
+            self._totals[key][1] += value
+
+    def record_span(self, span_record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._spans.append(span_record)
+
+    def spans(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._spans)
+
+    def counters(self) -> Dict[Tuple[str, LabelKey], float]:
+        with self._lock:
+            return dict(self._counters)
+
+    def counter_value(self, name: str, **labels: Any) -> float:
+        with self._lock:
+            return self._counters.get((name, _label_key(labels)), 0.0)
+
+    def distributions(self) -> Dict[Tuple[str, LabelKey], Dict[str, float]]:
+        """
+        Résumé de chaque distribution : count, sum, mean, p50, p95 (fenêtre glissante
+        pour les quantiles, totaux depuis le démarrage pour count / sum).
+        """
+        with self._lock:
+            items = [(k, list(v), list(self._totals[k])) for k, v in self._observations.items()]
+        result = {}
+        for key, values, (count, total) in items:
+            result[key] = {
+                "count": count,
+                "sum": total,
+                "mean": total / count if count else 0.0,
+                "p50": _quantile(values, 0.5),
+                "p95": _quantile(values, 0.95),
+            }
+        return result
+
+    def stage_summary(self) -> List[Dict[str, Any]]:
+        """
+        Tableau synthétique par étape (pour le panneau Streamlit).
+        """
+        rows = []
+        for (name, labels), stats in sorted(self.distributions().items()):
+            if name != "stage_duration_seconds":
+                continue
+            row = {"stage": dict(labels).get("stage", "")}
+            row.update({k: round(v, 4) for k, v in stats.items()})
+            rows.append(row)
+        return rows
+
+
+registry = MetricsRegistry()
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Mesure une étape du pipeline (parsing PDF, appel LLM, évaluation, TTS...).
+
+    Le dictionnaire renvoyé peut être complété pendant l'étape
+    (ex : s["prompt_tokens"] = 120). À la sortie, la durée est enregistrée
+    dans la distribution `stage_duration_seconds{stage=name}` et le span est
+    conservé pour l'export. Les spans imbriqués connaissent leur parent.
+    """
+    parent = _current_span.get()
+    record: Dict[str, Any] = {
+        "name": name,
+        "parent": parent["name"] if parent else None,
+        "start": time.time(),
+        **attrs,
+    }
+    token = _current_span.set(record)
+    t0 = time.perf_counter()
+    try:
+        yield record
+        record.setdefault("status", "ok")
+    except BaseException as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+        registry.inc("stage_errors_total", stage=name)
+        raise
+    finally:
+        _current_span.reset(token)
+        record["duration_s"] = time.perf_counter() - t0
+        registry.observe("stage_duration_seconds", record["duration_s"], stage=name)
+        registry.record_span(record)
+
+
+def traced(name: str) -> Callable:
+    """
+    Décorateur : exécute la fonction dans un span `name`.
+    """
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span() -> Optional[Dict[str, Any]]:
+    return _current_span.get()
+
+
+def record_llm_usage(usage: Optional[Dict[str, Any]], model: str) -> None:
+    """
+    Enregistre le bloc `usage` renvoyé par l'API (tokens prompt / completion)
+    dans les compteurs et dans le span courant.
+
+    Si l'API indique les tokens de prompt servis par son cache de préfixe
+    (usage.prompt_tokens_details.cached_tokens), ils sont comptés à part et
+    la part mise en cache est observée par point d'appel.
+    """
+    if not usage:
+        return
+    prompt_tokens = int(usage.get("prompt_tokens") or 0)
+    completion_tokens = int(usage.get("completion_tokens") or 0)
+
+    registry.inc("llm_tokens_total", prompt_tokens, kind="prompt", model=model)
+    registry.inc("llm_tokens_total", completion_tokens, kind="completion", model=model)
+
+    record = _current_span.get()
+    if record is not None:
+        record["prompt_tokens"] = record.get("prompt_tokens", 0) + prompt_tokens
+        record["completion_tokens"] = record.get("completion_tokens", 0) + completion_tokens
+
+    details = usage.get("prompt_tokens_details") or {}
+    if "cached_tokens" not in details:
+        return
+    cached_tokens = int(details.get("cached_tokens") or 0)
+    registry.inc("llm_tokens_total", cached_tokens, kind="cached_prompt", model=model)
+    call_site = (record or {}).get("call_site") or ""
+    if prompt_tokens:
+        registry.observe("llm_cached_prompt_ratio", cached_tokens / prompt_tokens, call_site=call_site)
+    if record is not None:
+        record["cached_tokens"] = record.get("cached_tokens", 0) + cached_tokens
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """
+    Comptabilise un accès à un cache (hit ou miss).
+    """
+    registry.inc("cache_requests_total", cache=cache, result="hit" if hit else "miss")
+    record = _current_span.get()
+    if record is not None and hit:
+        record["cache_hit"] = True
+
+
+def record_retry(stage: str, reason: str) -> None:
+    registry.inc("retries_total", stage=stage, reason=reason)
+    record = _current_span.get()
+    if record is not None:
+        record["retries"] = record.get("retries", 0) + 1
+
+
+# ---------- Exporteurs ----------
+
+def export_jsonl(path: str, spans: Optional[List[Dict[str, Any]]] = None) -> int:
+    """
+    Ajoute les spans (par défaut : ceux du registre) à un fichier JSONL.
+
+    Returns:
+        Nombre de spans écrits.
+    """
+    spans = registry.spans() if spans is None else spans
+    with open(path, "a", encoding="utf-8") as f:
+        for record in spans:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    return len(spans)
+
+
+def spans_to_jsonl(spans: Optional[List[Dict[str, Any]]] = None) -> str:
+    spans = registry.spans() if spans is None else spans
+    return "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in spans)
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: LabelKey, extra: Optional[Dict[str, str]] = None) -> str:
+    items = list(labels) + list((extra or {}).items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in items) + "}"
+
+
+def to_prometheus() -> str:
+    """
+    Export des métriques au format texte Prometheus (compteurs, jauges, résumés).
+    """
+    lines: List[str] = []
+
+    by_name: Dict[str, List[Tuple[LabelKey, float]]] = {}
+    for (name, labels), value in registry.counters().items():
+        by_name.setdefault(name, []).append((labels, value))
+    for name in sorted(by_name):
+        metric = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# TYPE {metric} counter")
+        for labels, value in sorted(by_name[name]):
+            lines.append(f"{metric}{_format_labels(labels)} {value:g}")
+
+    gauges: Dict[str, List[Tuple[LabelKey, float]]] = {}
+    for (name, labels), value in registry.gauges().items():
+        gauges.setdefault(name, []).append((labels, value))
+    for name in sorted(gauges):
+        metric = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# TYPE {metric} gauge")
+        for labels, value in sorted(gauges[name]):
+            lines.append(f"{metric}{_format_labels(labels)} {value:g}")
+
+    summaries: Dict[str, List[Tuple[LabelKey, Dict[str, float]]]] = {}
+    for (name, labels), stats in registry.distributions().items():
+        summaries.setdefault(name, []).append((labels, stats))
+    for name in sorted(summaries):
+        metric = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# TYPE {metric} summary")
+        for labels, stats in sorted(summaries[name], key=lambda x: x[0]):
+            for q, key in (("0.5", "p50"), ("0.95", "p95")):
+                lines.append(f"{metric}{_format_labels(labels, {'quantile': q})} {stats[key]:.6f}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {stats['sum']:.6f}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {stats['count']:g}")
+
+    return "\n".join(lines) + "\n"
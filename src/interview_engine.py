@@ -1,12 +1,45 @@
 from typing import Any, Dict, List, Optional
 
 from src.evaluator import evaluate_answer
+from src.instrumentation import registry
+from src.plan_interview import generate_follow_up_question, generate_interview_plan
+from src.records import InterviewRecord
+
+# Mode adaptatif : taille de la réserve de questions (générée une seule fois)
+# et nombre de questions posées par défaut
+ADAPTIVE_POOL_SIZE = 12
+DEFAULT_INTERVIEW_LENGTH = 8
+
+# Couverture visée par type de question sur un entretien complet
+TYPE_TARGETS = {
+    "intro": 1,
+    "motivation": 1,
+    "technique": 3,
+    "projet": 1,
+    "soft_skill": 1,
+    "conclusion": 1,
+}
+
+# Types de questions qui permettent d'observer chaque critère d'évaluation
+CRITERION_TYPES = {
+    "clarity": ("intro", "soft_skill", "motivation"),
+    "relevance": ("projet", "soft_skill"),
+    "alignment": ("motivation", "technique"),
+    "depth": ("technique", "projet"),
+}
+
+# Poids du score de sélection de la question suivante
+WEIGHT_COVERAGE = 3.0   # type encore peu couvert
+WEIGHT_WEAKNESS = 2.0   # type qui sonde le critère le plus faible jusqu'ici
+WEIGHT_MISSING = 2.0    # compétence attendue (manquante au CV) pas encore abordée
+WEIGHT_OVERLAP = 0.5    # compétence commune pas encore abordée
+WEIGHT_REPEAT = 1.5     # thème déjà abordé
 
 
 def ask_one_question(
     question_item: Dict[str, Any],
     job_text: Optional[str] = None,
-) -> Dict[str, Any]:
+) -> InterviewRecord:
     """
     Pose une question (via le terminal), récupère la réponse et l'évalue.
 
@@ -20,7 +53,7 @@ def ask_one_question(
         job_text: texte de l'offre pour aider l'évaluation.
 
     Returns:
-        Un dict de la forme :
+        Un InterviewRecord, lisible comme le dict :
         {
           "question": "...",
           "type": "...",
@@ -42,7 +75,12 @@ def ask_one_question(
 
     answer = input("\nVotre réponse (candidat) :\n> ")
 
-    evaluation = evaluate_answer(question=question, answer=answer, job_text=job_text)
+    evaluation = evaluate_answer(
+        question=question,
+        answer=answer,
+        job_text=job_text,
+        question_type=q_type,
+    )
 
     print("\n---- FEEDBACK AUTOMATIQUE ----")
     print(f"Score global   : {evaluation.get('score', '?')} / 10")
@@ -71,13 +109,13 @@ def ask_one_question(
             print(f"  - {i}")
 
     # On retourne tout pour l'historique
-    return {
-        "question": question,
-        "type": q_type,
-        "topic": topic,
-        "answer": answer,
-        "evaluation": evaluation,
-    }
+    return InterviewRecord(
+        question=question,
+        type=q_type,
+        topic=topic,
+        answer=answer,
+        evaluation=evaluation,
+    )
 
 
 def run_interview(
@@ -85,7 +123,7 @@ def run_interview(
     cv_text: str,
     job_text: Optional[str] = None,
     max_questions: Optional[int] = None,
-) -> List[Dict[str, Any]]:
+) -> List[InterviewRecord]:
     """
     Lance une simulation d'entretien interactive dans le terminal.
 
@@ -96,7 +134,7 @@ def run_interview(
         max_questions: limite du nombre de questions (si None, on utilise tout le plan).
 
     Returns:
-        Une liste 'history' :
+        Une liste 'history' d'InterviewRecord (voir ask_one_question) :
         [
           {
             "question": "...",
@@ -108,7 +146,7 @@ def run_interview(
           ...
         ]
     """
-    history: List[Dict[str, Any]] = []
+    history: List[InterviewRecord] = []
 
     if max_questions is None or max_questions > len(plan):
         max_q = len(plan)
@@ -136,3 +174,255 @@ def run_interview(
     print("========================================\n")
 
     return history
+
+
+def run_scripted_interview(
+    plan: List[Dict[str, Any]],
+    answers: List[str],
+    job_text: Optional[str] = None,
+    profile: Optional[Dict[str, Any]] = None,
+) -> List[InterviewRecord]:
+    """
+    Variante non interactive de run_interview : les réponses sont fournies
+    à l'avance (réponses archivées, scoring en lot...).
+
+    Chaque réponse est associée à la question de même rang ; les questions
+    sans réponse (ou à réponse vide) sont ignorées, comme un "Passer" dans l'app.
+    Si le profil est fourni, l'évaluation utilise le contexte d'offre condensé.
+
+    Returns:
+        Une liste 'history' au même format que run_interview().
+    """
+    history: List[InterviewRecord] = []
+
+    for q_item, answer in zip(plan, answers):
+        answer = (answer or "").strip()
+        if not answer:
+            continue
+
+        question = q_item.get("question", "")
+        evaluation = evaluate_answer(
+            question=question,
+            answer=answer,
+            job_text=job_text,
+            profile=profile,
+            question_type=q_item.get("type"),
+        )
+
+        history.append(
+            InterviewRecord(
+                question=question,
+                type=q_item.get("type", "inconnu"),
+                topic=q_item.get("topic", ""),
+                answer=answer,
+                evaluation=evaluation,
+            )
+        )
+
+    return history
+
+
+# ---------- Mode adaptatif ----------
+
+def build_question_pool(
+    profile: Dict[str, Any],
+    interviewer_profile: str,
+    pool_size: int = ADAPTIVE_POOL_SIZE,
+) -> List[Dict[str, Any]]:
+    """
+    Génère (en un seul appel LLM) la réserve de questions du mode adaptatif :
+    un plan plus large que l'entretien, dans lequel on pioche ensuite.
+    """
+    return generate_interview_plan(profile, interviewer_profile, n_questions=pool_size)
+
+
+def new_adaptive_state(
+    pool: List[Dict[str, Any]],
+    length: int = DEFAULT_INTERVIEW_LENGTH,
+) -> Dict[str, Any]:
+    """
+    État du mode adaptatif (sérialisable en JSON, sauvegardé avec la session) :
+    {"pool": questions non encore posées, "length": nombre de questions visé}.
+    """
+    return {"pool": list(pool), "length": length}
+
+
+def _mentions(item: Dict[str, Any], skill: str) -> bool:
+    text = f"{item.get('topic', '')} {item.get('question', '')}".lower()
+    return skill.lower() in text
+
+
+def _uncovered(skills: List[str], asked: List[Dict[str, Any]]) -> List[str]:
+    """
+    Compétences qu'aucune des questions déjà posées n'aborde.
+    """
+    return [s for s in skills if s and not any(_mentions(q, s) for q in asked)]
+
+
+def _criterion_weakness(history: List[Dict[str, Any]]) -> Dict[str, float]:
+    """
+    Faiblesse de chaque critère (0 = toujours 5/5, 1 = toujours 1/5),
+    d'après les évaluations reçues jusqu'ici.
+    """
+    weakness: Dict[str, float] = {}
+    for criterion in CRITERION_TYPES:
+        # "evaluation" vaut None pour une réponse non évaluée (InterviewRecord)
+        scores = [(record.get("evaluation") or {}).get(criterion) for record in history]
+        values = [score for score in scores if isinstance(score, (int, float))]
+        if values:
+            mean = sum(values) / len(values)
+            weakness[criterion] = min(max((5 - mean) / 4, 0.0), 1.0)
+    return weakness
+
+
+def score_candidate(
+    item: Dict[str, Any],
+    asked: List[Dict[str, Any]],
+    history: List[Dict[str, Any]],
+    profile: Dict[str, Any],
+) -> float:
+    """
+    Intérêt d'une question de la réserve compte tenu de l'entretien en cours :
+    trous de couverture (types de questions), critères faibles, compétences
+    attendues pas encore abordées ; pénalité si le thème a déjà été traité.
+    """
+    q_type = item.get("type", "")
+    asked_types = [q.get("type", "") for q in asked]
+
+    target = TYPE_TARGETS.get(q_type, 1)
+    coverage_gap = max(target - asked_types.count(q_type), 0) / target
+
+    weakness = _criterion_weakness(history)
+    type_weakness = max(
+        (weakness.get(criterion, 0.0) for criterion, types in CRITERION_TYPES.items() if q_type in types),
+        default=0.0,
+    )
+
+    missing = _uncovered(profile.get("missing_hard_skills", []), asked)
+    overlap = _uncovered(profile.get("overlap_hard_skills", []), asked)
+
+    topic = (item.get("topic") or "").strip().lower()
+    repeated = bool(topic) and any((q.get("topic") or "").strip().lower() == topic for q in asked)
+
+    return (
+        WEIGHT_COVERAGE * coverage_gap
+        + WEIGHT_WEAKNESS * type_weakness
+        + WEIGHT_MISSING * any(_mentions(item, s) for s in missing)
+        + WEIGHT_OVERLAP * any(_mentions(item, s) for s in overlap)
+        - WEIGHT_REPEAT * repeated
+    )
+
+
+def pick_from_pool(
+    state: Dict[str, Any],
+    asked: List[Dict[str, Any]],
+    history: List[Dict[str, Any]],
+    profile: Dict[str, Any],
+) -> Optional[Dict[str, Any]]:
+    """
+    Choisit localement (sans appel LLM) la question suivante dans la réserve
+    et la retire de `state["pool"]`.
+
+    L'introduction ouvre l'entretien et la conclusion le ferme : une question
+    de conclusion n'est choisie que pour la dernière question.
+
+    Returns:
+        La question choisie, ou None si l'entretien est complet ou si la
+        réserve ne contient plus de question utilisable à ce stade.
+    """
+    pool = state["pool"]
+    remaining = state["length"] - len(asked)
+    if remaining <= 0:
+        return None
+
+    candidates = [i for i, q in enumerate(pool) if q.get("type") != "conclusion"]
+    if remaining == 1:
+        closing = [i for i, q in enumerate(pool) if q.get("type") == "conclusion"]
+        candidates = closing or candidates
+    if not candidates:
+        return None
+
+    if not asked:
+        opening = [i for i in candidates if pool[i].get("type") == "intro"]
+        candidates = opening or candidates
+
+    # À score égal, l'ordre proposé par le LLM départage
+    best = max(candidates, key=lambda i: (score_candidate(pool[i], asked, history, profile), -i))
+    registry.inc("adaptive_questions_total", source="pool")
+    return pool.pop(best)
+
+
+def next_adaptive_question(
+    state: Dict[str, Any],
+    asked: List[Dict[str, Any]],
+    history: List[Dict[str, Any]],
+    profile: Dict[str, Any],
+    interviewer_profile: str,
+) -> Optional[Dict[str, Any]]:
+    """
+    Question suivante du mode adaptatif : choisie dans la réserve, ou, si elle
+    est épuisée, demandée au LLM (generate_follow_up_question).
+
+    Returns:
+        La question, ou None si l'entretien a atteint `state["length"]` questions.
+    """
+    if len(asked) >= state["length"]:
+        return None
+    question = pick_from_pool(state, asked, history, profile)
+    if question is None:
+        registry.inc("adaptive_questions_total", source="follow_up")
+        question = generate_follow_up_question(
+            profile,
+            history,
+            interviewer_profile,
+            asked=asked,
+            focus_skills=_uncovered(profile.get("missing_hard_skills", []), asked),
+        )
+    return question
+
+
+def run_adaptive_interview(
+    profile: Dict[str, Any],
+    interviewer_profile: str,
+    job_text: Optional[str] = None,
+    n_questions: int = DEFAULT_INTERVIEW_LENGTH,
+    pool_size: int = ADAPTIVE_POOL_SIZE,
+) -> List[InterviewRecord]:
+    """
+    Variante adaptative de run_interview : au lieu de dérouler un plan figé,
+    chaque question est choisie d'après les évaluations précédentes.
+
+    Returns:
+        Une liste 'history' au même format que run_interview().
+    """
+    state = new_adaptive_state(
+        build_question_pool(profile, interviewer_profile, pool_size=pool_size),
+        length=n_questions,
+    )
+    asked: List[Dict[str, Any]] = []
+    history: List[InterviewRecord] = []
+
+    print("\n========================================")
+    print(" DÉBUT DE LA SIMULATION D'ENTRETIEN (ADAPTATIF) ")
+    print("========================================")
+    print(f"Nombre de questions prévues : {n_questions}\n")
+
+    while True:
+        q_item = next_adaptive_question(state, asked, history, profile, interviewer_profile)
+        if q_item is None:
+            break
+        asked.append(q_item)
+
+        print(f"\n>>> QUESTION {len(asked)} / {n_questions}")
+        history.append(ask_one_question(q_item, job_text=job_text))
+
+        cont = input("\nContinuer l'entretien ? (Entrée = oui, 'n' = non) : ").strip().lower()
+        if cont == "n":
+            print("\nFin anticipée de l'entretien à la demande du candidat.")
+            break
+
+    print("\n========================================")
+    print(" FIN DE LA SIMULATION D'ENTRETIEN ")
+    print("========================================\n")
+
+    return history
@@ -0,0 +1,585 @@
+"""
+File de tâches distribuée pour les traitements lourds (évaluations, rapports,
+entretiens du scoring en lot), consommée par des workers sur une ou plusieurs machines.
+
+Deux backends, même interface :
+- SQLite (développement, une machine / disque partagé) : sqlite:///data/queue/jobs.db
+- Redis (production, plusieurs machines)             : redis://hote:6379/0
+
+Garanties :
+- identifiant de tâche idempotent (par défaut : empreinte de la tâche et de ses
+  paramètres) : soumettre deux fois la même tâche ne l'exécute qu'une fois ;
+- délai de visibilité : une tâche réservée par un worker qui disparaît
+  redevient disponible à l'expiration de son bail ;
+- nouvelles tentatives avec backoff, puis statut "failed" ;
+- résultats conservés et consultables par identifiant.
+
+Usage :
+    export INTERVIEW_QUEUE_URL=sqlite:///data/queue/jobs.db
+    python -m src.job_queue worker --threads 4
+    python -m src.job_queue stats
+"""
+import argparse
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from src.instrumentation import registry, span
+
+# URL de la file (si absente, l'application et le scoring en lot traitent tout localement)
+QUEUE_URL_ENV = "INTERVIEW_QUEUE_URL"
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_VISIBILITY_TIMEOUT_S = 300.0
+RETRY_BASE_DELAY_S = 2.0
+# Durée de conservation des résultats côté Redis
+RESULT_TTL_S = 7 * 24 * 3600
+
+STATUSES = ("queued", "running", "done", "failed")
+
+
+# ---------- Tâches exécutables ----------
+
+def _task_evaluate(payload: Dict[str, Any]) -> Any:
+    from src.evaluator import evaluate_prepared
+    return evaluate_prepared(payload["prepared"], payload["answer"])
+
+
+def _task_report(payload: Dict[str, Any]) -> Any:
+    from src.final_report import generate_final_report
+    return generate_final_report(payload["history"], mode=payload.get("mode", "hybrid"))
+
+
+def _task_batch_item(payload: Dict[str, Any]) -> Any:
+    from src.batch_runner import process_item
+    result = process_item(payload["item"], **payload.get("options", {}))
+    # process_item ne lève pas : une erreur doit passer par fail() (nouvelle
+    # tentative, puis "failed") plutôt qu'être conservée comme résultat
+    if result.get("status") == "error":
+        raise RuntimeError(result.get("error") or "échec du traitement de l'entretien")
+    return result
+
+
+# Nom de tâche -> fonction (paramètres et résultat sérialisables en JSON)
+TASKS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "evaluate": _task_evaluate,
+    "report": _task_report,
+    "batch_item": _task_batch_item,
+}
+
+
+def task_id_for(task: str, payload: Dict[str, Any]) -> str:
+    """
+    Identifiant déterministe d'une tâche : même tâche + mêmes paramètres = même id.
+    """
+    canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return f"{task}:" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+def _retry_delay(attempts: int) -> float:
+    return RETRY_BASE_DELAY_S * (2 ** max(attempts - 1, 0))
+
+
+class JobQueue:
+    """
+    Interface commune des backends. Un job est un dict :
+    {"id", "task", "payload", "status", "attempts", "max_attempts", "result", "error"}.
+    """
+
+    def enqueue(
+        self,
+        task: str,
+        payload: Dict[str, Any],
+        task_id: Optional[str] = None,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ) -> str:
+        raise NotImplementedError
+
+    def claim(self, worker_id: str, visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT_S) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def complete(self, task_id: str, worker_id: str, result: Any) -> bool:
+        raise NotImplementedError
+
+    def fail(self, task_id: str, worker_id: str, error: str) -> bool:
+        raise NotImplementedError
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        raise NotImplementedError
+
+    def wait(self, task_id: str, timeout: Optional[float] = None, poll_interval: float = 0.2) -> Any:
+        """
+        Attend la fin d'une tâche et renvoie son résultat.
+
+        Raises:
+            RuntimeError: si la tâche a échoué (toutes tentatives épuisées).
+            TimeoutError: si `timeout` secondes s'écoulent avant la fin.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = min(0.05, poll_interval)
+        while True:
+            job = self.get(task_id)
+            if job is None:
+                raise KeyError(f"Tâche inconnue : {task_id}")
+            if job["status"] == "done":
+                return job["result"]
+            if job["status"] == "failed":
+                raise RuntimeError(f"Tâche {task_id} en échec : {job['error']}")
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Tâche {task_id} non terminée après {timeout:.0f} s.")
+            time.sleep(delay)
+            delay = min(delay * 2, poll_interval)
+
+    def run(
+        self,
+        task: str,
+        payload: Dict[str, Any],
+        task_id: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """
+        Soumet une tâche (idempotent) et attend son résultat.
+        """
+        return self.wait(self.enqueue(task, payload, task_id=task_id), timeout=timeout)
+
+
+# ---------- Backend SQLite ----------
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id           TEXT PRIMARY KEY,
+    task         TEXT NOT NULL,
+    payload      TEXT NOT NULL,
+    status       TEXT NOT NULL DEFAULT 'queued',
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_until  REAL,
+    worker       TEXT,
+    result       TEXT,
+    error        TEXT,
+    created_at   REAL NOT NULL,
+    updated_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at);
+"""
+
+_SQLITE_COLUMNS = "id, task, payload, status, attempts, max_attempts, result, error"
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    File dans une base SQLite (mode WAL) : plusieurs processus d'une même
+    machine, ou d'un disque partagé, peuvent produire et consommer.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SQLITE_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _row_to_job(row) -> Dict[str, Any]:
+        job_id, task, payload, status, attempts, max_attempts, result, error = row
+        return {
+            "id": job_id,
+            "task": task,
+            "payload": json.loads(payload),
+            "status": status,
+            "attempts": attempts,
+            "max_attempts": max_attempts,
+            "result": json.loads(result) if result is not None else None,
+            "error": error,
+        }
+
+    def enqueue(self, task, payload, task_id=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        if task not in TASKS:
+            raise ValueError(f"Tâche inconnue : {task}")
+        task_id = task_id or task_id_for(task, payload)
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO jobs (id, task, payload, max_attempts, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (task_id, task, json.dumps(payload, ensure_ascii=False), max_attempts, now, now, now),
+            ).rowcount
+            if not inserted:
+                # Déjà connue : on ne relance qu'une tâche en échec définitif
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', attempts = 0, available_at = ?, error = NULL, "
+                    "updated_at = ? WHERE id = ? AND status = 'failed'",
+                    (now, now, task_id),
+                )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        registry.inc("queue_enqueued_total", task=task, result="new" if inserted else "duplicate")
+        return task_id
+
+    def claim(self, worker_id, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT_S):
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Baux expirés dont les tentatives sont épuisées : échec définitif
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'délai de visibilité dépassé', updated_at = ? "
+                "WHERE status = 'running' AND lease_until <= ? AND attempts >= max_attempts",
+                (now, now),
+            )
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE (status = 'queued' AND available_at <= ?) "
+                "OR (status = 'running' AND lease_until <= ?) ORDER BY available_at LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_until = ?, "
+                "worker = ?, updated_at = ? WHERE id = ?",
+                (now + visibility_timeout, worker_id, now, row[0]),
+            )
+            job_row = conn.execute(f"SELECT {_SQLITE_COLUMNS} FROM jobs WHERE id = ?", (row[0],)).fetchone()
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return self._row_to_job(job_row)
+
+    def complete(self, task_id, worker_id, result):
+        with self._connect() as conn:
+            updated = conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (json.dumps(result, ensure_ascii=False), time.time(), task_id, worker_id),
+            ).rowcount
+        return bool(updated)
+
+    def fail(self, task_id, worker_id, error):
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND worker = ? AND status = 'running'",
+                (task_id, worker_id),
+            ).fetchone()
+            if row is not None:
+                attempts, max_attempts = row
+                if attempts < max_attempts:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'queued', available_at = ?, lease_until = NULL, error = ?, "
+                        "updated_at = ? WHERE id = ?",
+                        (now + _retry_delay(attempts), error, now, task_id),
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'failed', lease_until = NULL, error = ?, updated_at = ? "
+                        "WHERE id = ?",
+                        (error, now, task_id),
+                    )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return row is not None
+
+    def get(self, task_id):
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {_SQLITE_COLUMNS} FROM jobs WHERE id = ?", (task_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def stats(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in STATUSES}
+        counts.update(dict(rows))
+        return counts
+
+    def purge(self, older_than_s: float = RESULT_TTL_S) -> int:
+        """
+        Supprime les tâches terminées (ou en échec) plus anciennes que `older_than_s`.
+        """
+        with self._connect() as conn:
+            return conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+                (time.time() - older_than_s,),
+            ).rowcount
+
+
+# ---------- Backend Redis ----------
+
+# Tous les changements d'état sont des scripts Lua (atomiques côté serveur).
+_REDIS_ENQUEUE = """
+local key = ARGV[1] .. ARGV[2]
+if redis.call('EXISTS', key) == 1 then
+    if redis.call('HGET', key, 'status') == 'failed' then
+        redis.call('HSET', key, 'status', 'queued', 'attempts', 0, 'error', '')
+        redis.call('PERSIST', key)
+        redis.call('ZADD', KEYS[1], ARGV[3], ARGV[2])
+    end
+    return 0
+end
+redis.call('HSET', key, 'task', ARGV[4], 'payload', ARGV[5], 'status', 'queued',
+           'attempts', 0, 'max_attempts', ARGV[6])
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[2])
+return 1
+"""
+
+_REDIS_CLAIM = """
+local now = tonumber(ARGV[1])
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)
+for _, id in ipairs(expired) do
+    local key = ARGV[4] .. id
+    redis.call('ZREM', KEYS[2], id)
+    if tonumber(redis.call('HGET', key, 'attempts')) >= tonumber(redis.call('HGET', key, 'max_attempts')) then
+        redis.call('HSET', key, 'status', 'failed', 'error', 'délai de visibilité dépassé')
+        redis.call('EXPIRE', key, ARGV[5])
+    else
+        -- Remise en file : l'ancien worker n'est plus propriétaire de la tâche
+        redis.call('HSET', key, 'status', 'queued', 'worker', '')
+        redis.call('ZADD', KEYS[1], now, id)
+    end
+end
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now, 'LIMIT', 0, 1)
+if #ids == 0 then
+    return false
+end
+local id = ids[1]
+local key = ARGV[4] .. id
+redis.call('ZREM', KEYS[1], id)
+redis.call('HINCRBY', key, 'attempts', 1)
+redis.call('HSET', key, 'status', 'running', 'worker', ARGV[3])
+redis.call('ZADD', KEYS[2], now + tonumber(ARGV[2]), id)
+return id
+"""
+
+_REDIS_COMPLETE = """
+local key = ARGV[1] .. ARGV[2]
+-- Seul le détenteur du bail en cours peut conclure la tâche
+if redis.call('HGET', key, 'worker') ~= ARGV[3] or redis.call('HGET', key, 'status') ~= 'running'
+        or not redis.call('ZSCORE', KEYS[2], ARGV[2]) then
+    return 0
+end
+redis.call('ZREM', KEYS[2], ARGV[2])
+redis.call('HSET', key, 'status', 'done', 'result', ARGV[4], 'error', '')
+redis.call('EXPIRE', key, ARGV[5])
+return 1
+"""
+
+_REDIS_FAIL = """
+local key = ARGV[1] .. ARGV[2]
+-- Seul le détenteur du bail en cours peut conclure la tâche
+if redis.call('HGET', key, 'worker') ~= ARGV[3] or redis.call('HGET', key, 'status') ~= 'running'
+        or not redis.call('ZSCORE', KEYS[2], ARGV[2]) then
+    return 0
+end
+redis.call('ZREM', KEYS[2], ARGV[2])
+local attempts = tonumber(redis.call('HGET', key, 'attempts'))
+if attempts < tonumber(redis.call('HGET', key, 'max_attempts')) then
+    redis.call('HSET', key, 'status', 'queued', 'error', ARGV[4])
+    redis.call('ZADD', KEYS[1], tonumber(ARGV[6]) + tonumber(ARGV[7]) * 2 ^ (attempts - 1), ARGV[2])
+else
+    redis.call('HSET', key, 'status', 'failed', 'error', ARGV[4])
+    redis.call('EXPIRE', key, ARGV[5])
+end
+return 1
+"""
+
+
+class RedisJobQueue(JobQueue):
+    """
+    File dans Redis (ou un serveur compatible) : un hash par tâche, un ensemble
+    trié des tâches prêtes (score = date de disponibilité) et un des baux en
+    cours (score = expiration du bail).
+    """
+
+    def __init__(self, url: str, prefix: str = "interview:queue:") -> None:
+        # Import paresseux : le chemin SQLite (ou sans file) ne charge pas redis
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("Le backend Redis nécessite le paquet 'redis' (pip install redis).")
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self.job_prefix = prefix + "job:"
+        self.ready_key = prefix + "ready"
+        self.leases_key = prefix + "leases"
+        self._enqueue = self.client.register_script(_REDIS_ENQUEUE)
+        self._claim = self.client.register_script(_REDIS_CLAIM)
+        self._complete = self.client.register_script(_REDIS_COMPLETE)
+        self._fail = self.client.register_script(_REDIS_FAIL)
+
+    def enqueue(self, task, payload, task_id=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        if task not in TASKS:
+            raise ValueError(f"Tâche inconnue : {task}")
+        task_id = task_id or task_id_for(task, payload)
+        inserted = self._enqueue(
+            keys=[self.ready_key],
+            args=[self.job_prefix, task_id, time.time(), task, json.dumps(payload, ensure_ascii=False), max_attempts],
+        )
+        registry.inc("queue_enqueued_total", task=task, result="new" if inserted else "duplicate")
+        return task_id
+
+    def claim(self, worker_id, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT_S):
+        task_id = self._claim(
+            keys=[self.ready_key, self.leases_key],
+            args=[time.time(), visibility_timeout, worker_id, self.job_prefix, RESULT_TTL_S],
+        )
+        return self.get(task_id) if task_id else None
+
+    def complete(self, task_id, worker_id, result):
+        return bool(self._complete(
+            keys=[self.ready_key, self.leases_key],
+            args=[self.job_prefix, task_id, worker_id, json.dumps(result, ensure_ascii=False), RESULT_TTL_S],
+        ))
+
+    def fail(self, task_id, worker_id, error):
+        return bool(self._fail(
+            keys=[self.ready_key, self.leases_key],
+            args=[self.job_prefix, task_id, worker_id, error, RESULT_TTL_S, time.time(), RETRY_BASE_DELAY_S],
+        ))
+
+    def get(self, task_id):
+        data = self.client.hgetall(self.job_prefix + task_id)
+        if not data:
+            return None
+        return {
+            "id": task_id,
+            "task": data.get("task"),
+            "payload": json.loads(data.get("payload") or "null"),
+            "status": data.get("status"),
+            "attempts": int(data.get("attempts") or 0),
+            "max_attempts": int(data.get("max_attempts") or DEFAULT_MAX_ATTEMPTS),
+            "result": json.loads(data["result"]) if data.get("result") else None,
+            "error": data.get("error") or None,
+        }
+
+    def stats(self):
+        # Les tâches terminées expirent : seules les files en cours sont décomptées
+        return {
+            "queued": self.client.zcard(self.ready_key),
+            "running": self.client.zcard(self.leases_key),
+        }
+
+
+def open_queue(url: str) -> JobQueue:
+    """
+    Ouvre une file à partir de son URL (sqlite:///chemin.db ou redis://...).
+    """
+    if url.startswith("sqlite:///"):
+        return SQLiteJobQueue(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisJobQueue(url)
+    raise ValueError(f"URL de file non supportée : {url}")
+
+
+def queue_from_env() -> Optional[JobQueue]:
+    """
+    File configurée par INTERVIEW_QUEUE_URL, ou None (traitement local).
+    """
+    url = os.getenv(QUEUE_URL_ENV)
+    return open_queue(url) if url else None
+
+
+# ---------- Worker ----------
+
+def process_one(queue: JobQueue, worker_id: str, visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT_S) -> bool:
+    """
+    Réserve et exécute une tâche. Renvoie False si la file est vide.
+    """
+    job = queue.claim(worker_id, visibility_timeout)
+    if job is None:
+        return False
+
+    with span("queue_job", task=job["task"], attempt=job["attempts"]):
+        try:
+            result = TASKS[job["task"]](job["payload"])
+        except Exception as e:
+            queue.fail(job["id"], worker_id, f"{type(e).__name__}: {e}")
+            registry.inc("queue_jobs_total", task=job["task"], result="error")
+            return True
+
+    if queue.complete(job["id"], worker_id, result):
+        registry.inc("queue_jobs_total", task=job["task"], result="ok")
+    else:
+        # Bail expiré pendant l'exécution : un autre worker a repris la tâche
+        registry.inc("queue_jobs_total", task=job["task"], result="lease_lost")
+    return True
+
+
+def run_worker(
+    queue: JobQueue,
+    worker_id: Optional[str] = None,
+    visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT_S,
+    poll_interval: float = 0.5,
+    stop: Optional[threading.Event] = None,
+) -> None:
+    """
+    Boucle de consommation : exécute les tâches disponibles, attend
+    `poll_interval` secondes quand la file est vide, jusqu'à `stop`.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        if not process_one(queue, worker_id, visibility_timeout):
+            stop.wait(poll_interval)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="File de tâches distribuée (workers et état).")
+    parser.add_argument("command", choices=["worker", "stats"])
+    parser.add_argument("--url", default=os.getenv(QUEUE_URL_ENV), help="URL de la file (sinon INTERVIEW_QUEUE_URL).")
+    parser.add_argument("--threads", type=int, default=2, help="Boucles de consommation par processus.")
+    parser.add_argument("--visibility-timeout", type=float, default=DEFAULT_VISIBILITY_TIMEOUT_S)
+    args = parser.parse_args(argv)
+
+    if not args.url:
+        parser.error("URL de file manquante (--url ou INTERVIEW_QUEUE_URL).")
+    queue = open_queue(args.url)
+
+    if args.command == "stats":
+        print(json.dumps(queue.stats(), indent=2))
+        return
+
+    stop = threading.Event()
+    threads = [
+        threading.Thread(
+            target=run_worker,
+            args=(queue,),
+            kwargs={"visibility_timeout": args.visibility_timeout, "stop": stop},
+            daemon=True,
+        )
+        for _ in range(args.threads)
+    ]
+    for thread in threads:
+        thread.start()
+    print(f"Worker démarré ({args.threads} threads) sur {args.url}")
+    try:
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        stop.set()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import json
+import re
+from typing import Any, List, Optional, Tuple
+
+# Guillemets typographiques parfois produits par le LLM à la place de '"'
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "„": '"', "«": '"', "»": '"'})
+
+_FENCE_RE = re.compile(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", re.DOTALL)
+
+# Nombre maximal de coupes essayées pour réparer une sortie tronquée
+_MAX_TRUNCATION_CUTS = 20
+
+
+class JSONExtractionError(ValueError):
+    """
+    Aucun JSON exploitable n'a pu être extrait de la sortie du modèle.
+    """
+
+
+def _strip_fences(text: str) -> str:
+    match = _FENCE_RE.search(text)
+    if match and match.group(1).strip():
+        return match.group(1)
+    return text
+
+
+def _scan(text: str, start: int) -> Tuple[Optional[int], List[Tuple[int, str]], str, bool]:
+    """
+    Parcourt `text` depuis `start` (un '{' ou '[') en suivant les chaînes et
+    les échappements.
+
+    Returns:
+        (fin, virgules, pile, dans_chaine) où `fin` est l'index juste après la
+        structure équilibrée (None si le texte est tronqué), `virgules` la liste
+        (position, pile à cet instant) des virgules hors chaînes, `pile` les
+        ouvrants restants et `dans_chaine` si le texte s'arrête dans une chaîne.
+    """
+    stack: List[str] = []
+    commas: List[Tuple[int, str]] = []
+    in_string = False
+    escaped = False
+
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append(ch)
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                return i + 1, commas, "", False
+        elif ch == ",":
+            commas.append((i, "".join(stack)))
+
+    return None, commas, "".join(stack), in_string
+
+
+def _closers(stack: str) -> str:
+    return "".join("}" if ch == "{" else "]" for ch in reversed(stack))
+
+
+def _remove_trailing_commas(text: str) -> str:
+    """
+    Supprime les virgules suivies (aux espaces près) d'un '}' ou ']', hors chaînes.
+    """
+    out: List[str] = []
+    in_string = False
+    escaped = False
+    for i, ch in enumerate(text):
+        if in_string:
+            out.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch == ",":
+            rest = text[i + 1:].lstrip()
+            if rest[:1] in ("}", "]"):
+                continue
+        out.append(ch)
+    return "".join(out)
+
+
+def _try_loads(candidate: str) -> Tuple[bool, Any]:
+    for variant in (candidate, _remove_trailing_commas(candidate)):
+        try:
+            return True, json.loads(variant)
+        except json.JSONDecodeError:
+            continue
+    return False, None
+
+
+def _repair_truncated(text: str, commas: List[Tuple[int, str]], stack: str, in_string: bool) -> Tuple[bool, Any]:
+    """
+    Répare une sortie coupée (max_tokens atteint) : ferme la chaîne et les
+    structures ouvertes, puis, si besoin, abandonne le dernier élément incomplet
+    en coupant à la virgule précédente.
+    """
+    body = text.rstrip()
+    if in_string:
+        body += '"'
+    ok, value = _try_loads(body + _closers(stack))
+    if ok:
+        return True, value
+
+    for pos, stack_at_comma in reversed(commas[-_MAX_TRUNCATION_CUTS:]):
+        ok, value = _try_loads(text[:pos] + _closers(stack_at_comma))
+        if ok:
+            return True, value
+    return False, None
+
+
+def extract_json(raw: str) -> Any:
+    """
+    Extrait le premier objet ou tableau JSON d'une sortie de LLM, en tolérant :
+    - le texte autour (prose, balises ```json ... ```),
+    - les virgules finales ("[1, 2,]"),
+    - les guillemets typographiques utilisés comme délimiteurs,
+    - une sortie tronquée (structures non fermées).
+
+    Raises:
+        JSONExtractionError: si aucune de ces réparations ne suffit.
+    """
+    text = raw.strip()
+    # Sortie déjà valide : aucune réparation (des ``` peuvent figurer dans une chaîne)
+    ok, value = _try_loads(text)
+    if ok:
+        return value
+
+    if text.startswith("```"):
+        text = _strip_fences(text)
+        ok, value = _try_loads(text.strip())
+        if ok:
+            return value
+
+    for source in (text, text.translate(_SMART_QUOTES)):
+        starts = [i for i in (source.find("{"), source.find("[")) if i != -1]
+        if not starts:
+            continue
+        start = min(starts)
+
+        end, commas, stack, in_string = _scan(source, start)
+        if end is not None:
+            ok, value = _try_loads(source[start:end])
+        else:
+            ok, value = _repair_truncated(
+                source[start:],
+                [(pos - start, st) for pos, st in commas],
+                stack,
+                in_string,
+            )
+        if ok:
+            return value
+
+    raise JSONExtractionError("aucun objet ou tableau JSON valide trouvé dans la réponse")
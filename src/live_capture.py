@@ -0,0 +1,327 @@
+import io
+import threading
+import time
+import wave
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+import numpy as np
+
+from src.instrumentation import registry
+from src.scheduler import SchedulerBusy
+
+# Format envoyé à la transcription : PCM 16 bits mono 16 kHz (ce qu'attend Whisper)
+TARGET_SAMPLE_RATE = 16000
+FRAME_MS = 20
+FRAME_SAMPLES = TARGET_SAMPLE_RATE * FRAME_MS // 1000
+
+# Historique audio conservé (doit couvrir la plus longue prise de parole + pré-roll)
+RING_SECONDS = 30
+
+# Détection d'activité vocale (VAD) par énergie, avec plancher de bruit adaptatif
+SPEECH_MARGIN_DB = 10.0      # au-dessus du bruit de fond = parole
+MIN_SPEECH_DB = -50.0        # en dessous (dBFS), jamais considéré comme de la parole
+NOISE_FLOOR_INIT_DB = -60.0
+NOISE_FLOOR_ALPHA = 0.05     # vitesse d'adaptation du plancher de bruit
+SPEECH_START_FRAMES = 3      # trames voisées consécutives pour ouvrir un segment
+
+# Découpage en segments envoyés à la transcription pendant que le candidat parle
+SILENCE_END_MS = 600         # un silence de cette durée clôt le segment
+MAX_UTTERANCE_S = 15         # segment forcé au-delà (longs monologues)
+MIN_UTTERANCE_MS = 300       # segments plus courts ignorés (clics, souffle)
+PRE_ROLL_MS = 200            # audio gardé avant le début détecté de la parole
+
+# Segments refusés par l'ordonnanceur (file pleine), renvoyés à la trame suivante
+MAX_DEFERRED_SEGMENTS = 8    # au-delà, le plus ancien est abandonné
+DEFERRED_RETRY_S = 0.05      # intervalle des nouvelles tentatives dans finish()
+
+
+class RingBuffer:
+    """
+    Tampon circulaire d'échantillons int16, adressé par position absolue
+    (nombre d'échantillons reçus depuis le début) : un segment se relit par
+    (début, fin) sans copier les trames au fil de l'eau.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self._data = np.zeros(capacity, dtype=np.int16)
+        self.capacity = capacity
+        self.written = 0
+
+    def append(self, samples: np.ndarray) -> None:
+        samples = samples[-self.capacity:]
+        start = self.written % self.capacity
+        first = min(len(samples), self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        self._data[:len(samples) - first] = samples[first:]
+        self.written += len(samples)
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        """
+        Échantillons [start, end) ; le début est ramené à la fenêtre encore disponible.
+        """
+        start = max(start, self.written - self.capacity, 0)
+        end = min(end, self.written)
+        if end <= start:
+            return np.zeros(0, dtype=np.int16)
+        indices = np.arange(start, end) % self.capacity
+        return self._data[indices]
+
+
+class EnergyVAD:
+    """
+    Détection d'activité vocale par énergie RMS : une trame est voisée si elle
+    dépasse le bruit de fond de SPEECH_MARGIN_DB. Le bruit de fond suit les
+    trames non voisées (moyenne exponentielle), pour s'adapter au micro et à la pièce.
+    """
+
+    def __init__(self) -> None:
+        self.noise_floor_db = NOISE_FLOOR_INIT_DB
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        rms = np.sqrt(np.mean(frame.astype(np.float64) ** 2)) / 32768.0
+        level_db = 20.0 * np.log10(max(rms, 1e-9))
+        speech = level_db >= max(self.noise_floor_db + SPEECH_MARGIN_DB, MIN_SPEECH_DB)
+        if not speech:
+            self.noise_floor_db += NOISE_FLOOR_ALPHA * (level_db - self.noise_floor_db)
+        return bool(speech)
+
+
+def to_mono_16k(samples: np.ndarray, sample_rate: int, channels: int = 1) -> np.ndarray:
+    """
+    Convertit des échantillons (entrelacés si `channels` > 1) en int16 mono 16 kHz.
+    """
+    data = np.asarray(samples)
+    if data.dtype.kind == "f":
+        data = np.clip(data, -1.0, 1.0) * 32767.0
+    data = data.astype(np.float64).reshape(-1)
+    if channels > 1:
+        data = data[: len(data) - len(data) % channels].reshape(-1, channels).mean(axis=1)
+
+    if sample_rate != TARGET_SAMPLE_RATE and len(data):
+        ratio = sample_rate / TARGET_SAMPLE_RATE
+        if ratio == int(ratio):
+            # Cas courant (48 kHz -> 16 kHz) : moyenne par groupe, filtre passe-bas simple
+            step = int(ratio)
+            data = data[: len(data) - len(data) % step].reshape(-1, step).mean(axis=1)
+        else:
+            n_out = int(len(data) / ratio)
+            data = np.interp(np.arange(n_out) * ratio, np.arange(len(data)), data)
+    return np.clip(np.round(data), -32768, 32767).astype(np.int16)
+
+
+def frame_to_mono_16k(frame: Any) -> np.ndarray:
+    """
+    Convertit une trame audio PyAV (reçue par streamlit-webrtc) en int16 mono 16 kHz.
+    """
+    channels = len(frame.layout.channels)
+    data = frame.to_ndarray()
+    if not frame.format.is_packed and channels > 1:
+        # Format planaire : un plan par canal -> entrelacé
+        data = data.T
+    return to_mono_16k(data, frame.sample_rate, channels)
+
+
+def pcm_to_wav(pcm: np.ndarray, sample_rate: int = TARGET_SAMPLE_RATE) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+class LiveTranscriber:
+    """
+    Transcription au fil de l'eau d'un enregistrement micro.
+
+    Les trames reçues sont converties en mono 16 kHz et écrites dans un tampon
+    circulaire ; une VAD par énergie découpe la parole en segments (fin sur
+    silence, ou segment forcé au-delà de MAX_UTTERANCE_S). Chaque segment
+    terminé part aussitôt à la transcription via `submit` (ex : le
+    FairScheduler), pendant que le candidat continue de parler : à l'arrêt,
+    il ne reste que le dernier segment à transcrire.
+
+    Un segment refusé par `submit` (SchedulerBusy : file de la session pleine)
+    est gardé et renvoyé à la trame suivante, puis dans finish(), dans l'ordre
+    de parole ; aucune exception ne remonte à l'appelant de push*().
+
+    Args:
+        submit: fonction qui prend un WAV (bytes) et renvoie un Future du texte.
+    """
+
+    def __init__(self, submit: Callable[[bytes], Future]) -> None:
+        self._submit = submit
+        self._lock = threading.Lock()
+        self._ring = RingBuffer(RING_SECONDS * TARGET_SAMPLE_RATE)
+        self._vad = EnergyVAD()
+        self._pending = np.zeros(0, dtype=np.int16)
+        self._chunks: List[Future] = []
+        self._deferred: List[bytes] = []
+        self._speech_start: Optional[int] = None
+        # Fin du dernier segment envoyé : le suivant ne la chevauche pas
+        self._last_end = 0
+        self._voiced_run = 0
+        self._voiced_frames = 0
+        self._silence_run = 0
+        self.active = False
+
+    def push(self, samples: np.ndarray, sample_rate: int = TARGET_SAMPLE_RATE, channels: int = 1) -> None:
+        """
+        Ajoute des échantillons reçus du micro (n'importe quel taux / nombre de canaux).
+        """
+        self.push_mono_16k(to_mono_16k(samples, sample_rate, channels))
+
+    def push_frame(self, frame: Any) -> None:
+        """
+        Ajoute une trame PyAV (streamlit-webrtc).
+        """
+        self.push_mono_16k(frame_to_mono_16k(frame))
+
+    def push_mono_16k(self, samples: np.ndarray) -> None:
+        with self._lock:
+            self.active = True
+            self._flush_deferred()
+            data = np.concatenate([self._pending, samples]) if len(self._pending) else samples
+            n_frames = len(data) // FRAME_SAMPLES
+            for i in range(n_frames):
+                self._process_frame(data[i * FRAME_SAMPLES:(i + 1) * FRAME_SAMPLES])
+            self._pending = data[n_frames * FRAME_SAMPLES:]
+
+    def _process_frame(self, frame: np.ndarray) -> None:
+        # Appelé avec le verrou
+        self._ring.append(frame)
+        position = self._ring.written
+        speech = self._vad.is_speech(frame)
+
+        if self._speech_start is None:
+            self._voiced_run = self._voiced_run + 1 if speech else 0
+            if self._voiced_run >= SPEECH_START_FRAMES:
+                pre_roll = (SPEECH_START_FRAMES * FRAME_MS + PRE_ROLL_MS) * TARGET_SAMPLE_RATE // 1000
+                self._speech_start = max(position - pre_roll, self._last_end, 0)
+                self._voiced_frames = self._voiced_run
+                self._silence_run = 0
+            return
+
+        if speech:
+            self._voiced_frames += 1
+            self._silence_run = 0
+        else:
+            self._silence_run += 1
+        length = position - self._speech_start
+        if self._silence_run * FRAME_MS >= SILENCE_END_MS:
+            # Le silence final n'est pas envoyé (on en garde PRE_ROLL_MS)
+            trailing = (SILENCE_END_MS - PRE_ROLL_MS) * TARGET_SAMPLE_RATE // 1000
+            self._emit(self._speech_start, position - trailing, reason="silence")
+        elif length >= MAX_UTTERANCE_S * TARGET_SAMPLE_RATE:
+            self._emit(self._speech_start, position, reason="max_length")
+
+    def _emit(self, start: int, end: int, reason: str) -> None:
+        # Appelé avec le verrou : envoie le segment [start, end) à la transcription
+        voiced_ms = self._voiced_frames * FRAME_MS
+        self._speech_start = None
+        self._voiced_run = 0
+        self._voiced_frames = 0
+        self._silence_run = 0
+        self._last_end = end
+        if voiced_ms < MIN_UTTERANCE_MS:
+            registry.inc("live_segments_total", result="too_short")
+            return
+        pcm = self._ring.read(start, end)
+        registry.inc("live_segments_total", result=reason)
+        registry.observe("live_segment_seconds", len(pcm) / TARGET_SAMPLE_RATE)
+        if len(self._deferred) >= MAX_DEFERRED_SEGMENTS:
+            self._deferred.pop(0)
+            registry.inc("live_segments_dropped_total")
+        self._deferred.append(pcm_to_wav(pcm))
+        self._flush_deferred()
+
+    def _flush_deferred(self) -> bool:
+        # Appelé avec le verrou : envoie les segments en attente, dans l'ordre,
+        # jusqu'au premier refus. Renvoie True si plus rien n'attend.
+        while self._deferred:
+            try:
+                future = self._submit(self._deferred[0])
+            except SchedulerBusy:
+                registry.inc("live_segments_busy_total")
+                return False
+            self._chunks.append(future)
+            self._deferred.pop(0)
+        return True
+
+    def _texts(self, wait: bool, timeout: Optional[float] = None) -> Tuple[List[str], int]:
+        texts: List[str] = []
+        pending = 0
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for future in list(self._chunks):
+            if wait:
+                remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+                try:
+                    future.result(timeout=remaining)
+                except Exception:
+                    pass
+            if not future.done():
+                pending += 1
+                continue
+            if future.exception() is None and future.result():
+                texts.append(future.result().strip())
+        return texts, pending
+
+    def transcript(self) -> str:
+        """
+        Texte des segments déjà transcrits, dans l'ordre de parole.
+        """
+        texts, _ = self._texts(wait=False)
+        return " ".join(texts)
+
+    def pending(self) -> int:
+        """
+        Nombre de segments envoyés dont la transcription n'est pas encore revenue.
+        """
+        return self._texts(wait=False)[1]
+
+    def finish(self, timeout: Optional[float] = None) -> str:
+        """
+        Fin de l'enregistrement : envoie le segment en cours, attend les
+        transcriptions restantes et renvoie le texte complet.
+        """
+        t0 = time.perf_counter()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            if self._speech_start is not None:
+                self._emit(self._speech_start, self._ring.written, reason="stop")
+            self._pending = np.zeros(0, dtype=np.int16)
+            self.active = False
+
+        # Segments refusés : nouvelles tentatives jusqu'au délai, le reste est abandonné
+        while True:
+            with self._lock:
+                if self._flush_deferred():
+                    break
+                if deadline is not None and time.monotonic() >= deadline:
+                    registry.inc("live_segments_dropped_total", len(self._deferred))
+                    self._deferred = []
+                    break
+            time.sleep(DEFERRED_RETRY_S)
+
+        remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+        texts, pending = self._texts(wait=True, timeout=remaining)
+        registry.observe("live_finish_wait_seconds", time.perf_counter() - t0)
+        errors = sum(1 for f in self._chunks if f.done() and f.exception() is not None)
+        if errors:
+            registry.inc("live_segment_errors_total", errors)
+        if pending:
+            registry.inc("live_segments_timed_out_total", pending)
+        return " ".join(texts)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._chunks = []
+            self._deferred = []
+            self._speech_start = None
+            self._voiced_run = 0
+            self._voiced_frames = 0
+            self._silence_run = 0
+            self._pending = np.zeros(0, dtype=np.int16)
+            self.active = False
@@ -1,14 +1,97 @@
-import os
+import functools
 import json
+import os
+import threading
+import time
 import requests
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Set
+
+from src.instrumentation import record_llm_usage, record_retry, registry, span
+from src.json_extract import JSONExtractionError, extract_json
+from src.token_budget import budgets, estimate_tokens, fit_messages
 
-# URL de l'API Groq
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+# URL de l'API Groq (GROQ_API_BASE permet de pointer vers un serveur compatible, ex : benchmarks)
+GROQ_API_BASE = os.getenv("GROQ_API_BASE", "https://api.groq.com/openai/v1").rstrip("/")
+GROQ_API_URL = f"{GROQ_API_BASE}/chat/completions"
 
 # Modèle par défaut (modifie selon ton besoin)
 DEFAULT_MODEL = "llama-3.3-70b-versatile"
 
+# Routage des points d'appel vers des gammes de modèles (surchargeable par fichier JSON)
+MODEL_ROUTES_PATH = os.getenv(
+    "GROQ_MODEL_ROUTES",
+    os.path.join("data", "configs", "model_routes.json"),
+)
+
+DEFAULT_ROUTING: Dict[str, Any] = {
+    # Gammes de modèles, de la plus rapide à la plus capable (ordre d'escalade)
+    "tiers": {"fast": "llama-3.1-8b-instant", "large": DEFAULT_MODEL},
+    "escalation": ["fast", "large"],
+    "routes": {
+        "extract_cv": "fast",
+        "extract_job": "fast",
+        "fit_summary": "fast",
+        "plan": "large",
+        "follow_up": "large",
+        "conversation": "large",
+        "conversation_notes": "fast",
+        "evaluate": "large",
+        "report": "fast",
+        "report_full": "large",
+    },
+    "default_tier": "large",
+    # Prix en $ par million de tokens (entrée, sortie)
+    "prices": {
+        "llama-3.1-8b-instant": [0.05, 0.08],
+        "llama-3.3-70b-versatile": [0.59, 0.79],
+    },
+}
+
+# Délai maximal d'une requête HTTP vers l'API (connexion + réponse), en secondes
+HTTP_TIMEOUT_S = float(os.getenv("GROQ_HTTP_TIMEOUT", "60"))
+
+_local = threading.local()
+
+# Nouvelles tentatives sur erreurs transitoires (quota dépassé, surcharge)
+MAX_RETRIES = 2
+RETRY_STATUS_CODES = (429, 500, 502, 503)
+# Attente maximale avant une nouvelle tentative, quel que soit l'en-tête Retry-After :
+# un worker de l'ordonnanceur et la requête de l'utilisateur restent bloqués pendant ce temps
+MAX_RETRY_AFTER_S = 10.0
+
+# Modèles acceptant les sorties structurées (response_format "json_schema") ;
+# les autres reçoivent le mode JSON simple ("json_object") + le schéma dans le prompt système.
+STRUCTURED_OUTPUT_MODELS = frozenset(
+    m.strip()
+    for m in os.getenv(
+        "GROQ_STRUCTURED_OUTPUT_MODELS",
+        "openai/gpt-oss-20b,openai/gpt-oss-120b,moonshotai/kimi-k2-instruct,"
+        "meta-llama/llama-4-maverick-17b-128e-instruct,meta-llama/llama-4-scout-17b-16e-instruct",
+    ).split(",")
+    if m.strip()
+)
+
+# Formats refusés par l'API, par modèle (mémorisé pour la durée du processus)
+_REJECTED_FORMATS: Dict[str, Set[str]] = {}
+
+
+class _ResponseFormatRejected(RuntimeError):
+    """
+    L'API refuse le `response_format` demandé pour ce modèle.
+    """
+
+
+def http_session() -> requests.Session:
+    """
+    Session HTTP propre au thread courant : les connexions (TLS compris) vers
+    l'API sont gardées ouvertes et réutilisées d'un appel à l'autre.
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        _local.session = session
+    return session
+
 
 def _get_api_key() -> str:
     """
@@ -25,9 +108,93 @@ def _get_api_key() -> str:
     return api_key
 
 
-def _call_groq(messages: List[Dict[str, str]], model: str, temperature: float, max_tokens: int) -> str:
+@functools.lru_cache(maxsize=1)
+def load_routing() -> Dict[str, Any]:
+    """
+    Configuration de routage : valeurs par défaut, complétées par le fichier
+    JSON MODEL_ROUTES_PATH s'il existe (mêmes clés, fusion par section).
+    """
+    routing = {key: (dict(value) if isinstance(value, dict) else value) for key, value in DEFAULT_ROUTING.items()}
+    if os.path.exists(MODEL_ROUTES_PATH):
+        with open(MODEL_ROUTES_PATH, "r", encoding="utf-8") as f:
+            overrides = json.load(f)
+        for key, value in overrides.items():
+            if isinstance(value, dict) and isinstance(routing.get(key), dict):
+                routing[key].update(value)
+            else:
+                routing[key] = value
+    return routing
+
+
+def route_model(call_site: Optional[str]) -> str:
+    """
+    Modèle à utiliser pour un point d'appel (extract_cv, plan, evaluate...).
+    """
+    routing = load_routing()
+    tier = routing["routes"].get(call_site or "", routing["default_tier"])
+    return routing["tiers"].get(tier, DEFAULT_MODEL)
+
+
+def _escalation_model(model: str) -> Optional[str]:
+    """
+    Modèle de la gamme supérieure à celle de `model`, ou None s'il n'y en a pas.
+    """
+    routing = load_routing()
+    chain = [routing["tiers"][tier] for tier in routing["escalation"] if tier in routing["tiers"]]
+    if model not in chain:
+        return None
+    following = [m for m in chain[chain.index(model) + 1:] if m != model]
+    return following[0] if following else None
+
+
+def _record_route(call_site: Optional[str], model: str, duration_s: float, usage: Optional[Dict[str, Any]]) -> None:
+    """
+    Latence et coût estimé par route (point d'appel + modèle).
+    """
+    site = call_site or ""
+    registry.observe("llm_route_latency_seconds", duration_s, call_site=site, model=model)
+    price = load_routing()["prices"].get(model)
+    if usage and price:
+        cost = (
+            int(usage.get("prompt_tokens") or 0) * price[0]
+            + int(usage.get("completion_tokens") or 0) * price[1]
+        ) / 1_000_000
+        registry.inc("llm_cost_usd_total", cost, call_site=site, model=model)
+
+
+def _retry_delay(response: requests.Response, attempt: int) -> float:
+    """
+    Délai avant nouvelle tentative : en-tête Retry-After (secondes) s'il est
+    valide, sinon backoff exponentiel (0.5s, 1s, 2s...) ; borné à MAX_RETRY_AFTER_S.
+    """
+    try:
+        delay = float(response.headers.get("retry-after", ""))
+    except ValueError:
+        delay = float("nan")
+    if not delay >= 0:  # absent, date HTTP, négatif ou NaN
+        delay = 0.5 * (2 ** attempt)
+    return min(delay, MAX_RETRY_AFTER_S)
+
+
+def _call_groq(
+    messages: List[Dict[str, str]],
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    response_format: Optional[Dict[str, Any]] = None,
+    call_site: Optional[str] = None,
+) -> str:
     """
     Envoie une requête HTTP à Groq et retourne la réponse textuelle.
+
+    Chaque appel est mesuré (span "llm_call") avec les tokens consommés
+    rapportés par l'API et le nombre de nouvelles tentatives. Les prompts trop
+    longs sont compactés avant envoi (token_budget.fit_messages) et la longueur
+    de sortie observée alimente le budget `max_tokens` du point d'appel.
+
+    En mode JSON (`response_format`), une génération rejetée par la validation
+    côté API (400 "json_validate_failed") renvoie la sortie brute fournie par
+    l'API, pour que generate_json tente de la réparer.
     """
     headers = {
         "Authorization": f"Bearer {_get_api_key()}",
@@ -36,38 +203,186 @@ def _call_groq(messages: List[Dict[str, str]], model: str, temperature: float, m
 
     payload = {
         "model": model,
-        "messages": messages,
+        "messages": fit_messages(messages),
         "temperature": temperature,
         "max_tokens": max_tokens
     }
+    if response_format is not None:
+        payload["response_format"] = response_format
+    format_type = response_format["type"] if response_format else None
 
-    response = requests.post(GROQ_API_URL, headers=headers, json=payload)
+    t0 = time.perf_counter()
+    with span(
+        "llm_call",
+        model=model,
+        call_site=call_site,
+        max_tokens=max_tokens,
+        response_format=format_type,
+    ) as record:
+        for attempt in range(MAX_RETRIES + 1):
+            response = http_session().post(GROQ_API_URL, headers=headers, json=payload, timeout=HTTP_TIMEOUT_S)
+            if response.status_code in RETRY_STATUS_CODES and attempt < MAX_RETRIES:
+                record_retry("llm_call", str(response.status_code))
+                time.sleep(_retry_delay(response, attempt))
+                continue
+            break
 
-    if response.status_code != 200:
-        raise RuntimeError(
-            f"Erreur API Groq {response.status_code} : {response.text}"
+        if response.status_code == 400 and response_format is not None:
+            error = _api_error(response)
+            if error.get("code") == "json_validate_failed":
+                registry.inc("json_mode_validate_failed_total", model=model)
+                return str(error.get("failed_generation") or "")
+            if "response_format" in str(error.get("message", "")):
+                raise _ResponseFormatRejected(f"{model} : {error.get('message', response.text)}")
+
+        if response.status_code != 200:
+            raise RuntimeError(
+                f"Erreur API Groq {response.status_code} : {response.text}"
+            )
+
+        data = response.json()
+        record_llm_usage(data.get("usage"), model)
+        _record_route(call_site, model, time.perf_counter() - t0, data.get("usage"))
+        choice = data["choices"][0]
+        content = choice["message"]["content"] or ""
+        record["finish_reason"] = choice.get("finish_reason")
+        completion_tokens = (data.get("usage") or {}).get("completion_tokens")
+        budgets.observe(
+            call_site,
+            int(completion_tokens) if completion_tokens is not None else estimate_tokens(content),
+            max_tokens,
+            truncated=choice.get("finish_reason") == "length",
         )
+        return content.strip()
 
-    data = response.json()
-    return data["choices"][0]["message"]["content"].strip()
+
+def _api_error(response: requests.Response) -> Dict[str, Any]:
+    try:
+        error = response.json().get("error")
+    except ValueError:
+        return {}
+    return error if isinstance(error, dict) else {}
 
 
 def generate_text(
     prompt: str,
     system: str = "Tu es un assistant utile, clair et concis.",
-    model: str = DEFAULT_MODEL,
+    model: Optional[str] = None,
     temperature: float = 0.3,
-    max_tokens: int = 800,
+    max_tokens: Optional[int] = None,
+    call_site: Optional[str] = None,
 ) -> str:
     """
     Génère du texte libre via Groq (LLama, Mixtral...).
+
+    Sans `max_tokens` explicite, le budget de sortie est celui appris pour
+    `call_site` (voir token_budget.OutputBudgets). Sans `model` explicite, le
+    modèle est choisi par le routage du point d'appel (route_model).
     """
     messages = [
         {"role": "system", "content": system},
         {"role": "user", "content": prompt},
     ]
 
-    return _call_groq(messages, model, temperature, max_tokens)
+    model = model or route_model(call_site)
+    max_tokens = max_tokens or budgets.max_tokens(call_site)
+    return _call_groq(messages, model, temperature, max_tokens, call_site=call_site)
+
+
+def _schema_types(schema: Dict[str, Any]) -> List[str]:
+    types = schema.get("type", "object")
+    return [types] if isinstance(types, str) else list(types)
+
+
+def _response_format(
+    model: str,
+    schema: Optional[Dict[str, Any]],
+    schema_name: str,
+) -> Optional[Dict[str, Any]]:
+    """
+    Choisit le mode JSON de l'API le plus strict disponible pour ce modèle :
+    sortie structurée (schéma déclaré), sinon mode JSON simple (objet valide
+    garanti), sinon aucun (le format n'est alors demandé que par le prompt).
+    """
+    rejected = _REJECTED_FORMATS.get(model, set())
+    if schema is not None and model in STRUCTURED_OUTPUT_MODELS and "json_schema" not in rejected:
+        return {"type": "json_schema", "json_schema": {"name": schema_name, "schema": schema}}
+    # Le mode JSON simple impose un objet à la racine
+    if "json_object" not in rejected and (schema is None or "object" in _schema_types(schema)):
+        return {"type": "json_object"}
+    return None
+
+
+def _json_system_prompt(
+    system: str,
+    schema: Optional[Dict[str, Any]],
+    response_format: Optional[Dict[str, Any]],
+) -> str:
+    # Hors sortie structurée, le modèle ne voit le schéma que via le prompt système
+    if schema is None or (response_format and response_format["type"] == "json_schema"):
+        return system
+    compact = json.dumps(schema, ensure_ascii=False, separators=(",", ":"))
+    return f"{system}\nSchéma JSON de la réponse : {compact}"
+
+
+@functools.lru_cache(maxsize=None)
+def _jsonschema() -> Any:
+    """
+    Import paresseux de jsonschema (~0,1 s) : chargé au premier appel avec
+    schéma, pas au démarrage de l'application. None s'il n'est pas installé.
+    """
+    try:
+        import jsonschema
+    except ImportError:  # validation désactivée si jsonschema n'est pas installé
+        return None
+    return jsonschema
+
+
+def _schema_errors() -> tuple:
+    jsonschema = _jsonschema()
+    return (jsonschema.ValidationError,) if jsonschema is not None else ()
+
+
+def _validate(data: Any, schema: Optional[Dict[str, Any]]) -> None:
+    """
+    Valide la sortie contre un schéma JSON (si jsonschema est installé).
+    """
+    jsonschema = _jsonschema() if schema is not None else None
+    if jsonschema is None:
+        return
+    jsonschema.validate(data, schema)
+
+
+def _json_error_message(error: Exception) -> str:
+    # Message court de jsonschema (sans le schéma complet) pour le re-prompt
+    return getattr(error, "message", None) or str(error)
+
+
+def _json_call(
+    conversation: List[Dict[str, str]],
+    system: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    schema: Optional[Dict[str, Any]],
+    schema_name: str,
+    call_site: Optional[str],
+) -> str:
+    """
+    Un appel en mode JSON : choisit le response_format du modèle et retombe
+    sur le mode suivant si l'API le refuse (refus mémorisé par modèle).
+    """
+    while True:
+        response_format = _response_format(model, schema, schema_name)
+        messages = [
+            {"role": "system", "content": _json_system_prompt(system, schema, response_format)},
+            *conversation,
+        ]
+        try:
+            return _call_groq(messages, model, temperature, max_tokens, response_format, call_site)
+        except _ResponseFormatRejected:
+            _REJECTED_FORMATS.setdefault(model, set()).add(response_format["type"])
+            registry.inc("json_mode_fallback_total", model=model, format=response_format["type"])
 
 
 def generate_json(
@@ -76,46 +391,96 @@ def generate_json(
         "Tu es un assistant qui renvoie STRICTEMENT du JSON valide, "
         "sans texte autour, sans markdown."
     ),
-    model: str = DEFAULT_MODEL,
+    model: Optional[str] = None,
     temperature: float = 0.2,
-    max_tokens: int = 800,
-) -> Dict[str, Any]:
+    max_tokens: Optional[int] = None,
+    schema: Optional[Dict[str, Any]] = None,
+    max_reasks: int = 1,
+    schema_name: str = "reponse",
+    call_site: Optional[str] = None,
+) -> Any:
     """
-    Demande explicitement au modèle Groq de renvoyer du JSON, puis parse la sortie.
+    Demande au modèle Groq une sortie JSON, puis parse la sortie.
+
+    Le format est imposé par l'API (`response_format`) : sortie structurée
+    conforme à `schema` pour les modèles qui la supportent, mode JSON simple
+    sinon, avec le schéma ajouté au prompt système. Si l'API refuse le mode
+    demandé, on retombe sur le suivant (et le refus est mémorisé par modèle).
+
+    La sortie est extraite de façon tolérante (texte autour, balises markdown,
+    virgules finales, guillemets typographiques, sortie tronquée) puis validée
+    contre `schema` s'il est fourni. Ce n'est qu'en dernier recours que le
+    modèle est relancé (au plus `max_reasks` fois) avec le message d'erreur.
+
+    Sans `max_tokens` explicite, le budget de sortie est celui appris pour
+    `call_site` ; après une sortie tronquée, la relance dispose donc d'un
+    budget plus large. Sans `model` explicite, le modèle est celui de la route
+    du point d'appel, et la relance passe au modèle de la gamme supérieure.
     """
+    auto_budget = max_tokens is None
+    routed = model is None
+    model = model or route_model(call_site)
 
-    raw = generate_text(
-        prompt=prompt,
-        system=system,
-        model=model,
-        temperature=temperature,
-        max_tokens=max_tokens,
-    ).strip()
+    conversation = [{"role": "user", "content": prompt}]
+    raw = _json_call(
+        conversation, system, model, temperature,
+        budgets.max_tokens(call_site) if auto_budget else max_tokens,
+        schema, schema_name, call_site,
+    )
 
-    cleaned = raw
+    error: Optional[Exception] = None
+    for attempt in range(max_reasks + 1):
+        try:
+            data = extract_json(raw)
+            _validate(data, schema)
+            registry.inc("json_outputs_total", result="ok" if attempt == 0 else "ok_after_reask")
+            return data
+        except (JSONExtractionError, *_schema_errors()) as e:
+            error = e
 
-    # Retire les "```json" ou "```"
-    if cleaned.startswith("```"):
-        cleaned = cleaned.strip("`")
-        if cleaned.lower().startswith("json"):
-            cleaned = cleaned[4:].strip()
+        if attempt == max_reasks:
+            break
 
-    try:
-        return json.loads(cleaned)
-    except Exception as e:
-        raise ValueError(
-            f"❌ JSON invalide retourné par Groq.\n"
-            f"Réponse brute :\n{raw}\nErreur : {e}"
+        reason = "parse" if isinstance(error, JSONExtractionError) else "schema"
+        record_retry("generate_json", reason)
+        conversation = conversation + [
+            {"role": "assistant", "content": raw},
+            {
+                "role": "user",
+                "content": (
+                    f"Ta réponse n'est pas exploitable ({_json_error_message(error)}). "
+                    "Renvoie uniquement le JSON corrigé, sans texte autour."
+                ),
+            },
+        ]
+        # Modèle routé : la relance passe à la gamme supérieure
+        larger = _escalation_model(model) if routed else None
+        if larger:
+            registry.inc("llm_route_escalations_total", call_site=call_site or "", from_model=model, to_model=larger)
+            model = larger
+        raw = _json_call(
+            conversation, system, model, temperature,
+            budgets.max_tokens(call_site) if auto_budget else max_tokens,
+            schema, schema_name, call_site,
         )
 
+    registry.inc("json_outputs_total", result="failed")
+    raise ValueError(
+        f"❌ JSON invalide retourné par Groq.\n"
+        f"Réponse brute :\n{raw}\nErreur : {_json_error_message(error)}"
+    )
+
 
 def chat(
     messages: List[Dict[str, str]],
-    model: str = DEFAULT_MODEL,
+    model: Optional[str] = None,
     temperature: float = 0.3,
-    max_tokens: int = 800,
+    max_tokens: Optional[int] = None,
+    call_site: Optional[str] = None,
 ) -> str:
     """
     Interface générique : conversation multi-tours.
     """
-    return _call_groq(messages, model, temperature, max_tokens)
+    model = model or route_model(call_site)
+    max_tokens = max_tokens or budgets.max_tokens(call_site)
+    return _call_groq(messages, model, temperature, max_tokens, call_site=call_site)
@@ -1,6 +1,8 @@
 import os
-import fitz  # PyMuPDF
 
+from src.instrumentation import traced
+
+@traced("pdf_parse")
 def pdf_to_text(path: str) -> str:
     """
     Convertit un fichier PDF en texte brut.
@@ -11,6 +13,8 @@ def pdf_to_text(path: str) -> str:
     Returns:
         str: Texte extrait du PDF.
     """
+    import fitz  # PyMuPDF, import paresseux (~0,1 s au démarrage sinon)
+
     try:
         doc = fitz.open(path)
         text = ""
@@ -63,6 +67,33 @@ def load_file(path: str) -> str:
         raise ValueError("Format non supporté. Utiliser uniquement .pdf ou .txt")
 
 
+@traced("pdf_parse")
+def pdf_bytes_to_text(data: bytes) -> str:
+    """
+    Convertit le contenu binaire d'un PDF (ex : fichier uploadé) en texte brut.
+    """
+    import fitz  # PyMuPDF
+
+    try:
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            return "".join(page.get_text() for page in doc).strip()
+    except Exception as e:
+        raise RuntimeError(f"Erreur lors de la lecture du PDF : {e}")
+
+
+def bytes_to_text(filename: str, data: bytes) -> str:
+    """
+    Convertit le contenu d'un fichier uploadé (PDF ou texte) en texte brut,
+    en se basant sur l'extension du nom de fichier.
+    """
+    if filename.lower().endswith(".pdf"):
+        return pdf_bytes_to_text(data)
+    try:
+        return data.decode("utf-8").strip()
+    except UnicodeDecodeError:
+        return data.decode(errors="ignore").strip()
+
+
 # Fonctions conviviales pour CV et offres
 def load_cv(path: str) -> str:
     return load_file(path)
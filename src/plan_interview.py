@@ -1,8 +1,114 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
+from src.instrumentation import traced
 from src.llm_client import generate_json
 
+# Schéma du plan : objet {"questions": [...]} (le mode JSON de l'API impose un objet à la racine)
+PLAN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "questions": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "properties": {
+                    "type": {"type": ["string", "null"]},
+                    "topic": {"type": ["string", "null"]},
+                    "question": {"type": "string"},
+                },
+                "required": ["question"],
+            },
+        },
+    },
+    "required": ["questions"],
+}
 
+# Schéma d'une question de relance (mode adaptatif)
+FOLLOW_UP_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "type": {"type": ["string", "null"]},
+        "topic": {"type": ["string", "null"]},
+        "question": {"type": "string"},
+    },
+    "required": ["question"],
+}
+
+
+# Partie fixe du prompt de plan (rôle, couverture attendue, format des questions)
+PLAN_SYSTEM = """Tu es un recruteur qui prépare un plan d'entretien d'embauche structuré,
+adapté au candidat et au poste décrits par l'utilisateur.
+
+Le plan doit couvrir au minimum :
+- 1 question d'introduction / présentation
+- 1 à 2 questions de motivation (poste + entreprise)
+- 2 à 3 questions techniques (en priorité sur les compétences en commun)
+- 1 question sur un ou plusieurs projets du CV
+- 1 à 2 questions soft skills / comportementales
+- 1 question de conclusion (ex: "avez-vous des questions ?")
+
+Renvoie les questions dans la liste "questions", chacune avec :
+- "type" : un mot clé parmi
+    ["intro", "motivation", "technique", "projet", "soft_skill", "conclusion"]
+- "topic" : une courte phrase décrivant le thème (ex: "motivation pour le poste",
+    "compétences Python", "projet de classification d'images", "travail en équipe")
+- "question" : la question exacte que l'intervieweur posera au candidat,
+    en français, dans un ton cohérent avec le profil de l'intervieweur.
+
+Réponds uniquement en JSON valide, sans texte autour."""
+
+
+# Partie fixe du prompt de relance (mode adaptatif, quand la réserve de questions est épuisée)
+FOLLOW_UP_SYSTEM = """Tu es un recruteur qui mène un entretien d'embauche adaptatif.
+À partir du profil, des questions déjà posées et des points faibles observés
+dans les réponses du candidat, propose UNE question suivante qui :
+- ne répète pas une question déjà posée,
+- approfondit en priorité un point faible ou une compétence attendue non encore abordée,
+- reste cohérente avec le ton de l'intervieweur.
+
+Renvoie un objet avec :
+- "type" : un mot clé parmi
+    ["intro", "motivation", "technique", "projet", "soft_skill", "conclusion"]
+- "topic" : une courte phrase décrivant le thème
+- "question" : la question exacte, en français.
+
+Réponds uniquement en JSON valide, sans texte autour."""
+
+
+def profile_context(profile: Dict[str, Any]) -> str:
+    """
+    Contexte candidat/poste commun aux prompts de plan et de relance.
+    """
+    cv_info = profile.get("cv", {})
+    job_info = profile.get("job", {})
+
+    return f"""Informations sur le candidat et le poste :
+
+1) Résumé du CV du candidat :
+{cv_info.get("summary", "")}
+
+2) Résumé de l'offre :
+{job_info.get("summary", "")}
+
+3) Titre du poste : {job_info.get("title", "")}
+   Entreprise : {job_info.get("company", "")}
+
+4) Compétences techniques en commun (CV ∩ offre) :
+{profile.get("overlap_hard_skills", [])}
+
+5) Compétences techniques manquantes côté candidat (attendues par l'offre) :
+{profile.get("missing_hard_skills", [])}
+
+6) Compétences soft en commun :
+{profile.get("overlap_soft_skills", [])}
+
+7) Compétences soft manquantes :
+{profile.get("missing_soft_skills", [])}
+"""
+
+
+@traced("plan")
 def generate_interview_plan(
     profile: Dict[str, Any],
     interviewer_profile: str,
@@ -31,82 +137,27 @@ def generate_interview_plan(
         Liste de questions structurées.
     """
 
-    cv_info = profile.get("cv", {})
-    job_info = profile.get("job", {})
+    # Contexte de session d'abord (identique d'une régénération à l'autre),
+    # puis les paramètres propres à cet appel.
+    prompt = f"""{profile_context(profile)}
+Profil de l'intervieweur :
+{interviewer_profile}
 
-    overlap_hard = profile.get("overlap_hard_skills", [])
-    overlap_soft = profile.get("overlap_soft_skills", [])
-    missing_hard = profile.get("missing_hard_skills", [])
-    missing_soft = profile.get("missing_soft_skills", [])
-
-    cv_summary = cv_info.get("summary", "")
-    job_summary = job_info.get("summary", "")
-    job_title = job_info.get("title", "")
-    company = job_info.get("company", "")
-
-    prompt = f"""
-    Tu es un recruteur qui prépare un entretien d'embauche.
-
-    Tu disposes des informations suivantes :
-
-    1) Résumé du CV du candidat :
-    {cv_summary}
-
-    2) Résumé de l'offre :
-    {job_summary}
-
-    3) Titre du poste : {job_title}
-       Entreprise : {company}
-
-    4) Compétences techniques en commun (CV ∩ offre) :
-    {overlap_hard}
-
-    5) Compétences techniques manquantes côté candidat (attendues par l'offre) :
-    {missing_hard}
-
-    6) Compétences soft en commun :
-    {overlap_soft}
-
-    7) Compétences soft manquantes :
-    {missing_soft}
-
-    8) Profil de l'intervieweur :
-    {interviewer_profile}
-
-    Ta tâche :
-    Proposer un plan d'entretien structuré avec exactement {n_questions} questions,
-    adaptées à ce candidat et à ce poste.
-
-    Le plan doit couvrir au minimum :
-    - 1 question d'introduction / présentation
-    - 1 à 2 questions de motivation (poste + entreprise)
-    - 2 à 3 questions techniques (en priorité sur les compétences en commun)
-    - 1 question sur un ou plusieurs projets du CV
-    - 1 à 2 questions soft skills / comportementales
-    - 1 question de conclusion (ex: "avez-vous des questions ?")
-
-    Pour chaque question, renvoie un objet JSON avec les clés :
-    - "type" : un mot clé parmi
-        ["intro", "motivation", "technique", "projet", "soft_skill", "conclusion"]
-    - "topic" : une courte phrase décrivant le thème (ex: "motivation pour le poste",
-        "compétences Python", "projet de classification d'images", "travail en équipe")
-    - "question" : la question exacte que l'intervieweur posera au candidat,
-        en français, dans un ton cohérent avec le profil de l'intervieweur.
-
-    IMPORTANT :
-    - Réponds STRICTEMENT avec un JSON au format suivant :
-      [
-        {{
-          "type": "...",
-          "topic": "...",
-          "question": "..."
-        }},
-        ...
-      ]
-    - Pas de texte en dehors du JSON.
-    """
+Propose exactement {n_questions} questions.
+"""
 
-    plan = generate_json(prompt)
+    plan = generate_json(
+        prompt,
+        system=PLAN_SYSTEM,
+        schema=PLAN_SCHEMA,
+        schema_name="plan",
+        call_site="plan",
+    )
+    # Liste encapsulée dans un objet ({"questions": [...]}) : on la récupère
+    if isinstance(plan, dict):
+        nested = [v for v in plan.values() if isinstance(v, list)]
+        if "question" not in plan and nested:
+            plan = nested[0]
     # On s'assure que c'est bien une liste, sinon on encapsule
     if isinstance(plan, dict):
         plan = [plan]
@@ -114,24 +165,92 @@ def generate_interview_plan(
     # Filtrage léger de sécurité : on ne garde que les éléments bien formés
     cleaned_plan: List[Dict[str, Any]] = []
     for item in plan:
-        if not isinstance(item, dict):
-            continue
-        q_type = item.get("type")
-        topic = item.get("topic")
-        question = item.get("question")
-        if not question:
-            continue
-        cleaned_plan.append(
-            {
-                "type": q_type or "autre",
-                "topic": topic or "",
-                "question": question.strip(),
-            }
-        )
+        cleaned = _clean_question(item)
+        if cleaned:
+            cleaned_plan.append(cleaned)
 
     return cleaned_plan
 
 
+def _clean_question(item: Any) -> Optional[Dict[str, Any]]:
+    """
+    Normalise une question produite par le LLM, ou None si elle est inexploitable.
+    """
+    if not isinstance(item, dict):
+        return None
+    question = item.get("question")
+    if not question or not isinstance(question, str):
+        return None
+    return {
+        "type": item.get("type") or "autre",
+        "topic": item.get("topic") or "",
+        "question": question.strip(),
+    }
+
+
+@traced("follow_up")
+def generate_follow_up_question(
+    profile: Dict[str, Any],
+    history: List[Dict[str, Any]],
+    interviewer_profile: str,
+    asked: Optional[List[Dict[str, Any]]] = None,
+    focus_skills: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Génère une seule question de relance, quand la réserve de questions du mode
+    adaptatif (src.interview_engine) est épuisée.
+
+    Args:
+        profile: profil combiné (CV + offre), tel que retourné par build_profile().
+        history: réponses déjà évaluées (les 3 dernières servent de contexte).
+        interviewer_profile: courte description de l'intervieweur.
+        asked: questions déjà posées (y compris passées), à ne pas répéter.
+        focus_skills: compétences attendues pas encore abordées.
+
+    Returns:
+        Une question au format du plan : {"type", "topic", "question"}.
+
+    Raises:
+        ValueError: si le LLM ne renvoie pas de question exploitable.
+    """
+    asked_lines = "\n".join(f"- {q.get('question', '')}" for q in (asked or history))
+    recent = []
+    for record in history[-3:]:
+        evaluation = record.get("evaluation") or {}
+        weaknesses = "; ".join(evaluation.get("weaknesses", [])) or "aucun"
+        recent.append(
+            f"- {record.get('topic') or record.get('type', '')} : "
+            f"score {evaluation.get('score', '?')}/10, points faibles : {weaknesses}"
+        )
+
+    prompt = f"""{profile_context(profile)}
+Profil de l'intervieweur :
+{interviewer_profile}
+
+Questions déjà posées :
+{asked_lines or "- aucune"}
+
+Dernières réponses évaluées :
+{chr(10).join(recent) or "- aucune"}
+
+Compétences attendues pas encore abordées : {focus_skills or []}
+
+Propose la question suivante.
+"""
+
+    data = generate_json(
+        prompt,
+        system=FOLLOW_UP_SYSTEM,
+        schema=FOLLOW_UP_SCHEMA,
+        schema_name="relance",
+        call_site="follow_up",
+    )
+    question = _clean_question(data)
+    if question is None:
+        raise ValueError("Le LLM n'a pas renvoyé de question de relance exploitable.")
+    return question
+
+
 def pretty_print_plan(plan: List[Dict[str, Any]]) -> None:
     """
     Affiche le plan d'entretien de manière lisible dans le terminal.
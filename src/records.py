@@ -0,0 +1,298 @@
+"""
+Représentation compacte des records d'historique (question, réponse, évaluation).
+
+InterviewRecord et Evaluation remplacent les dicts imbriqués conservés dans
+st.session_state pour chaque utilisateur :
+- dataclasses à slots (pas de __dict__ par objet) ;
+- notes entières sur un octet, type et thème internés (partagés entre records) ;
+- listes de points forts / faibles en tuples.
+
+Ils restent lisibles comme des dicts (record["evaluation"], record.get("topic"),
+dict(record)...) : le code existant qui consomme des historiques fonctionne
+tel quel. to_dict() / from_dict() donnent le format JSON habituel,
+to_bytes() / from_bytes() un format binaire plus compact et plus rapide.
+"""
+import json
+import struct
+import sys
+from collections.abc import Mapping
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+SCORE_FIELDS = ("score", "clarity", "relevance", "alignment", "depth")
+POINT_FIELDS = ("strengths", "weaknesses", "improvements")
+RECORD_FIELDS = ("question", "type", "topic", "answer", "evaluation")
+
+# Note absente (les notes valides sont des entiers de 0 à 10)
+SCORE_MISSING = -1
+
+# Format binaire : version, drapeaux, 5 notes (int8), nombre de points forts /
+# faibles / pistes, longueur (en caractères) de chaque chaîne, puis le texte UTF-8
+BINARY_VERSION = 1
+_HEADER = struct.Struct("<BB5b3H")
+_LENGTH = struct.Struct("<I")
+_FLAG_EVALUATION = 1
+
+
+def _to_score(value: Any) -> int:
+    if value is None or isinstance(value, bool):
+        return SCORE_MISSING
+    try:
+        score = int(value)
+    except (TypeError, ValueError):
+        return SCORE_MISSING
+    return max(0, min(score, 127))
+
+
+def _intern(value: Any) -> str:
+    return sys.intern(str(value or ""))
+
+
+def _extra(data: Mapping, known: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+    # Clés inconnues conservées telles quelles (None si aucune : pas de dict par record)
+    extra = {key: value for key, value in data.items() if key not in known}
+    return extra or None
+
+
+@dataclass(slots=True, eq=False)
+class Evaluation(Mapping):
+    """
+    Évaluation d'une réponse (sortie normalisée de l'évaluateur).
+    """
+
+    score: int = SCORE_MISSING
+    clarity: int = SCORE_MISSING
+    relevance: int = SCORE_MISSING
+    alignment: int = SCORE_MISSING
+    depth: int = SCORE_MISSING
+    strengths: Tuple[str, ...] = ()
+    weaknesses: Tuple[str, ...] = ()
+    improvements: Tuple[str, ...] = ()
+    extra: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "Evaluation":
+        if isinstance(data, Evaluation):
+            return data
+        return cls(
+            *(_to_score(data.get(name)) for name in SCORE_FIELDS),
+            *(tuple(str(p) for p in data.get(name) or ()) for name in POINT_FIELDS),
+            extra=_extra(data, SCORE_FIELDS + POINT_FIELDS),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: list(value) if isinstance(value, tuple) else value for key, value in self.items()}
+
+    # Interface dict (lecture seule)
+    def _keys(self) -> List[str]:
+        keys = [name for name in SCORE_FIELDS if getattr(self, name) != SCORE_MISSING]
+        keys.extend(POINT_FIELDS)
+        if self.extra:
+            keys.extend(self.extra)
+        return keys
+
+    def __getitem__(self, key: str) -> Any:
+        if key in SCORE_FIELDS:
+            value = getattr(self, key)
+            if value != SCORE_MISSING:
+                return value
+        elif key in POINT_FIELDS:
+            return getattr(self, key)
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys())
+
+    def __len__(self) -> int:
+        # Appelé par les tests de vérité (`record.get("evaluation") or {}`) : sans liste intermédiaire
+        missing = sum(1 for name in SCORE_FIELDS if getattr(self, name) == SCORE_MISSING)
+        return len(SCORE_FIELDS) - missing + len(POINT_FIELDS) + len(self.extra or ())
+
+
+@dataclass(slots=True, eq=False)
+class InterviewRecord(Mapping):
+    """
+    Record d'historique : une question posée, la réponse et son évaluation
+    (None si la réponse n'a pas été évaluée).
+    """
+
+    question: str
+    type: str = ""
+    topic: str = ""
+    answer: str = ""
+    evaluation: Optional[Evaluation] = None
+    extra: Optional[Dict[str, Any]] = None
+
+    def __post_init__(self) -> None:
+        # Peu de types et de thèmes distincts : une seule chaîne partagée par valeur
+        self.type = _intern(self.type)
+        self.topic = _intern(self.topic)
+        if self.evaluation is not None and not isinstance(self.evaluation, Evaluation):
+            self.evaluation = Evaluation.from_dict(self.evaluation)
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "InterviewRecord":
+        if isinstance(data, InterviewRecord):
+            return data
+        evaluation = data.get("evaluation")
+        return cls(
+            question=str(data.get("question") or ""),
+            type=data.get("type") or "",
+            topic=data.get("topic") or "",
+            answer=str(data.get("answer") or ""),
+            evaluation=Evaluation.from_dict(evaluation) if evaluation is not None else None,
+            extra=_extra(data, RECORD_FIELDS),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {key: value for key, value in self.items()}
+        if self.evaluation is not None:
+            data["evaluation"] = self.evaluation.to_dict()
+        return data
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, text: str) -> "InterviewRecord":
+        return cls.from_dict(json.loads(text))
+
+    # ---------- Format binaire ----------
+
+    def to_bytes(self) -> bytes:
+        evaluation = self.evaluation
+        points = [getattr(evaluation, name) if evaluation is not None else () for name in POINT_FIELDS]
+        texts = [self.question, self.type, self.topic, self.answer]
+        for items in points:
+            texts.extend(items)
+        texts.append(json.dumps(self.extra, ensure_ascii=False) if self.extra else "")
+        texts.append(
+            json.dumps(evaluation.extra, ensure_ascii=False) if evaluation is not None and evaluation.extra else ""
+        )
+
+        header = _HEADER.pack(
+            BINARY_VERSION,
+            _FLAG_EVALUATION if evaluation is not None else 0,
+            *(getattr(evaluation, name) if evaluation is not None else SCORE_MISSING for name in SCORE_FIELDS),
+            *(len(items) for items in points),
+        )
+        lengths = struct.pack(f"<{len(texts)}I", *map(len, texts))
+        # Un seul encodage pour tout le texte ; les longueurs sont en caractères
+        return header + lengths + "".join(texts).encode("utf-8")
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "InterviewRecord":
+        """
+        Raises:
+            ValueError: si les octets ne sont pas un record au format binaire connu.
+        """
+        try:
+            version, flags, *fields = _HEADER.unpack_from(data, 0)
+            if version != BINARY_VERSION:
+                raise ValueError(f"Version de record binaire inconnue : {version}")
+            scores, counts = fields[:len(SCORE_FIELDS)], fields[len(SCORE_FIELDS):]
+            n_texts = 6 + sum(counts)
+            lengths = struct.unpack_from(f"<{n_texts}I", data, _HEADER.size)
+            text = bytes(data[_HEADER.size + 4 * n_texts:]).decode("utf-8")
+        except (struct.error, UnicodeDecodeError) as e:
+            raise ValueError(f"Record binaire invalide : {e}")
+        if sum(lengths) != len(text):
+            raise ValueError("Record binaire tronqué.")
+
+        ends = list(accumulate(lengths))
+        texts = [text[start:end] for start, end in zip([0] + ends, ends)]
+        question, q_type, topic, answer = texts[:4]
+        extra, evaluation_extra = texts[-2:]
+
+        evaluation = None
+        if flags & _FLAG_EVALUATION:
+            points = []
+            offset = 4
+            for count in counts:
+                points.append(tuple(texts[offset:offset + count]))
+                offset += count
+            evaluation = Evaluation(
+                *scores,
+                *points,
+                extra=json.loads(evaluation_extra) if evaluation_extra else None,
+            )
+        return cls(
+            question=question,
+            type=q_type,
+            topic=topic,
+            answer=answer,
+            evaluation=evaluation,
+            extra=json.loads(extra) if extra else None,
+        )
+
+    def __reduce__(self) -> Tuple[Any, Tuple[bytes]]:
+        # pickle (état de session Streamlit, multiprocessing...) via le format binaire
+        return InterviewRecord.from_bytes, (self.to_bytes(),)
+
+    # Interface dict (lecture seule)
+    def _keys(self) -> List[str]:
+        keys = list(RECORD_FIELDS)
+        if self.extra:
+            keys.extend(self.extra)
+        return keys
+
+    def __getitem__(self, key: str) -> Any:
+        if key in RECORD_FIELDS:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys())
+
+    def __len__(self) -> int:
+        return len(RECORD_FIELDS) + len(self.extra or ())
+
+
+def history_to_dicts(history: Iterable[Mapping]) -> List[Dict[str, Any]]:
+    """
+    Historique au format JSON habituel (liste de dicts), quel que soit le type des records.
+    """
+    return [
+        record.to_dict() if isinstance(record, InterviewRecord) else dict(record)
+        for record in history
+    ]
+
+
+def history_from_dicts(history: Iterable[Mapping]) -> List[InterviewRecord]:
+    return [InterviewRecord.from_dict(record) for record in history]
+
+
+def history_to_bytes(history: Iterable[InterviewRecord]) -> bytes:
+    """
+    Historique complet au format binaire : nombre de records puis chaque record
+    préfixé par sa longueur.
+    """
+    parts = []
+    count = 0
+    for record in history:
+        data = InterviewRecord.from_dict(record).to_bytes()
+        parts.append(_LENGTH.pack(len(data)))
+        parts.append(data)
+        count += 1
+    return _LENGTH.pack(count) + b"".join(parts)
+
+
+def history_from_bytes(data: bytes) -> List[InterviewRecord]:
+    view = memoryview(data)
+    try:
+        (count,) = _LENGTH.unpack_from(view, 0)
+        offset = _LENGTH.size
+        history = []
+        for _ in range(count):
+            (length,) = _LENGTH.unpack_from(view, offset)
+            offset += _LENGTH.size
+            history.append(InterviewRecord.from_bytes(view[offset:offset + length]))
+            offset += length
+    except struct.error as e:
+        raise ValueError(f"Historique binaire invalide : {e}")
+    return history
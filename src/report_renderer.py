@@ -0,0 +1,246 @@
+from string import Template
+from typing import Any, Dict, List, Tuple
+
+# ---------- Gabarits des sections du rapport ----------
+#
+# Les sections "données" (chiffres, détail par question, listes agrégées)
+# sont rendues localement à partir de l'historique : seules l'introduction
+# et la conclusion sont rédigées par le LLM (ou générées localement en mode
+# hors-ligne).
+
+REPORT_TEMPLATE = Template(
+    """# Rapport final d'entretien
+
+## Introduction
+
+$introduction
+
+## Synthèse des performances chiffrées
+
+$stats_table
+
+$stats_interpretation
+
+## Détail question par question
+
+$questions_table
+
+## Points forts
+
+$strengths
+
+## Points à améliorer
+
+$weaknesses
+
+## Conseils concrets pour progresser
+
+$improvements
+
+## Conclusion
+
+$conclusion
+"""
+)
+
+STATS_TABLE_TEMPLATE = Template(
+    """| Critère | Moyenne |
+|---|---|
+| Score global | $avg_score / 10 |
+| Clarté | $avg_clarity / 5 |
+| Pertinence | $avg_relevance / 5 |
+| Alignement | $avg_alignment / 5 |
+| Profondeur | $avg_depth / 5 |"""
+)
+
+QUESTION_ROW_TEMPLATE = Template(
+    "| $index | $type | $topic | $score/10 | $clarity/5 | $relevance/5 | $alignment/5 | $depth/5 |"
+)
+
+QUESTIONS_HEADER = (
+    "| # | Type | Thème | Score | Clarté | Pertinence | Alignement | Profondeur |\n"
+    "|---|---|---|---|---|---|---|---|"
+)
+
+# Libellés utilisés pour interpréter les moyennes des critères /5
+CRITERIA_LABELS = {
+    "avg_clarity": "la clarté",
+    "avg_relevance": "la pertinence",
+    "avg_alignment": "l'alignement avec le poste",
+    "avg_depth": "la profondeur des réponses",
+}
+
+
+def _escape_cell(value: Any) -> str:
+    """
+    Rend une valeur sûre pour une cellule de tableau Markdown.
+    """
+    text = str(value if value not in (None, "") else "-")
+    return text.replace("|", "/").replace("\n", " ").strip()
+
+
+def _normalize_point(text: str) -> str:
+    """
+    Clé de regroupement d'un point fort / faible : minuscules, sans ponctuation finale.
+    """
+    return " ".join(text.lower().split()).rstrip(" .!;")
+
+
+def aggregate_points(
+    history: List[Dict[str, Any]],
+    field: str,
+    limit: int = 6,
+) -> List[Tuple[str, int]]:
+    """
+    Agrège une liste de l'évaluation (strengths, weaknesses, improvements)
+    sur tout l'historique.
+
+    Les doublons (à la casse et à la ponctuation près) sont regroupés ; les
+    points sont triés par fréquence décroissante puis par ordre d'apparition.
+
+    Returns:
+        Liste de tuples (texte, nombre d'occurrences), au plus `limit` éléments.
+    """
+    counts: Dict[str, int] = {}
+    first_text: Dict[str, str] = {}
+    order: Dict[str, int] = {}
+
+    for record in history:
+        eval_ = record.get("evaluation") or {}
+        for point in eval_.get(field, []) or []:
+            text = str(point).strip()
+            if not text:
+                continue
+            key = _normalize_point(text)
+            if key not in counts:
+                counts[key] = 0
+                first_text[key] = text
+                order[key] = len(order)
+            counts[key] += 1
+
+    ranked = sorted(counts, key=lambda k: (-counts[k], order[k]))
+    return [(first_text[k], counts[k]) for k in ranked[:limit]]
+
+
+def _render_points(points: List[Tuple[str, int]], empty_message: str) -> str:
+    if not points:
+        return f"*{empty_message}*"
+    lines = []
+    for text, count in points:
+        suffix = f" *(relevé {count} fois)*" if count > 1 else ""
+        lines.append(f"- {text}{suffix}")
+    return "\n".join(lines)
+
+
+def render_stats_table(stats: Dict[str, Any]) -> str:
+    return STATS_TABLE_TEMPLATE.substitute(
+        {key: f"{stats.get(key, 0.0):.2f}" for key in (
+            "avg_score", "avg_clarity", "avg_relevance", "avg_alignment", "avg_depth"
+        )}
+    )
+
+
+def interpret_stats(stats: Dict[str, Any]) -> str:
+    """
+    Interprétation locale (sans LLM) des moyennes : niveau global,
+    critère le plus solide et critère le plus faible.
+    """
+    avg_score = stats.get("avg_score", 0.0)
+    if avg_score >= 8:
+        level = "excellent"
+    elif avg_score >= 6.5:
+        level = "solide"
+    elif avg_score >= 5:
+        level = "correct mais perfectible"
+    else:
+        level = "encore insuffisant"
+
+    criteria = sorted(CRITERIA_LABELS, key=lambda k: stats.get(k, 0.0))
+    weakest, strongest = criteria[0], criteria[-1]
+
+    return (
+        f"Sur {stats.get('n_questions', 0)} question(s), le niveau global est "
+        f"**{level}** ({avg_score:.2f} / 10). Le critère le plus solide est "
+        f"{CRITERIA_LABELS[strongest]} ({stats.get(strongest, 0.0):.2f} / 5), "
+        f"tandis que {CRITERIA_LABELS[weakest]} ({stats.get(weakest, 0.0):.2f} / 5) "
+        f"est le principal levier de progression."
+    )
+
+
+def render_questions_table(history: List[Dict[str, Any]]) -> str:
+    rows = [QUESTIONS_HEADER]
+    for i, record in enumerate(history, start=1):
+        eval_ = record.get("evaluation") or {}
+        rows.append(
+            QUESTION_ROW_TEMPLATE.substitute(
+                index=i,
+                type=_escape_cell(record.get("type", "")),
+                topic=_escape_cell(record.get("topic", "")),
+                score=_escape_cell(eval_.get("score", "?")),
+                clarity=_escape_cell(eval_.get("clarity", "?")),
+                relevance=_escape_cell(eval_.get("relevance", "?")),
+                alignment=_escape_cell(eval_.get("alignment", "?")),
+                depth=_escape_cell(eval_.get("depth", "?")),
+            )
+        )
+    return "\n".join(rows)
+
+
+def local_narrative(stats: Dict[str, Any], history: List[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Introduction et conclusion générées localement (mode hors-ligne).
+    """
+    avg_score = stats.get("avg_score", 0.0)
+    strengths = aggregate_points(history, "strengths", limit=1)
+    weaknesses = aggregate_points(history, "weaknesses", limit=1)
+
+    intro = (
+        f"Ce rapport synthétise votre simulation d'entretien "
+        f"({stats.get('n_questions', 0)} question(s) évaluée(s)), avec un score "
+        f"moyen de {avg_score:.2f} / 10."
+    )
+    if strengths:
+        intro += f" Votre principal atout observé : {strengths[0][0].rstrip('.')}."
+    if weaknesses:
+        intro += f" Point de vigilance prioritaire : {weaknesses[0][0].rstrip('.')}."
+
+    if avg_score >= 6.5:
+        conclusion = (
+            "Vous disposez d'une base solide : capitalisez sur vos points forts "
+            "et travaillez les axes ci-dessus pour aborder le vrai entretien en confiance."
+        )
+    else:
+        conclusion = (
+            "Chaque simulation vous rapproche de l'objectif : appliquez les conseils "
+            "ci-dessus, entraînez-vous à voix haute et refaites une simulation d'ici quelques jours."
+        )
+
+    return {"introduction": intro, "conclusion": conclusion}
+
+
+def render_report(
+    history: List[Dict[str, Any]],
+    stats: Dict[str, Any],
+    introduction: str,
+    conclusion: str,
+) -> str:
+    """
+    Assemble le rapport Markdown complet à partir des données structurées
+    et des deux paragraphes narratifs.
+    """
+    return REPORT_TEMPLATE.substitute(
+        introduction=introduction.strip(),
+        stats_table=render_stats_table(stats),
+        stats_interpretation=interpret_stats(stats),
+        questions_table=render_questions_table(history),
+        strengths=_render_points(
+            aggregate_points(history, "strengths"), "Aucun point fort relevé."
+        ),
+        weaknesses=_render_points(
+            aggregate_points(history, "weaknesses"), "Aucun point faible relevé."
+        ),
+        improvements=_render_points(
+            aggregate_points(history, "improvements", limit=8), "Aucun conseil relevé."
+        ),
+        conclusion=conclusion.strip(),
+    )
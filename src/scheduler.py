@@ -0,0 +1,211 @@
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from src.instrumentation import registry
+
+# Priorités (plus petit = servi en premier)
+PRIORITY_INTERACTIVE = 0  # évaluation d'une réponse, transcription : le candidat attend
+PRIORITY_NORMAL = 1       # analyse CV/offre, plan, synthèse vocale
+PRIORITY_BACKGROUND = 2   # rapport final, traitements longs
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_NORMAL: "normal",
+    PRIORITY_BACKGROUND: "background",
+}
+
+# Taille du pool partagé et limites de file (surchargeables par variables d'env)
+DEFAULT_WORKERS = int(os.getenv("INTERVIEW_SCHEDULER_WORKERS", "4"))
+DEFAULT_MAX_PENDING_PER_SESSION = int(os.getenv("INTERVIEW_SCHEDULER_MAX_PER_SESSION", "4"))
+DEFAULT_MAX_PENDING_TOTAL = int(os.getenv("INTERVIEW_SCHEDULER_MAX_PENDING", "64"))
+
+_Job = Tuple[Future, Callable[[], Any], str, float]
+
+
+class SchedulerBusy(RuntimeError):
+    """
+    La file est pleine (pour cette session ou au global) : la tâche est refusée.
+    """
+
+
+class FairScheduler:
+    """
+    Ordonnanceur partagé par toutes les sessions du serveur (LLM, TTS, STT).
+
+    - un pool fixe de threads limite le nombre d'appels API simultanés ;
+    - la file est découpée par priorité, puis par session : à priorité égale,
+      les sessions sont servies à tour de rôle (une tâche chacune), si bien
+      qu'un utilisateur qui soumet beaucoup de travail ne bloque pas les autres ;
+    - contre-pression : au-delà de `max_pending_per_session` tâches en attente
+      pour une session, ou de `max_pending_total` au global, submit() lève
+      SchedulerBusy au lieu d'allonger la file.
+
+    Profondeur de file, tâches en cours et temps d'attente sont publiés dans
+    le registre de métriques.
+    """
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        max_pending_per_session: int = DEFAULT_MAX_PENDING_PER_SESSION,
+        max_pending_total: int = DEFAULT_MAX_PENDING_TOTAL,
+    ) -> None:
+        self.max_pending_per_session = max_pending_per_session
+        self.max_pending_total = max_pending_total
+        self._cond = threading.Condition()
+        # priorité -> (session -> tâches en attente), dans l'ordre de service
+        self._queues: Dict[int, "OrderedDict[str, Deque[_Job]]"] = {
+            p: OrderedDict() for p in sorted(PRIORITY_NAMES)
+        }
+        self._pending_by_session: Dict[str, int] = {}
+        self._pending = 0
+        self._running = 0
+        self._closed = False
+        self._threads: List[threading.Thread] = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._worker, name=f"scheduler-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(
+        self,
+        session_id: str,
+        fn: Callable[..., Any],
+        *args: Any,
+        priority: int = PRIORITY_NORMAL,
+        kind: str = "llm",
+        **kwargs: Any,
+    ) -> Future:
+        """
+        Ajoute une tâche à la file de `session_id` et renvoie son Future.
+
+        La tâche s'exécute dans une copie du contexte de l'appelant, pour que
+        les spans d'instrumentation restent rattachés à leur parent.
+
+        Raises:
+            SchedulerBusy: si la file de la session ou la file globale est pleine.
+        """
+        if priority not in self._queues:
+            raise ValueError(f"Priorité inconnue : {priority}")
+
+        context = contextvars.copy_context()
+        future: Future = Future()
+        job: _Job = (future, lambda: context.run(fn, *args, **kwargs), kind, time.perf_counter())
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("L'ordonnanceur est arrêté.")
+            if (
+                self._pending_by_session.get(session_id, 0) >= self.max_pending_per_session
+                or self._pending >= self.max_pending_total
+            ):
+                registry.inc("scheduler_rejected_total", kind=kind, priority=PRIORITY_NAMES[priority])
+                raise SchedulerBusy(
+                    "⏳ Le serveur traite déjà beaucoup de demandes. Réessaie dans quelques secondes."
+                )
+            self._queues[priority].setdefault(session_id, deque()).append(job)
+            self._pending_by_session[session_id] = self._pending_by_session.get(session_id, 0) + 1
+            self._pending += 1
+            self._publish_depth()
+            self._cond.notify()
+        return future
+
+    def run(
+        self,
+        session_id: str,
+        fn: Callable[..., Any],
+        *args: Any,
+        priority: int = PRIORITY_NORMAL,
+        kind: str = "llm",
+        timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Soumet une tâche et attend son résultat (les exceptions sont propagées).
+        """
+        future = self.submit(session_id, fn, *args, priority=priority, kind=kind, **kwargs)
+        return future.result(timeout=timeout)
+
+    def _next_job(self) -> Optional[Tuple[_Job, str, int]]:
+        # Appelé avec le verrou : priorité la plus haute, puis session suivante du tour
+        for priority, sessions in self._queues.items():
+            if not sessions:
+                continue
+            session_id, jobs = next(iter(sessions.items()))
+            job = jobs.popleft()
+            del sessions[session_id]
+            if jobs:
+                sessions[session_id] = jobs  # la session repasse en fin de tour
+            return job, session_id, priority
+        return None
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and self._pending == 0:
+                    self._cond.wait()
+                if self._pending == 0:
+                    return
+                (future, call, kind, queued_at), session_id, priority = self._next_job()
+                self._pending -= 1
+                remaining = self._pending_by_session[session_id] - 1
+                if remaining:
+                    self._pending_by_session[session_id] = remaining
+                else:
+                    del self._pending_by_session[session_id]
+                self._running += 1
+                self._publish_depth()
+
+            registry.observe(
+                "scheduler_wait_seconds",
+                time.perf_counter() - queued_at,
+                kind=kind,
+                priority=PRIORITY_NAMES[priority],
+            )
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(call())
+                    registry.inc("scheduler_jobs_total", kind=kind, result="ok")
+                except BaseException as e:
+                    future.set_exception(e)
+                    registry.inc("scheduler_jobs_total", kind=kind, result="error")
+
+            with self._cond:
+                self._running -= 1
+                self._publish_depth()
+
+    def _publish_depth(self) -> None:
+        # Appelé avec le verrou
+        for priority, sessions in self._queues.items():
+            depth = sum(len(jobs) for jobs in sessions.values())
+            registry.set_gauge("scheduler_queue_depth", depth, priority=PRIORITY_NAMES[priority])
+        registry.set_gauge("scheduler_running", self._running)
+        registry.set_gauge("scheduler_active_sessions", len(self._pending_by_session))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        État courant de la file (pour le panneau de debug).
+        """
+        with self._cond:
+            return {
+                "pending": self._pending,
+                "running": self._running,
+                "sessions": len(self._pending_by_session),
+                "workers": len(self._threads),
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Arrête le pool après avoir exécuté les tâches déjà en file.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
@@ -0,0 +1,299 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Colonnes numériques extraites de chaque évaluation (dans cet ordre)
+SCORE_FIELDS = ("score", "clarity", "relevance", "alignment", "depth")
+
+DEFAULT_PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def _to_int(value: Any) -> int:
+    """
+    Convertit un score en entier (0 si absent ou invalide), comme le faisait
+    l'ancien calcul des moyennes.
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+class _Codebook:
+    """
+    Dictionnaire chaîne -> code entier, pour stocker type/topic en colonnes int32.
+    """
+
+    def __init__(self) -> None:
+        self.labels: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, label: Any) -> int:
+        label = str(label or "")
+        code = self._codes.get(label)
+        if code is None:
+            code = len(self.labels)
+            self._codes[label] = code
+            self.labels.append(label)
+        return code
+
+
+class ScoreTable:
+    """
+    Représentation en colonnes (NumPy) d'un ensemble d'historiques d'entretien.
+
+    Chaque ligne correspond à une question évaluée :
+    - scores        : matrice (n, 5) float64 dans l'ordre de SCORE_FIELDS
+    - interview_ids : index de l'entretien d'origine
+    - positions     : rang de la question dans son entretien (0, 1, 2, ...)
+    - type_codes / topic_codes : codes entiers, libellés dans type_labels / topic_labels
+    """
+
+    def __init__(
+        self,
+        scores: np.ndarray,
+        interview_ids: np.ndarray,
+        positions: np.ndarray,
+        type_codes: np.ndarray,
+        topic_codes: np.ndarray,
+        type_labels: Sequence[str],
+        topic_labels: Sequence[str],
+        n_interviews: int,
+    ) -> None:
+        self.scores = scores
+        self.interview_ids = interview_ids
+        self.positions = positions
+        self.type_codes = type_codes
+        self.topic_codes = topic_codes
+        self.type_labels = list(type_labels)
+        self.topic_labels = list(topic_labels)
+        self.n_interviews = n_interviews
+
+    def __len__(self) -> int:
+        return int(self.scores.shape[0])
+
+    # ---------- Construction ----------
+
+    @classmethod
+    def from_histories(cls, histories: Iterable[List[Dict[str, Any]]]) -> "ScoreTable":
+        """
+        Charge plusieurs historiques (listes de records produits par app.py ou
+        interview_engine) en une seule table colonnaire.
+        """
+        types = _Codebook()
+        topics = _Codebook()
+
+        flat_scores: List[int] = []
+        interview_ids: List[int] = []
+        positions: List[int] = []
+        type_codes: List[int] = []
+        topic_codes: List[int] = []
+
+        n_interviews = 0
+        for interview_id, history in enumerate(histories):
+            n_interviews += 1
+            for position, record in enumerate(history):
+                eval_ = record.get("evaluation") or {}
+                flat_scores.extend(_to_int(eval_.get(field, 0)) for field in SCORE_FIELDS)
+                interview_ids.append(interview_id)
+                positions.append(position)
+                type_codes.append(types.code(record.get("type")))
+                topic_codes.append(topics.code(record.get("topic")))
+
+        scores = np.asarray(flat_scores, dtype=np.float64).reshape(-1, len(SCORE_FIELDS))
+
+        return cls(
+            scores=scores,
+            interview_ids=np.asarray(interview_ids, dtype=np.int32),
+            positions=np.asarray(positions, dtype=np.int32),
+            type_codes=np.asarray(type_codes, dtype=np.int32),
+            topic_codes=np.asarray(topic_codes, dtype=np.int32),
+            type_labels=types.labels,
+            topic_labels=topics.labels,
+            n_interviews=n_interviews,
+        )
+
+    def save(self, path: str) -> None:
+        """
+        Sauvegarde la table au format .npz (rechargement sans reparcourir les dicts).
+        Les libellés sont stockés en chaînes de largeur fixe : pas de pickle au chargement.
+        """
+        np.savez_compressed(
+            path,
+            scores=self.scores,
+            interview_ids=self.interview_ids,
+            positions=self.positions,
+            type_codes=self.type_codes,
+            topic_codes=self.topic_codes,
+            type_labels=np.asarray(self.type_labels, dtype=np.str_),
+            topic_labels=np.asarray(self.topic_labels, dtype=np.str_),
+            n_interviews=np.asarray(self.n_interviews),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "ScoreTable":
+        """
+        Raises:
+            ValueError: si le fichier contient des tableaux d'objets (ancien format picklé).
+        """
+        data = np.load(path, allow_pickle=False)
+        return cls(
+            scores=data["scores"],
+            interview_ids=data["interview_ids"],
+            positions=data["positions"],
+            type_codes=data["type_codes"],
+            topic_codes=data["topic_codes"],
+            type_labels=data["type_labels"].tolist(),
+            topic_labels=data["topic_labels"].tolist(),
+            n_interviews=int(data["n_interviews"]),
+        )
+
+    # ---------- Agrégats ----------
+
+    def column(self, field: str) -> np.ndarray:
+        return self.scores[:, SCORE_FIELDS.index(field)]
+
+    def means(self) -> Dict[str, float]:
+        if len(self) == 0:
+            return {field: 0.0 for field in SCORE_FIELDS}
+        values = self.scores.mean(axis=0)
+        return {field: float(v) for field, v in zip(SCORE_FIELDS, values)}
+
+    def summary(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, Dict[str, float]]:
+        """
+        Moyenne, variance, écart-type, min, max et percentiles de chaque critère.
+        """
+        if len(self) == 0:
+            return {field: {} for field in SCORE_FIELDS}
+
+        mean = self.scores.mean(axis=0)
+        var = self.scores.var(axis=0)
+        mins = self.scores.min(axis=0)
+        maxs = self.scores.max(axis=0)
+        pct = np.percentile(self.scores, percentiles, axis=0)
+
+        result: Dict[str, Dict[str, float]] = {}
+        for j, field in enumerate(SCORE_FIELDS):
+            stats = {
+                "mean": float(mean[j]),
+                "var": float(var[j]),
+                "std": float(np.sqrt(var[j])),
+                "min": float(mins[j]),
+                "max": float(maxs[j]),
+            }
+            for k, p in enumerate(percentiles):
+                stats[f"p{int(p)}"] = float(pct[k, j])
+            result[field] = stats
+        return result
+
+    def _grouped(self, codes: np.ndarray, n_groups: int) -> Dict[str, np.ndarray]:
+        counts = np.bincount(codes, minlength=n_groups).astype(np.float64)
+        safe = np.where(counts == 0, 1.0, counts)
+
+        sums = np.empty((n_groups, len(SCORE_FIELDS)))
+        sq_sums = np.empty_like(sums)
+        for j in range(len(SCORE_FIELDS)):
+            col = self.scores[:, j]
+            sums[:, j] = np.bincount(codes, weights=col, minlength=n_groups)
+            sq_sums[:, j] = np.bincount(codes, weights=col * col, minlength=n_groups)
+
+        means = sums / safe[:, None]
+        variances = np.maximum(sq_sums / safe[:, None] - means * means, 0.0)
+        return {"counts": counts, "means": means, "vars": variances}
+
+    def breakdown(self, by: str = "type") -> Dict[str, Dict[str, Any]]:
+        """
+        Statistiques par type de question (by="type") ou par thème (by="topic").
+
+        Returns:
+            { libellé: {"count": n, "mean": {critère: ...}, "var": {critère: ...}} }
+        """
+        if by == "type":
+            codes, labels = self.type_codes, self.type_labels
+        elif by == "topic":
+            codes, labels = self.topic_codes, self.topic_labels
+        else:
+            raise ValueError("Le paramètre 'by' doit valoir 'type' ou 'topic'.")
+
+        if len(self) == 0:
+            return {}
+
+        grouped = self._grouped(codes, len(labels))
+        result: Dict[str, Dict[str, Any]] = {}
+        for g, label in enumerate(labels):
+            if grouped["counts"][g] == 0:
+                continue
+            result[label] = {
+                "count": int(grouped["counts"][g]),
+                "mean": dict(zip(SCORE_FIELDS, grouped["means"][g].tolist())),
+                "var": dict(zip(SCORE_FIELDS, grouped["vars"][g].tolist())),
+            }
+        return result
+
+    def interview_means(self, field: str = "score") -> np.ndarray:
+        """
+        Moyenne d'un critère pour chaque entretien (NaN pour un entretien vide).
+        """
+        col = self.column(field)
+        counts = np.bincount(self.interview_ids, minlength=self.n_interviews).astype(np.float64)
+        sums = np.bincount(self.interview_ids, weights=col, minlength=self.n_interviews)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return sums / counts
+
+    def trend(self, field: str = "score") -> Dict[str, Any]:
+        """
+        Évolution d'un critère au fil de l'entretien :
+        - by_position : moyenne du critère pour la 1re, 2e, ... question
+        - slopes      : pente (régression linéaire score ~ position) de chaque entretien
+        - mean_slope  : pente moyenne sur les entretiens d'au moins 2 questions
+        """
+        if len(self) == 0:
+            return {"by_position": [], "slopes": np.zeros(0), "mean_slope": 0.0}
+
+        col = self.column(field)
+        x = self.positions.astype(np.float64)
+        ids = self.interview_ids
+        n_int = self.n_interviews
+
+        n_pos = int(self.positions.max()) + 1
+        pos_counts = np.bincount(self.positions, minlength=n_pos)
+        pos_sums = np.bincount(self.positions, weights=col, minlength=n_pos)
+        by_position = (pos_sums / np.where(pos_counts == 0, 1, pos_counts)).tolist()
+
+        n = np.bincount(ids, minlength=n_int).astype(np.float64)
+        sx = np.bincount(ids, weights=x, minlength=n_int)
+        sy = np.bincount(ids, weights=col, minlength=n_int)
+        sxx = np.bincount(ids, weights=x * x, minlength=n_int)
+        sxy = np.bincount(ids, weights=x * col, minlength=n_int)
+
+        denom = n * sxx - sx * sx
+        valid = denom > 0
+        slopes = np.full(n_int, np.nan)
+        slopes[valid] = (n[valid] * sxy[valid] - sx[valid] * sy[valid]) / denom[valid]
+
+        return {
+            "by_position": by_position,
+            "slopes": slopes,
+            "mean_slope": float(np.nanmean(slopes)) if valid.any() else 0.0,
+        }
+
+
+def analyze_histories(
+    histories: Iterable[List[Dict[str, Any]]],
+    percentiles: Optional[Sequence[float]] = None,
+) -> Dict[str, Any]:
+    """
+    Point d'entrée pour les tableaux de bord de cohorte : renvoie en une fois
+    les statistiques globales, par type, par thème et les tendances.
+    """
+    table = ScoreTable.from_histories(histories)
+    trend = table.trend("score")
+    return {
+        "n_interviews": table.n_interviews,
+        "n_questions": len(table),
+        "summary": table.summary(percentiles or DEFAULT_PERCENTILES),
+        "by_type": table.breakdown("type"),
+        "by_topic": table.breakdown("topic"),
+        "score_by_position": trend["by_position"],
+        "mean_score_slope": trend["mean_slope"],
+    }
@@ -0,0 +1,186 @@
+import json
+import os
+import secrets
+import sqlite3
+import time
+from typing import Any, Dict, List, Mapping, Optional
+
+from src.records import InterviewRecord
+
+# Emplacement par défaut de la base SQLite des sessions (surchargeable par variable d'env)
+DEFAULT_DB_PATH = os.getenv(
+    "INTERVIEW_SESSION_DB",
+    os.path.join("data", "sessions", "sessions.db"),
+)
+
+# Champs d'état sauvegardés tels quels (texte) ou sérialisés en JSON
+_TEXT_FIELDS = ("cv_text", "job_text")
+_JSON_FIELDS = ("profile", "plan", "transcriptions", "input_fingerprints", "adaptive", "conversation")
+_INT_FIELDS = ("current_question_index",)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    token                  TEXT PRIMARY KEY,
+    created_at             REAL NOT NULL,
+    updated_at             REAL NOT NULL,
+    cv_text                TEXT NOT NULL DEFAULT '',
+    job_text               TEXT NOT NULL DEFAULT '',
+    profile                TEXT,
+    plan                   TEXT NOT NULL DEFAULT '[]',
+    current_question_index INTEGER NOT NULL DEFAULT 0,
+    transcriptions         TEXT NOT NULL DEFAULT '{}',
+    input_fingerprints     TEXT NOT NULL DEFAULT '{}',
+    adaptive               TEXT NOT NULL DEFAULT '{}',
+    conversation           TEXT NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS history (
+    token    TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    record   TEXT NOT NULL,
+    PRIMARY KEY (token, position)
+);
+"""
+
+
+def new_session_token() -> str:
+    """
+    Génère un jeton de session opaque (utilisable dans l'URL).
+    """
+    return secrets.token_urlsafe(16)
+
+
+class SessionStore:
+    """
+    Persistance SQLite de l'état d'un entretien, indexée par jeton de session.
+
+    - l'état "global" (textes, profil, plan, index courant, transcriptions)
+      est une ligne de la table `sessions`, mise à jour champ par champ ;
+    - chaque record de l'historique est inséré séparément dans `history`
+      dès qu'il est évalué (écriture incrémentale), au format binaire de
+      InterviewRecord (les records JSON des bases existantes restent lisibles).
+
+    La reprise d'une session se fait par clé primaire : aucun appel LLM
+    n'est nécessaire pour retrouver profil, plan et évaluations.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH) -> None:
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            self._migrate(conn)
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        # Bases créées avant l'ajout des empreintes de fichiers
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(sessions)")}
+        if "input_fingerprints" not in columns:
+            conn.execute(
+                "ALTER TABLE sessions ADD COLUMN input_fingerprints TEXT NOT NULL DEFAULT '{}'"
+            )
+        # ... et avant les modes adaptatif et conversationnel
+        for column in ("adaptive", "conversation"):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE sessions ADD COLUMN {column} TEXT NOT NULL DEFAULT '{{}}'")
+
+    def _connect(self) -> sqlite3.Connection:
+        # Une connexion par opération : Streamlit exécute chaque session sur son propre thread.
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def save_state(self, token: str, **fields: Any) -> None:
+        """
+        Crée la session si besoin puis met à jour les champs fournis
+        (cv_text, job_text, profile, plan, current_question_index, transcriptions,
+        input_fingerprints, adaptive, conversation).
+        """
+        columns: Dict[str, Any] = {}
+        for name, value in fields.items():
+            if name in _TEXT_FIELDS:
+                columns[name] = value or ""
+            elif name in _JSON_FIELDS:
+                columns[name] = json.dumps(value, ensure_ascii=False)
+            elif name in _INT_FIELDS:
+                columns[name] = int(value)
+            else:
+                raise ValueError(f"Champ de session inconnu : {name}")
+
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO sessions (token, created_at, updated_at) VALUES (?, ?, ?)",
+                (token, now, now),
+            )
+            if columns:
+                assignments = ", ".join(f"{name} = ?" for name in columns)
+                conn.execute(
+                    f"UPDATE sessions SET {assignments}, updated_at = ? WHERE token = ?",
+                    (*columns.values(), now, token),
+                )
+
+    def append_history(self, token: str, position: int, record: Mapping[str, Any]) -> None:
+        """
+        Enregistre un record d'historique (question, réponse, évaluation) à sa position.
+        """
+        data = InterviewRecord.from_dict(record).to_bytes()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO history (token, position, record) VALUES (?, ?, ?)",
+                (token, position, data),
+            )
+            conn.execute(
+                "UPDATE sessions SET updated_at = ? WHERE token = ?",
+                (time.time(), token),
+            )
+
+    def clear_history(self, token: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM history WHERE token = ?", (token,))
+
+    def load(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Recharge l'état complet d'une session, ou None si le jeton est inconnu.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT cv_text, job_text, profile, plan, current_question_index, transcriptions, "
+                "input_fingerprints, adaptive, conversation FROM sessions WHERE token = ?",
+                (token,),
+            ).fetchone()
+            if row is None:
+                return None
+            history_rows = conn.execute(
+                "SELECT record FROM history WHERE token = ? ORDER BY position",
+                (token,),
+            ).fetchall()
+
+        cv_text, job_text, profile, plan, index, transcriptions, fingerprints, adaptive, conversation = row
+        history: List[InterviewRecord] = [
+            InterviewRecord.from_bytes(r[0]) if isinstance(r[0], bytes) else InterviewRecord.from_json(r[0])
+            for r in history_rows
+        ]
+
+        return {
+            "cv_text": cv_text,
+            "job_text": job_text,
+            "profile": json.loads(profile) if profile else None,
+            "plan": json.loads(plan) if plan else [],
+            "current_question_index": index,
+            # Les clés JSON sont des chaînes : on restaure les index entiers
+            "transcriptions": {int(k): v for k, v in json.loads(transcriptions or "{}").items()},
+            "input_fingerprints": json.loads(fingerprints or "{}"),
+            # Mode adaptatif : réserve de questions restantes et longueur visée ({} sinon)
+            "adaptive": json.loads(adaptive or "{}"),
+            # Mode conversationnel : état de src.conversation ({} sinon)
+            "conversation": json.loads(conversation or "{}"),
+            "history": history,
+        }
+
+    def delete(self, token: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM history WHERE token = ?", (token,))
+            conn.execute("DELETE FROM sessions WHERE token = ?", (token,))
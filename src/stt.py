@@ -1,11 +1,15 @@
-import requests
 import os
 
+from src.instrumentation import traced
+from src.llm_client import HTTP_TIMEOUT_S, http_session
 
-GROQ_WHISPER_URL = "https://api.groq.com/openai/v1/audio/transcriptions"
+
+GROQ_API_BASE = os.getenv("GROQ_API_BASE", "https://api.groq.com/openai/v1").rstrip("/")
+GROQ_WHISPER_URL = f"{GROQ_API_BASE}/audio/transcriptions"
 MODEL = "whisper-large-v3"
 
 
+@traced("stt")
 def transcribe_audio(audio_bytes: bytes, file_ext="wav") -> str:
     """
     Transcrit un audio (en bytes) via l'API Groq Whisper.
@@ -27,11 +31,12 @@ def transcribe_audio(audio_bytes: bytes, file_ext="wav") -> str:
         "Authorization": f"Bearer {api_key}"
     }
 
-    response = requests.post(
+    response = http_session().post(
         GROQ_WHISPER_URL,
         headers=headers,
         files=files,
-        data=data
+        data=data,
+        timeout=HTTP_TIMEOUT_S,
     )
 
     if response.status_code != 200:
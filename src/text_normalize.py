@@ -0,0 +1,24 @@
+"""
+Normalisation de texte partagée par l'index d'historique et le mémo des évaluations.
+"""
+import unicodedata
+
+# Diacritiques combinants (après décomposition NFKD), supprimés par str.translate
+_COMBINING = dict.fromkeys(range(0x300, 0x370))
+
+
+def strip_accents(text: str) -> str:
+    """
+    Texte sans accents (décomposition NFKD puis suppression des diacritiques).
+    """
+    text = text or ""
+    if text.isascii():
+        return text
+    return unicodedata.normalize("NFKD", text).translate(_COMBINING)
+
+
+def normalize(text: str) -> str:
+    """
+    Minuscules, sans accents ni espaces superflus.
+    """
+    return " ".join(strip_accents(text).lower().split())
@@ -0,0 +1,194 @@
+import math
+import os
+import re
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from src.instrumentation import registry
+
+# Nombre moyen de caractères par token (tokenizer Llama 3, texte français)
+CHARS_PER_TOKEN = 3.5
+# Surcoût par message (rôle, séparateurs du format de chat)
+TOKENS_PER_MESSAGE = 4
+
+# Taille maximale d'un prompt envoyé (au-delà, il est compacté puis tronqué)
+MAX_PROMPT_TOKENS = int(os.getenv("GROQ_MAX_PROMPT_TOKENS", "8000"))
+
+# Budgets de sortie initiaux par point d'appel, avant d'avoir assez d'observations
+DEFAULT_BUDGETS: Dict[str, int] = {
+    "extract_cv": 1200,
+    "extract_job": 900,
+    "fit_summary": 400,
+    "plan": 900,
+    "follow_up": 200,
+    "conversation": 200,
+    "conversation_notes": 300,
+    "evaluate": 500,
+    "report": 350,
+    "report_full": 900,
+}
+DEFAULT_BUDGET = 800
+
+# Apprentissage des budgets à partir des longueurs de sortie observées
+MIN_OBSERVATIONS = 5
+MAX_OBSERVATIONS = 200
+HEADROOM = 1.3
+MIN_BUDGET = 64
+MAX_BUDGET = 4096
+BUDGET_STEP = 32
+# Plancher posé après une sortie tronquée : réduit à chaque sortie complète
+# (divisé par 2 en 7 sorties environ), puis supprimé
+FLOOR_DECAY = 0.9
+
+_QUOTED_BLOCK_RE = re.compile(r'"""(.*?)"""', re.DOTALL)
+_TRUNCATION_MARK = " [...]"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimation locale (sans tokenizer) du nombre de tokens d'un texte.
+    """
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def estimate_messages_tokens(messages: List[Dict[str, str]]) -> int:
+    return sum(estimate_tokens(m.get("content", "")) + TOKENS_PER_MESSAGE for m in messages)
+
+
+def compact_whitespace(text: str) -> str:
+    """
+    Supprime l'indentation et les lignes vides superflues (prompts écrits en f-string indentée).
+    """
+    lines = [line.strip() for line in text.strip().splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Tronque un texte à environ `max_tokens` tokens, sur une frontière de mot.
+    """
+    max_chars = int(max_tokens * CHARS_PER_TOKEN)
+    if len(text) <= max_chars:
+        return text
+    cut = max(0, max_chars - len(_TRUNCATION_MARK))
+    return text[:cut].rsplit(" ", 1)[0] + _TRUNCATION_MARK
+
+
+def _trim_largest_block(text: str, excess_tokens: int) -> str:
+    """
+    Raccourcit le plus long bloc \"\"\"...\"\"\" du prompt (CV, offre, réponse...)
+    d'environ `excess_tokens` tokens ; à défaut de bloc, tronque la fin du texte.
+    """
+    blocks = list(_QUOTED_BLOCK_RE.finditer(text))
+    if not blocks:
+        return trim_to_tokens(text, max(estimate_tokens(text) - excess_tokens, 0))
+
+    largest = max(blocks, key=lambda m: len(m.group(1)))
+    content = largest.group(1)
+    trimmed = trim_to_tokens(content, max(estimate_tokens(content) - excess_tokens, 0))
+    return text[:largest.start(1)] + trimmed + text[largest.end(1):]
+
+
+def fit_messages(
+    messages: List[Dict[str, str]],
+    max_prompt_tokens: int = MAX_PROMPT_TOKENS,
+) -> List[Dict[str, str]]:
+    """
+    Garde-fou avant envoi : si le prompt estimé dépasse `max_prompt_tokens`,
+    compacte les espaces de tous les messages, puis, si cela ne suffit pas,
+    raccourcit le plus long bloc cité du plus long message.
+
+    Returns:
+        Les messages (inchangés s'ils tiennent dans la limite).
+    """
+    total = estimate_messages_tokens(messages)
+    if total <= max_prompt_tokens:
+        return messages
+
+    registry.inc("prompt_compactions_total", step="whitespace")
+    fitted = [dict(m, content=compact_whitespace(m.get("content", ""))) for m in messages]
+    total = estimate_messages_tokens(fitted)
+    if total <= max_prompt_tokens:
+        return fitted
+
+    registry.inc("prompt_compactions_total", step="trim")
+    longest = max(range(len(fitted)), key=lambda i: len(fitted[i]["content"]))
+    fitted[longest]["content"] = _trim_largest_block(
+        fitted[longest]["content"], total - max_prompt_tokens
+    )
+    return fitted
+
+
+class OutputBudgets:
+    """
+    Budgets `max_tokens` par point d'appel, appris à partir des longueurs de
+    sortie observées : p95 des dernières sorties + marge, arrondi et borné.
+
+    Une sortie tronquée (finish_reason "length") ne donne qu'une borne
+    inférieure de la vraie longueur : le budget de ce point d'appel est alors
+    au moins doublé pour les appels suivants. Ce plancher décroît à chaque
+    sortie complète, et disparaît une fois sous le budget appris ou sous MIN_BUDGET.
+    """
+
+    def __init__(self, defaults: Optional[Dict[str, int]] = None) -> None:
+        self.defaults = dict(DEFAULT_BUDGETS if defaults is None else defaults)
+        self._lock = threading.Lock()
+        self._observed: Dict[str, Deque[int]] = {}
+        self._floors: Dict[str, int] = {}
+
+    def max_tokens(self, call_site: Optional[str]) -> int:
+        default = self.defaults.get(call_site or "", DEFAULT_BUDGET)
+        with self._lock:
+            observed = list(self._observed.get(call_site or "", ()))
+            floor = self._floors.get(call_site or "", 0)
+
+        if len(observed) >= MIN_OBSERVATIONS:
+            observed.sort()
+            p95 = observed[min(len(observed) - 1, int(0.95 * len(observed)))]
+            budget = math.ceil(p95 * HEADROOM / BUDGET_STEP) * BUDGET_STEP
+        else:
+            budget = default
+        return min(max(budget, floor, MIN_BUDGET), MAX_BUDGET)
+
+    def observe(self, call_site: Optional[str], completion_tokens: int, max_tokens: int, truncated: bool) -> None:
+        site = call_site or ""
+        registry.inc("llm_reserved_tokens_total", max_tokens, call_site=site)
+        registry.inc("llm_unused_reserved_tokens_total", max(max_tokens - completion_tokens, 0), call_site=site)
+        if truncated:
+            registry.inc("llm_truncations_total", call_site=site)
+
+        with self._lock:
+            window = self._observed.setdefault(site, deque(maxlen=MAX_OBSERVATIONS))
+            if truncated:
+                self._floors[site] = min(max(self._floors.get(site, 0), 2 * max_tokens), MAX_BUDGET)
+                window.append(2 * max_tokens)
+            else:
+                window.append(completion_tokens)
+                if site in self._floors:
+                    self._decay_floor(site, window)
+
+    def _decay_floor(self, site: str, window: Deque[int]) -> None:
+        # Appelé sous self._lock
+        floor = int(self._floors[site] * FLOOR_DECAY)
+        learned = 0
+        if len(window) >= MIN_OBSERVATIONS:
+            ordered = sorted(window)
+            learned = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * HEADROOM
+        if floor <= max(learned, MIN_BUDGET):
+            del self._floors[site]
+        else:
+            self._floors[site] = floor
+
+    def snapshot(self) -> Dict[str, int]:
+        """
+        Budget courant de chaque point d'appel connu (pour le panneau de debug).
+        """
+        with self._lock:
+            sites = set(self.defaults) | set(self._observed)
+        return {site: self.max_tokens(site) for site in sorted(sites) if site}
+
+
+budgets = OutputBudgets()
@@ -1,12 +1,17 @@
 import io
-from gtts import gTTS
 
+from src.instrumentation import traced
 
+
+@traced("tts")
 def question_to_audio(text: str) -> bytes:
     """
     Convertit un texte en audio MP3 (TTS) et renvoie les bytes.
     Compatible pour app1 (simple) et app2 (avancé).
     """
+    # Import paresseux : gTTS n'est chargé que si la synthèse vocale est utilisée
+    from gtts import gTTS
+
     audio_buffer = io.BytesIO()
     tts = gTTS(text=text, lang="fr")
     tts.write_to_fp(audio_buffer)